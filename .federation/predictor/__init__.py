@@ -1,17 +1,29 @@
 """
 Predictor package for ML-enhanced task routing.
+
+Components are imported on first attribute access so that importing one
+module (or the package) does not pay for the others.
 """
 
-from .feature_extractor import FeatureExtractor
-from .similarity_engine import SimilarityEngine, AgentProfile, MatchResult
-from .historical_learner import HistoricalLearner
+import importlib
+
+_EXPORTS = {
+    "FeatureExtractor": ".feature_extractor",
+    "SimilarityEngine": ".similarity_engine",
+    "AgentProfile": ".similarity_engine",
+    "MatchResult": ".similarity_engine",
+    "HistoricalLearner": ".historical_learner",
+    "LearningLog": ".learning_log",
+}
 
-__all__ = [
-    "FeatureExtractor",
-    "SimilarityEngine",
-    "AgentProfile",
-    "MatchResult",
-    "HistoricalLearner",
-]
+__all__ = list(_EXPORTS)
 
 __version__ = "1.0.0"
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -7,7 +7,7 @@ Implements lightweight TF-IDF vectorization using only standard library.
 import json
 import math
 import re
-from collections import Counter
+from collections import Counter, OrderedDict
 from pathlib import Path
 from typing import Dict, List, Set, Tuple
 
@@ -142,12 +142,27 @@ class FeatureExtractor:
         'neck'
     }
     
-    def __init__(self, data_dir: str = ".federation/predictor/data"):
+    # Maximum number of memoized vectorization results
+    VECTOR_CACHE_SIZE = 1024
+    
+    def __init__(
+        self,
+        data_dir: str = ".federation/predictor/data",
+        cache_size: int = VECTOR_CACHE_SIZE,
+        load_idf: bool = True
+    ):
         self.data_dir = Path(data_dir)
         self.data_dir.mkdir(parents=True, exist_ok=True)
         self.idf_cache: Dict[str, float] = {}
         self.document_count = 0
-        self._load_idf()
+        # Bumped on every IDF change; part of every vector cache key
+        self.idf_version = 0
+        self.cache_size = cache_size
+        self._vector_cache: "OrderedDict[Tuple, Dict]" = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        if load_idf:
+            self._load_idf()
     
     def _load_idf(self) -> None:
         """Load IDF values from cache if available."""
@@ -217,10 +232,63 @@ class FeatureExtractor:
             else:
                 self.idf_cache[term] = math.log(self.document_count / doc_freq) + 1 if doc_freq > 0 else 0
         
+        # Cached vectors were weighted with the old IDF values
+        self.idf_version += 1
+        self._vector_cache.clear()
+        
         self._save_idf()
     
+    @staticmethod
+    def _normalize(text: str) -> str:
+        """Normalize text for cache lookups (case and whitespace insensitive)."""
+        return " ".join(text.lower().split())
+    
+    def _cache_get(self, key: Tuple):
+        """Look up a memoized result, marking it most recently used."""
+        result = self._vector_cache.get(key)
+        if result is None:
+            self.cache_misses += 1
+            return None
+        self._vector_cache.move_to_end(key)
+        self.cache_hits += 1
+        return result
+    
+    def _cache_put(self, key: Tuple, result: Dict) -> None:
+        """Memoize a result, evicting the least recently used entry when full."""
+        if self.cache_size <= 0:
+            return
+        self._vector_cache[key] = result
+        if len(self._vector_cache) > self.cache_size:
+            self._vector_cache.popitem(last=False)
+    
+    def get_cache_stats(self) -> Dict:
+        """Get vectorization cache statistics."""
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            "size": len(self._vector_cache),
+            "capacity": self.cache_size,
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "hit_rate": round(self.cache_hits / lookups, 3) if lookups else 0.0,
+            "idf_version": self.idf_version
+        }
+    
     def vectorize(self, text: str, use_ngrams: bool = True) -> Dict[str, float]:
-        """Convert text to TF-IDF vector."""
+        """Convert text to TF-IDF vector.
+        
+        Results are memoized; callers must treat the returned dict as read-only.
+        """
+        key = ("vector", self._normalize(text), use_ngrams, self.idf_version)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
+        
+        tfidf = self._compute_vector(text, use_ngrams)
+        self._cache_put(key, tfidf)
+        return tfidf
+    
+    def _compute_vector(self, text: str, use_ngrams: bool) -> Dict[str, float]:
+        """Compute the TF-IDF vector for text (uncached)."""
         tokens = self.tokenize(text)
         if use_ngrams:
             bigrams = self.extract_ngrams(tokens, 2)
@@ -243,8 +311,16 @@ class FeatureExtractor:
         return tfidf
     
     def vectorize_task(self, task_description: str, task_type: str = "") -> Dict:
-        """Vectorize a task with metadata."""
+        """Vectorize a task with metadata.
+        
+        Results are memoized; callers must treat the returned dict as read-only.
+        """
         text = f"{task_type} {task_description}".strip()
+        key = ("task", self._normalize(text), self.idf_version)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
+        
         vector = self.vectorize(text)
         
         # Extract domain hints
@@ -253,13 +329,15 @@ class FeatureExtractor:
         # Estimate complexity
         complexity = self._estimate_complexity(text)
         
-        return {
+        features = {
             "tfidf_vector": vector,
             "domains": domains,
             "complexity": complexity,
             "term_count": len(self.tokenize(text)),
             "unique_terms": len(vector)
         }
+        self._cache_put(key, features)
+        return features
     
     def _extract_domains(self, text: str) -> List[str]:
         """Extract domain categories from text."""
@@ -4,11 +4,14 @@ Historical Learner for Predictive Routing
 Learns from past task completions to improve routing accuracy.
 """
 
-import json
+import heapq
+import math
+import sys
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
+from .learning_log import LearningLog
 from .similarity_engine import SimilarityEngine
 
 
@@ -18,43 +21,55 @@ class HistoricalLearner:
     def __init__(
         self,
         queue_dir: str = ".federation/queue",
-        predictor_data_dir: str = ".federation/predictor/data"
+        predictor_data_dir: str = ".federation/predictor/data",
+        engine: Optional[SimilarityEngine] = None
     ):
         self.queue_dir = Path(queue_dir)
         self.data_dir = Path(predictor_data_dir)
         self.data_dir.mkdir(parents=True, exist_ok=True)
-        self.engine = SimilarityEngine(str(predictor_data_dir))
-        self.learning_log: List[Dict] = []
-        self._load_learning_log()
+        # Share the router's engine so profiles and the vector cache stay in one place
+        self.engine = engine or SimilarityEngine(str(predictor_data_dir))
+        self.log = LearningLog(str(predictor_data_dir))
+        # Per-agent index of past task vectors: agent_id -> [(vector, norm, event)]
+        self._task_index: Optional[Dict[str, List[Tuple[Dict[str, float], float, Dict]]]] = None
     
-    def _load_learning_log(self) -> None:
-        """Load learning log from disk."""
-        log_file = self.data_dir / "learning_log.json"
-        if log_file.exists():
-            with open(log_file) as f:
-                self.learning_log = json.load(f)
+    @property
+    def learning_log(self) -> List[Dict]:
+        """Full learning history (read from disk on first access)."""
+        return self.log.events()
     
-    def _save_learning_log(self) -> None:
-        """Save learning log to disk."""
-        log_file = self.data_dir / "learning_log.json"
-        with open(log_file, "w") as f:
-            json.dump(self.learning_log, f, indent=2)
+    def _open_queue(self):
+        """The federation queue at queue_dir, through its configured storage backend."""
+        scripts_dir = Path(__file__).resolve().parents[2] / "scripts"
+        if str(scripts_dir) not in sys.path:
+            sys.path.insert(0, str(scripts_dir))
+        from federation_queue import FederationQueue  # Only learning runs need the queue
+        
+        return FederationQueue(
+            queue_dir=self.queue_dir,
+            state_file=self.queue_dir.parent / "state" / "federation-state.json"
+        )
     
-    def scan_completed_tasks(self) -> List[Dict]:
-        """Scan completed tasks from queue directory."""
-        completed_dir = self.queue_dir / "completed"
-        if not completed_dir.exists():
+    def scan_completed_tasks(self, skip_learned: bool = False) -> List[Dict]:
+        """Completed tasks from the queue storage backend and its archive.
+        
+        With skip_learned, archived tasks already in the learning log are not
+        decompressed (the archive index alone says which IDs it holds).
+        """
+        if not self.queue_dir.exists():
             return []
         
-        tasks = []
-        for task_file in completed_dir.glob("*.json"):
-            try:
-                with open(task_file) as f:
-                    task = json.load(f)
-                    task["_source_file"] = str(task_file)
+        queue = self._open_queue()
+        try:
+            tasks = queue.list_tasks(status="completed")
+            for task_id in queue.archive.task_ids():
+                if skip_learned and self.log.has_task(task_id):
+                    continue
+                task = queue.archive.load(task_id)
+                if task and task.get("status") == "completed":
                     tasks.append(task)
-            except (json.JSONDecodeError, IOError):
-                continue
+        finally:
+            queue.storage.close()
         
         return tasks
     
@@ -64,7 +79,8 @@ class HistoricalLearner:
         if task.get("status") != "completed":
             return None
         
-        assigned_to = task.get("assigned_to", "")
+        # Queue tasks name their assignee to_agent
+        assigned_to = task.get("assigned_to") or task.get("to_agent", "")
         completed_by = task.get("completed_by", assigned_to)
         
         if not completed_by:
@@ -78,7 +94,7 @@ class HistoricalLearner:
         success = True
         
         return {
-            "task_id": task.get("id", "unknown"),
+            "task_id": task.get("id") or task.get("task_id", "unknown"),
             "description": task.get("description", ""),
             "completed_by": completed_by,
             "success": success,
@@ -130,15 +146,18 @@ class HistoricalLearner:
             "agent_id": agent_id,
             "success": success,
             "duration": duration,
+            "description": description,
             "learned": True
         }
-        self.learning_log.append(learning_entry)
+        self.log.append(learning_entry)
+        if self._task_index is not None:
+            self._index_event(learning_entry)
         
         return True
     
     def learn_from_all_completed(self) -> Dict:
         """Learn from all completed tasks."""
-        tasks = self.scan_completed_tasks()
+        tasks = self.scan_completed_tasks(skip_learned=True)
         
         learned_count = 0
         skipped_count = 0
@@ -146,8 +165,8 @@ class HistoricalLearner:
         
         for task in tasks:
             # Check if already learned
-            task_id = task.get("id", "")
-            if any(log.get("task_id") == task_id for log in self.learning_log):
+            task_id = task.get("id") or task.get("task_id", "")
+            if self.log.has_task(task_id):
                 skipped_count += 1
                 continue
             
@@ -162,43 +181,48 @@ class HistoricalLearner:
             except Exception as e:
                 errors.append(f"{task_id}: {str(e)}")
         
-        self._save_learning_log()
-        
         return {
             "total_tasks": len(tasks),
             "learned": learned_count,
             "skipped": skipped_count,
             "errors": errors,
-            "total_learning_events": len(self.learning_log)
+            "total_learning_events": len(self.log)
         }
     
     def get_learning_stats(self) -> Dict:
         """Get statistics about learning progress."""
-        if not self.learning_log:
+        stats = self.log.stats()
+        if not stats["total_events"]:
             return {"status": "no_data"}
         
-        # Calculate success rate trend
-        recent_events = self.learning_log[-50:]  # Last 50 events
-        success_rate = sum(1 for e in recent_events if e.get("success")) / len(recent_events)
-        
-        # Calculate average duration
-        durations = [e.get("duration", 0) for e in self.learning_log if e.get("duration")]
-        avg_duration = sum(durations) / len(durations) if durations else 0
+        # Success rate over the most recent events
+        recent_events = stats["recent"]
+        success_rate = sum(recent_events) / len(recent_events)
         
-        # Count by agent
-        agent_counts = {}
-        for event in self.learning_log:
-            agent = event.get("agent_id", "unknown")
-            agent_counts[agent] = agent_counts.get(agent, 0) + 1
+        # Average duration over events that recorded one
+        avg_duration = (
+            stats["duration_sum"] / stats["duration_count"]
+            if stats["duration_count"] else 0
+        )
         
         return {
             "status": "active",
-            "total_learning_events": len(self.learning_log),
+            "total_learning_events": stats["total_events"],
             "recent_success_rate": round(success_rate, 2),
             "avg_task_duration": round(avg_duration, 1),
-            "learning_by_agent": agent_counts,
-            "first_learning": self.learning_log[0].get("timestamp") if self.learning_log else None,
-            "last_learning": self.learning_log[-1].get("timestamp") if self.learning_log else None
+            "learning_by_agent": {
+                agent: data["count"] for agent, data in stats["agents"].items()
+            },
+            "agent_stats": {
+                agent: {
+                    "count": data["count"],
+                    "success_rate": round(data["successes"] / data["count"], 2),
+                    "total_duration": round(data["duration_sum"], 1)
+                }
+                for agent, data in stats["agents"].items()
+            },
+            "first_learning": stats["first_timestamp"],
+            "last_learning": stats["last_timestamp"]
         }
     
     def predict_success_probability(
@@ -207,6 +231,19 @@ class HistoricalLearner:
         task_description: str
     ) -> float:
         """Predict probability of success for agent-task pair."""
+        task_vector = self.engine.extractor.vectorize(task_description)
+        return self._predict_from_vector(agent_id, task_vector)
+    
+    def predict_success_probabilities(self, task_description: str) -> Dict[str, float]:
+        """Predict success probability of every known agent for one task."""
+        task_vector = self.engine.extractor.vectorize(task_description)
+        return {
+            agent_id: self._predict_from_vector(agent_id, task_vector)
+            for agent_id in self.engine.get_all_profiles()
+        }
+    
+    def _predict_from_vector(self, agent_id: str, task_vector: Dict[str, float]) -> float:
+        """Blend an agent's base success rate with its most similar past tasks."""
         profile = self.engine.get_profile(agent_id)
         if not profile:
             return 0.5  # Unknown agent
@@ -215,12 +252,15 @@ class HistoricalLearner:
         base_rate = profile.success_rate
         
         # Check for similar past tasks
-        similar_tasks = self._find_similar_past_tasks(agent_id, task_description)
+        similar_tasks = self._top_similar(agent_id, task_vector)
         
-        if similar_tasks:
-            # Weight recent similar tasks more heavily
-            recent_success = sum(1 for t in similar_tasks if t.get("success")) / len(similar_tasks)
-            # Blend base rate with recent similar task success
+        # Weight each similar task's outcome by how close it is to this one
+        total_similarity = sum(similarity for similarity, _ in similar_tasks)
+        if total_similarity > 0:
+            recent_success = sum(
+                similarity for similarity, event in similar_tasks if event.get("success")
+            ) / total_similarity
+            # Blend base rate with similar task success
             return 0.6 * base_rate + 0.4 * recent_success
         
         return base_rate
@@ -231,40 +271,85 @@ class HistoricalLearner:
         task_description: str,
         n: int = 5
     ) -> List[Dict]:
-        """Find similar past tasks completed by agent."""
-        agent_events = [
-            e for e in self.learning_log
-            if e.get("agent_id") == agent_id
+        """Find the n past tasks completed by agent most similar to the description."""
+        task_vector = self.engine.extractor.vectorize(task_description)
+        return [
+            {**event, "similarity": round(similarity, 4)}
+            for similarity, event in self._top_similar(agent_id, task_vector, n)
         ]
+    
+    def _top_similar(
+        self,
+        agent_id: str,
+        task_vector: Dict[str, float],
+        n: int = 5
+    ) -> List[Tuple[float, Dict]]:
+        """Rank the agent's indexed past tasks by cosine similarity to a vector."""
+        entries = self._get_task_index().get(agent_id)
+        if not entries or not task_vector:
+            return []
         
-        # Get corresponding task data
-        tasks = []
-        for event in agent_events:
-            task_data = self._get_task_data(event.get("task_id", ""))
-            if task_data:
-                tasks.append({**event, **task_data})
+        norm = math.sqrt(sum(v * v for v in task_vector.values()))
+        if norm == 0:
+            return []
         
-        # Sort by recency (most recent first)
-        tasks.sort(key=lambda x: x.get("timestamp", ""), reverse=True)
+        scored = []
+        for vector, entry_norm, event in entries:
+            # Iterate the smaller vector for the dot product
+            small, large = (task_vector, vector) if len(task_vector) < len(vector) else (vector, task_vector)
+            dot = sum(weight * large.get(term, 0.0) for term, weight in small.items())
+            if dot > 0:
+                scored.append((dot / (norm * entry_norm), event.get("timestamp", ""), event))
         
-        return tasks[:n]
+        # Highest similarity first; more recent tasks win ties
+        top = heapq.nlargest(n, scored, key=lambda x: (x[0], x[1]))
+        return [(similarity, event) for similarity, _, event in top]
     
-    def _get_task_data(self, task_id: str) -> Optional[Dict]:
-        """Get task data from queue."""
-        for status in ["completed", "in-progress", "pending"]:
-            task_file = self.queue_dir / status / f"{task_id}.json"
-            if task_file.exists():
-                try:
-                    with open(task_file) as f:
-                        return json.load(f)
-                except (json.JSONDecodeError, IOError):
-                    continue
-        return None
+    def _get_task_index(self) -> Dict[str, List[Tuple[Dict[str, float], float, Dict]]]:
+        """Build the per-agent task vector index from the learning log on first use."""
+        if self._task_index is None:
+            self._task_index = {}
+            backfill = None
+            for event in self.learning_log:
+                if not event.get("description"):
+                    # Events logged before descriptions were recorded: look the task up once
+                    if backfill is None:
+                        backfill = self._descriptions_by_task_id()
+                    description = backfill.get(event.get("task_id")) or event.get("title")
+                    if description:
+                        event = {**event, "description": description}
+                self._index_event(event)
+        return self._task_index
+    
+    def _descriptions_by_task_id(self) -> Dict[str, str]:
+        """Task descriptions (or titles) from the completed queue tasks, by task ID."""
+        descriptions = {}
+        for task in self.scan_completed_tasks():
+            task_id = task.get("id") or task.get("task_id")
+            description = task.get("description") or task.get("title")
+            if task_id and description:
+                descriptions[task_id] = description
+        return descriptions
+    
+    def _index_event(self, event: Dict) -> None:
+        """Add a learning event's task vector to the index."""
+        description = event.get("description")
+        if not description:
+            return  # Legacy event whose task is no longer on record
+        
+        vector = self.engine.extractor.vectorize(description)
+        norm = math.sqrt(sum(v * v for v in vector.values()))
+        if norm == 0:
+            return
+        
+        self._task_index.setdefault(event.get("agent_id", "unknown"), []).append(
+            (vector, norm, event)
+        )
     
     def reset_learning(self) -> None:
         """Reset all learning data (use with caution)."""
-        self.learning_log = []
-        self._save_learning_log()
+        self.log.reset()
+        self._task_index = None
         
         # Reset profiles to defaults
         self.engine = SimilarityEngine(str(self.data_dir))
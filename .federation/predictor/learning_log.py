@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Learning Log for Predictive Routing
+Append-only JSONL event log with segment compaction and rolling statistics.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+
+class LearningLog:
+    """Append-only store of learning events with incrementally maintained stats.
+
+    Events are appended to ``learning_log.jsonl``. Once the active file holds
+    ``compact_threshold`` events it is rolled into ``learning_segments/`` and the
+    aggregates covering every segment are written to ``learning_stats.json``, so
+    opening the log only replays the short active file. The snapshot also
+    carries the IDs of every learned task, so checking whether a task was
+    already learned never reads the segments.
+    """
+
+    LOG_FILE = "learning_log.jsonl"
+    STATS_FILE = "learning_stats.json"
+    SEGMENTS_DIR = "learning_segments"
+    LEGACY_FILE = "learning_log.json"
+
+    COMPACT_THRESHOLD = 1000
+    RECENT_WINDOW = 50
+
+    def __init__(self, data_dir: str, compact_threshold: int = COMPACT_THRESHOLD):
+        self.data_dir = Path(data_dir)
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        self.log_file = self.data_dir / self.LOG_FILE
+        self.stats_file = self.data_dir / self.STATS_FILE
+        self.segments_dir = self.data_dir / self.SEGMENTS_DIR
+        self.compact_threshold = compact_threshold
+
+        self._stats = self._empty_stats()
+        self._task_ids: Set[str] = set()
+        self._active_count = 0
+        self._events: Optional[List[Dict]] = None  # Full history, loaded on demand
+        self._load()
+
+    def _empty_stats(self) -> Dict:
+        return {
+            "total_events": 0,
+            "segments": 0,
+            "duration_sum": 0.0,
+            "duration_count": 0,
+            "recent": [],
+            "first_timestamp": None,
+            "last_timestamp": None,
+            "agents": {}
+        }
+
+    def _segment_path(self, number: int) -> Path:
+        return self.segments_dir / f"segment-{number:06d}.jsonl"
+
+    def _load(self) -> None:
+        """Load the stats snapshot and replay the active log on top of it."""
+        if self.stats_file.exists():
+            with open(self.stats_file) as f:
+                self._stats = json.load(f)
+            if "task_ids" in self._stats:
+                self._task_ids = set(self._stats.pop("task_ids"))
+            else:
+                self._backfill_task_ids()
+
+        # A snapshot written just before a crash may already cover the active log
+        pending_segment = self._segment_path(self._stats["segments"])
+        if self._stats["segments"] and not pending_segment.exists() and self.log_file.exists():
+            self.segments_dir.mkdir(exist_ok=True)
+            os.replace(self.log_file, pending_segment)
+
+        if self.log_file.exists():
+            for event in self._read_events(self.log_file):
+                self._apply(event)
+                self._active_count += 1
+        elif (self.data_dir / self.LEGACY_FILE).exists():
+            self._migrate_legacy()
+
+    def _backfill_task_ids(self) -> None:
+        """Collect learned task IDs from the segments of a snapshot written without them (once)."""
+        for number in range(1, self._stats["segments"] + 1):
+            segment = self._segment_path(number)
+            if segment.exists():
+                self._task_ids.update(
+                    event["task_id"] for event in self._read_events(segment) if event.get("task_id")
+                )
+        self._write_stats()
+
+    def _migrate_legacy(self) -> None:
+        """Convert a single-array learning_log.json into the JSONL layout."""
+        legacy_file = self.data_dir / self.LEGACY_FILE
+        with open(legacy_file) as f:
+            events = json.load(f)
+        with open(self.log_file, "w") as f:
+            for event in events:
+                f.write(json.dumps(event) + "\n")
+                self._apply(event)
+        self._active_count = len(events)
+        legacy_file.unlink()
+        if self._active_count >= self.compact_threshold:
+            self.compact()
+
+    @staticmethod
+    def _read_events(path: Path) -> List[Dict]:
+        events = []
+        with open(path) as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    events.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue  # Torn final line from an interrupted append
+        return events
+
+    def _apply(self, event: Dict) -> None:
+        """Fold one event into the rolling aggregates."""
+        stats = self._stats
+        if event.get("task_id"):
+            self._task_ids.add(event["task_id"])
+        success = bool(event.get("success"))
+        duration = event.get("duration")
+
+        stats["total_events"] += 1
+        if duration:
+            stats["duration_sum"] += duration
+            stats["duration_count"] += 1
+        stats["recent"].append(success)
+        del stats["recent"][:-self.RECENT_WINDOW]
+        if stats["first_timestamp"] is None:
+            stats["first_timestamp"] = event.get("timestamp")
+        stats["last_timestamp"] = event.get("timestamp")
+
+        agent = stats["agents"].setdefault(event.get("agent_id", "unknown"), {
+            "count": 0,
+            "successes": 0,
+            "duration_sum": 0.0
+        })
+        agent["count"] += 1
+        if success:
+            agent["successes"] += 1
+        agent["duration_sum"] += duration or 0.0
+
+    def append(self, event: Dict) -> None:
+        """Append an event and update aggregates; compacts when the active file is full."""
+        with open(self.log_file, "a") as f:
+            f.write(json.dumps(event) + "\n")
+        self._apply(event)
+        self._active_count += 1
+        if self._events is not None:
+            self._events.append(event)
+
+        if self._active_count >= self.compact_threshold:
+            self.compact()
+
+    def compact(self) -> Optional[Path]:
+        """Roll the active log into a new snapshot segment."""
+        if not self._active_count:
+            return None
+
+        self.segments_dir.mkdir(exist_ok=True)
+        self._stats["segments"] += 1
+        segment = self._segment_path(self._stats["segments"])
+
+        # Snapshot first: on restart a missing segment means the rename is still due
+        self._write_stats()
+        os.replace(self.log_file, segment)
+        self._active_count = 0
+        return segment
+
+    def _write_stats(self) -> None:
+        temp_file = self.stats_file.with_suffix(".tmp")
+        with open(temp_file, "w") as f:
+            json.dump({**self._stats, "task_ids": sorted(self._task_ids)}, f, indent=2)
+        os.replace(temp_file, self.stats_file)
+
+    def events(self) -> List[Dict]:
+        """Full event history in append order (segments are read on first call)."""
+        if self._events is None:
+            events = []
+            for number in range(1, self._stats["segments"] + 1):
+                segment = self._segment_path(number)
+                if segment.exists():
+                    events.extend(self._read_events(segment))
+            if self.log_file.exists():
+                events.extend(self._read_events(self.log_file))
+            self._events = events
+        return self._events
+
+    def has_task(self, task_id: str) -> bool:
+        """Whether an event for task_id has been logged; O(1)."""
+        return task_id in self._task_ids
+
+    def stats(self) -> Dict:
+        """Rolling aggregates; O(1) regardless of history length."""
+        return self._stats
+
+    def reset(self) -> None:
+        """Delete all events, segments and aggregates."""
+        for number in range(1, self._stats["segments"] + 1):
+            self._segment_path(number).unlink(missing_ok=True)
+        self.log_file.unlink(missing_ok=True)
+        self.stats_file.unlink(missing_ok=True)
+        self._stats = self._empty_stats()
+        self._task_ids = set()
+        self._active_count = 0
+        self._events = []
+
+    def __len__(self) -> int:
+        return self._stats["total_events"]
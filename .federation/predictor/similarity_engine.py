@@ -4,7 +4,10 @@ Similarity Engine for Predictive Routing
 Matches tasks to agents using cosine similarity and capability profiles.
 """
 
+import heapq
 import json
+import math
+import os
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass, asdict
@@ -100,12 +103,102 @@ class SimilarityEngine:
         }
     }
     
-    def __init__(self, data_dir: str = ".federation/predictor/data"):
+    # Startup snapshot: profiles, IDF and profile norms in a single file
+    SNAPSHOT_FILE = "startup_snapshot.json"
+    SNAPSHOT_SOURCES = ("agent_profiles.json", "idf_cache.json")
+    
+    # Capability vector bounds: learned terms decay on every completion and
+    # are evicted below MIN_TERM_WEIGHT or beyond the agent's term budget
+    # (per agent in VECTOR_BUDGETS_FILE, {"agent_id": max_terms})
+    VECTOR_BUDGETS_FILE = "vector_budgets.json"
+    DEFAULT_VECTOR_BUDGET = 250
+    LEARNED_TERM_DECAY = 0.98
+    MIN_TERM_WEIGHT = 0.005
+    
+    def __init__(
+        self,
+        data_dir: str = ".federation/predictor/data",
+        vector_budgets: Optional[Dict[str, int]] = None
+    ):
         self.data_dir = Path(data_dir)
         self.data_dir.mkdir(parents=True, exist_ok=True)
-        self.extractor = FeatureExtractor(data_dir)
+        # Per-agent top-K term budgets from the data dir, overridden by the
+        # caller's; agents not listed use DEFAULT_VECTOR_BUDGET
+        self.vector_budgets = {**self._load_vector_budgets(), **(vector_budgets or {})}
+        self.extractor = FeatureExtractor(data_dir, load_idf=False)
         self.profiles: Dict[str, AgentProfile] = {}
-        self._load_profiles()
+        # Magnitude of each profile's capability vector, kept in sync on update
+        self._profile_norms: Dict[str, float] = {}
+        
+        if not self._load_snapshot():
+            self.extractor._load_idf()
+            self._load_profiles()
+            self._profile_norms = {
+                agent_id: self._vector_norm(p.capability_vector)
+                for agent_id, p in self.profiles.items()
+            }
+            self._save_snapshot()
+    
+    @staticmethod
+    def _vector_norm(vector: Dict[str, float]) -> float:
+        return math.sqrt(sum(v * v for v in vector.values()))
+    
+    def _source_stamps(self) -> Dict[str, Optional[List[int]]]:
+        """(mtime, size) of every file the snapshot is derived from."""
+        stamps = {}
+        for name in self.SNAPSHOT_SOURCES:
+            try:
+                st = os.stat(self.data_dir / name)
+                stamps[name] = [st.st_mtime_ns, st.st_size]
+            except FileNotFoundError:
+                stamps[name] = None
+        return stamps
+    
+    def _load_snapshot(self) -> bool:
+        """Load profiles and IDF from the startup snapshot if it is still current."""
+        try:
+            with open(self.data_dir / self.SNAPSHOT_FILE) as f:
+                snapshot = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return False
+        
+        if snapshot.get("sources") != self._source_stamps():
+            return False
+        
+        self.extractor.idf_cache = snapshot["idf"]
+        self.extractor.document_count = snapshot["doc_count"]
+        self.profiles = {
+            agent_id: AgentProfile.from_dict(data)
+            for agent_id, data in snapshot["profiles"].items()
+        }
+        self._profile_norms = snapshot["profile_norms"]
+        return True
+    
+    def _save_snapshot(self) -> None:
+        """Write the startup snapshot (best effort; a stale or missing one is rebuilt)."""
+        snapshot = {
+            "sources": self._source_stamps(),
+            "idf": self.extractor.idf_cache,
+            "doc_count": self.extractor.document_count,
+            "profiles": {k: v.to_dict() for k, v in self.profiles.items()},
+            "profile_norms": self._profile_norms
+        }
+        snapshot_file = self.data_dir / self.SNAPSHOT_FILE
+        temp_file = snapshot_file.with_suffix(".tmp")
+        try:
+            with open(temp_file, "w") as f:
+                json.dump(snapshot, f, separators=(",", ":"))
+            os.replace(temp_file, snapshot_file)
+        except OSError:
+            pass
+    
+    def _load_vector_budgets(self) -> Dict[str, int]:
+        """Per-agent term budgets configured in the data dir ({} if none)."""
+        try:
+            with open(self.data_dir / self.VECTOR_BUDGETS_FILE) as f:
+                return {agent_id: int(budget) for agent_id, budget in json.load(f).items()}
+        except (OSError, ValueError, TypeError, AttributeError):
+            return {}
     
     def _load_profiles(self) -> None:
         """Load or initialize agent profiles."""
@@ -175,11 +268,16 @@ class SimilarityEngine:
         
         profile = self.profiles[agent_id]
         
-        # Compute cosine similarity
-        similarity = self.extractor.cosine_similarity(
-            task_vector,
-            profile.capability_vector
-        )
+        # Compute cosine similarity against the precomputed profile norm
+        similarity = 0.0
+        profile_norm = self._profile_norms.get(agent_id)
+        if profile_norm is None:
+            profile_norm = self._profile_norms[agent_id] = self._vector_norm(profile.capability_vector)
+        task_norm = self._vector_norm(task_vector)
+        if task_norm and profile_norm:
+            capabilities = profile.capability_vector
+            dot_product = sum(w * capabilities.get(term, 0.0) for term, w in task_vector.items())
+            similarity = dot_product / (task_norm * profile_norm)
         
         # Compute domain match
         if task_domains:
@@ -189,11 +287,10 @@ class SimilarityEngine:
             domain_match = 0.5  # Neutral if no domains
         
         # Compute keyword match
-        task_terms = set(task_vector.keys())
-        agent_terms = set(profile.capability_vector.keys())
-        if task_terms:
-            matching_terms = task_terms & agent_terms
-            keyword_match = len(matching_terms) / len(task_terms)
+        if task_vector:
+            capabilities = profile.capability_vector
+            matching_terms = sum(1 for term in task_vector if term in capabilities)
+            keyword_match = matching_terms / len(task_vector)
         else:
             keyword_match = 0.0
         
@@ -314,6 +411,12 @@ class SimilarityEngine:
         features = self.extractor.vectorize_task(task_description)
         task_vector = features["tfidf_vector"]
         
+        # Decay learned terms this task did not exercise
+        base_terms = self._base_terms(profile)
+        for term in profile.capability_vector:
+            if term not in base_terms and term not in task_vector:
+                profile.capability_vector[term] *= self.LEARNED_TERM_DECAY
+        
         for term, weight in task_vector.items():
             if term in profile.capability_vector:
                 # Reinforce existing capability
@@ -325,8 +428,85 @@ class SimilarityEngine:
                 # Add new capability with small weight
                 profile.capability_vector[term] = 0.1 * weight
         
+        self._prune_vector(profile)
+        self._profile_norms[agent_id] = self._vector_norm(profile.capability_vector)
         self._save_profiles()
     
+    def _base_terms(self, profile: AgentProfile) -> set:
+        """Terms from the agent's definition, which are never decayed or evicted."""
+        return set(self._build_capability_vector({
+            "keywords": profile.keywords,
+            "domains": profile.domains,
+            "specialty": profile.specialty
+        }))
+    
+    def get_vector_budget(self, agent_id: str) -> int:
+        """Maximum number of capability terms kept for an agent."""
+        return self.vector_budgets.get(agent_id, self.DEFAULT_VECTOR_BUDGET)
+    
+    def _prune_vector(self, profile: AgentProfile) -> int:
+        """Evict low-weight learned terms and enforce the agent's budget.
+        
+        Returns the number of terms removed.
+        """
+        vector = profile.capability_vector
+        base_terms = self._base_terms(profile)
+        learned = {
+            term: weight for term, weight in vector.items()
+            if term not in base_terms and weight >= self.MIN_TERM_WEIGHT
+        }
+        
+        room = max(self.get_vector_budget(profile.agent_id) - len(base_terms & vector.keys()), 0)
+        if len(learned) > room:
+            learned = dict(heapq.nlargest(room, learned.items(), key=lambda x: x[1]))
+        
+        before = len(vector)
+        profile.capability_vector = {
+            term: weight for term, weight in vector.items()
+            if term in base_terms or term in learned
+        }
+        return before - len(profile.capability_vector)
+    
+    def compact_profiles(self, save: bool = True) -> Dict:
+        """Prune every profile to its budget and report sizes before and after."""
+        bytes_before = self._profiles_size()
+        agents = {}
+        for agent_id, profile in self.profiles.items():
+            before = len(profile.capability_vector)
+            self._prune_vector(profile)
+            self._profile_norms[agent_id] = self._vector_norm(profile.capability_vector)
+            agents[agent_id] = {
+                "terms_before": before,
+                "terms_after": len(profile.capability_vector),
+                "budget": self.get_vector_budget(agent_id)
+            }
+        
+        if save:
+            self._save_profiles()
+        
+        return {
+            "agents": agents,
+            "bytes_before": bytes_before,
+            "bytes_after": self._profiles_size()
+        }
+    
+    def _profiles_size(self) -> int:
+        """Serialized size of agent_profiles.json for the current profiles."""
+        return len(json.dumps(
+            {k: v.to_dict() for k, v in self.profiles.items()}, indent=2
+        ).encode())
+    
+    def evaluate_accuracy(self, samples: List[Dict]) -> float:
+        """Top-1 routing accuracy over labeled samples ({"task", "agent"})."""
+        if not samples:
+            return 0.0
+        correct = 0
+        for sample in samples:
+            matches = self.find_best_matches(sample["task"], top_k=1)
+            if matches and matches[0].agent_id == sample["agent"].lower():
+                correct += 1
+        return correct / len(samples)
+    
     def get_profile(self, agent_id: str) -> Optional[AgentProfile]:
         """Get profile for a specific agent."""
         return self.profiles.get(agent_id)
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Federation Analytics Time Series
+Fixed-size ring buffers of task counters at minute, hour and day resolution.
+
+Every recorded task is counted into one bucket per resolution, for its agent
+and for its task type:
+
+    minute  60 buckets of 60 s      backs the 1h window
+    hour    48 buckets of 1 h       backs the 24h window
+    day     30 buckets of 1 day     backs the 7d window
+
+A bucket holds [bucket number, tasks, successes, duration_min, reworks] and
+lives in slot bucket % size, so counting a task is one dict lookup and an
+add; a slot whose bucket number is stale is reset in place when reused.
+Window totals and trend lines read at most one ring's worth of slots and
+never replay the event log.
+
+The rings are persisted as analytics-series.json next to metrics.json, with
+only live buckets written, together with the event log offset they have
+folded up to (see fed-analytics.py rollup).
+"""
+
+import json
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+# ─────────────────────────────────────────────────────────────
+# Layout
+# ─────────────────────────────────────────────────────────────
+
+VERSION = 1
+
+# resolution: (bucket width in seconds, buckets kept)
+RESOLUTIONS = {
+    "minute": (60, 60),
+    "hour": (3600, 48),
+    "day": (86400, 30),
+}
+
+# window: (resolution, buckets)
+WINDOWS = {
+    "1h": ("minute", 60),
+    "24h": ("hour", 24),
+    "7d": ("day", 7),
+}
+
+DIMENSIONS = ("agents", "task_types")
+INDICATORS = ("tasks", "success_rate", "avg_duration", "rework_rate")
+
+_TASKS, _SUCCESSES, _DURATION, _REWORK = 1, 2, 3, 4
+
+SPARK_CHARS = "▁▂▃▄▅▆▇█"
+
+
+def indicators(counters: List[int]) -> Dict:
+    """Health indicators for summed [tasks, successes, duration, reworks] counters."""
+    tasks, successes, duration, rework = counters
+    return {
+        "tasks": tasks,
+        "successes": successes,
+        "success_rate": successes / tasks if tasks else None,
+        "avg_duration": duration / tasks if tasks else None,
+        "rework_rate": rework / tasks if tasks else None
+    }
+
+
+def sparkline(values: Iterable[Optional[float]], high: Optional[float] = None) -> str:
+    """One character per value, scaled from 0 to high (default: the largest value); None is '·'."""
+    values = list(values)
+    if high is None:
+        high = max((v for v in values if v is not None), default=0)
+    top = len(SPARK_CHARS) - 1
+    return "".join(
+        "·" if value is None else SPARK_CHARS[min(top, int(value / high * top + 0.5)) if high else 0]
+        for value in values
+    )
+
+
+# ─────────────────────────────────────────────────────────────
+# Series
+# ─────────────────────────────────────────────────────────────
+
+class TimeSeries:
+    """Per-agent and per-task-type ring buffers at every resolution."""
+
+    def __init__(self, data: Optional[Dict] = None):
+        data = data or {}
+        self.event_log: Dict = data.get("event_log", {})
+        # rings[resolution][dimension][key] = {slot: [bucket, tasks, successes, duration, reworks]}
+        self.rings: Dict[str, Dict[str, Dict[str, Dict[int, List[int]]]]] = {
+            resolution: {dimension: {} for dimension in DIMENSIONS} for resolution in RESOLUTIONS
+        }
+        for resolution, (_, size) in RESOLUTIONS.items():
+            stored = data.get("rings", {}).get(resolution, {})
+            for dimension in DIMENSIONS:
+                for key, buckets in stored.get(dimension, {}).items():
+                    self.rings[resolution][dimension][key] = {bucket[0] % size: bucket for bucket in buckets}
+
+    @classmethod
+    def load(cls, path: Path) -> "TimeSeries":
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return cls()
+        return cls(data if data.get("version") == VERSION else None)
+
+    def save(self, path: Path, now: Optional[float] = None):
+        """Write live buckets only (atomic replace; caller holds the metrics lock)."""
+        now = time.time() if now is None else now
+        rings = {}
+        for resolution, (width, size) in RESOLUTIONS.items():
+            oldest = int(now // width) - size + 1
+            rings[resolution] = {
+                dimension: {
+                    key: sorted(bucket for bucket in ring.values() if bucket[0] >= oldest)
+                    for key, ring in self.rings[resolution][dimension].items()
+                    if any(bucket[0] >= oldest for bucket in ring.values())
+                }
+                for dimension in DIMENSIONS
+            }
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        with open(temp_path, "w") as f:
+            json.dump({"version": VERSION, "event_log": self.event_log, "rings": rings}, f,
+                      separators=(",", ":"))
+        os.replace(temp_path, path)
+
+    def add(self, timestamp: float, agent: str, task_type: str, success: bool,
+            duration_min: Optional[int] = None, rework_required: bool = False):
+        """Count one task into its bucket at every resolution: O(1)."""
+        delta = (1, 1 if success else 0, duration_min or 0, 1 if rework_required else 0)
+        for resolution, (width, size) in RESOLUTIONS.items():
+            bucket = int(timestamp // width)
+            for dimension, key in (("agents", agent), ("task_types", task_type)):
+                ring = self.rings[resolution][dimension].setdefault(key, {})
+                counters = ring.get(bucket % size)
+                if counters is None or counters[0] < bucket:
+                    counters = ring[bucket % size] = [bucket, 0, 0, 0, 0]
+                elif counters[0] > bucket:
+                    continue  # Older than the ring reaches back
+                for field, amount in enumerate(delta, 1):
+                    counters[field] += amount
+
+    def add_event(self, event: Dict):
+        """Count a recorded task (an analytics event log line); events without a valid timestamp are skipped."""
+        try:
+            timestamp = datetime.fromisoformat(event["timestamp"]).timestamp()
+        except (KeyError, TypeError, ValueError):
+            return
+        self.add(timestamp, event["agent"], event["task_type"], event["success"],
+                 event.get("duration_min"), event.get("rework_required"))
+
+    def keys(self, dimension: str, window: str, now: Optional[float] = None) -> List[str]:
+        """Agents or task types with at least one task in window."""
+        return [key for key in self.rings[WINDOWS[window][0]][dimension]
+                if self.totals(dimension, key, window, now)["tasks"]]
+
+    def _buckets(self, dimension: str, key: Optional[str], window: str,
+                 now: Optional[float]) -> List[List[int]]:
+        """Summed counters for each bucket of window, oldest first; key None sums every key."""
+        resolution, count = WINDOWS[window]
+        width, size = RESOLUTIONS[resolution]
+        current = int((time.time() if now is None else now) // width)
+        rings = self.rings[resolution][dimension]
+        selected = rings.values() if key is None else [rings.get(key, {})]
+        series = []
+        for bucket in range(current - count + 1, current + 1):
+            summed = [0, 0, 0, 0]
+            for ring in selected:
+                counters = ring.get(bucket % size)
+                if counters is not None and counters[0] == bucket:
+                    for field in range(4):
+                        summed[field] += counters[field + 1]
+            series.append(summed)
+        return series
+
+    def totals(self, dimension: str, key: Optional[str], window: str,
+               now: Optional[float] = None) -> Dict:
+        """Health indicators for key (or every key, if None) over window."""
+        summed = [sum(column) for column in zip(*self._buckets(dimension, key, window, now))]
+        return indicators(summed)
+
+    def trend(self, dimension: str, key: Optional[str], window: str, indicator: str = "tasks",
+              now: Optional[float] = None) -> List[Optional[float]]:
+        """One value of indicator per bucket of window, oldest first (None where no tasks ran)."""
+        if indicator not in INDICATORS:
+            raise ValueError(f"Unknown indicator: {indicator} (choose from {', '.join(INDICATORS)})")
+        return [indicators(counters)[indicator] for counters in self._buckets(dimension, key, window, now)]
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Federation Auto-Schedule Rule Index
+Compiled, cached form of auto-schedule-rules.json for fast trigger matching.
+
+Enabled rules are grouped by trigger.from_agent, and each agent gets one
+Aho-Corasick automaton over the lowercased task_patterns of its rules. A
+completion is then matched in a single pass over the task description,
+however many rules or patterns exist; the cost is linear in the description
+length plus the number of hits.
+
+load_rules() keeps the compiled form per rules file and recompiles only when
+the file's mtime or size changes. Task templates are parsed once per distinct
+template string and rendered by joining the parsed pieces.
+"""
+
+import json
+import os
+import string
+from collections import deque
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# ─────────────────────────────────────────────────────────────
+# Multi-Pattern Matcher
+# ─────────────────────────────────────────────────────────────
+
+class PatternMatcher:
+    """Aho-Corasick automaton mapping substring hits to rule positions."""
+
+    def __init__(self, patterns: Iterable[Tuple[str, int]]):
+        # State 0 is the root; goto[s] maps a character to the next state
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+
+        outputs: List[set] = [set()]
+        for pattern, position in patterns:
+            if not pattern:
+                continue
+            state = 0
+            for char in pattern:
+                nxt = self._goto[state].get(char)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][char] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    outputs.append(set())
+                state = nxt
+            outputs[state].add(position)
+
+        # Breadth-first: fail links point at the longest proper suffix that is
+        # also a trie path, and outputs absorb those of their fail state
+        pending = deque(self._goto[0].values())
+        while pending:
+            state = pending.popleft()
+            for char, nxt in self._goto[state].items():
+                pending.append(nxt)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                outputs[nxt] |= outputs[self._fail[nxt]]
+        self._out: List[frozenset] = [frozenset(out) for out in outputs]
+
+    def match(self, text: str) -> set:
+        """Positions of every pattern occurring in text (already lowercased)."""
+        goto, fail, out = self._goto, self._fail, self._out
+        hits = set()
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if out[state]:
+                hits |= out[state]
+        return hits
+
+
+# ─────────────────────────────────────────────────────────────
+# Compiled Rules
+# ─────────────────────────────────────────────────────────────
+
+class CompiledRules:
+    """Rules document plus a per-agent trigger index."""
+
+    def __init__(self, document: Dict):
+        self.document = document
+        self.enabled = bool(document.get("enabled", False))
+        self.settings = document.get("global_settings", {})
+        self.rules: List[Dict] = document.get("rules", [])
+
+        # Trigger index: agent -> [(pattern, rule position)]; each agent's
+        # automaton is built the first time that agent completes something
+        self._patterns: Dict[str, List[Tuple[str, int]]] = {}
+        for position, rule in enumerate(self.rules):
+            if not rule.get("enabled", False):
+                continue
+            trigger = rule.get("trigger", {})
+            patterns = self._patterns.setdefault(trigger.get("from_agent"), [])
+            patterns.extend((p.lower(), position) for p in trigger.get("task_patterns", []))
+        self._matchers: Dict[str, PatternMatcher] = {}
+
+    def matcher(self, agent: str) -> Optional[PatternMatcher]:
+        if agent not in self._matchers:
+            if agent not in self._patterns:
+                return None
+            self._matchers[agent] = PatternMatcher(self._patterns[agent])
+        return self._matchers[agent]
+
+    def match(self, task: Dict, completed_by: str) -> List[Dict]:
+        """Enabled rules triggered by task completing, in rules-file order."""
+        matcher = self.matcher(completed_by)
+        if matcher is None:
+            return []
+        has_artifact = bool(task.get("result") or task.get("artifact_path"))
+        matched = []
+        for position in sorted(matcher.match((task.get("description") or "").lower())):
+            rule = self.rules[position]
+            if rule["trigger"].get("output_artifact", False) and not has_artifact:
+                continue
+            matched.append(rule)
+        return matched
+
+
+# ─────────────────────────────────────────────────────────────
+# Task Templates
+# ─────────────────────────────────────────────────────────────
+
+TEMPLATE_FIELDS = ("previous_task", "artifact_path")
+
+_CONVERSIONS = {None: None, "s": str, "r": repr, "a": ascii}
+
+
+@lru_cache(maxsize=None)
+def compile_template(template: str) -> Tuple[Tuple[str, Optional[str], Optional[str], str], ...]:
+    """Parse a str.format template into (literal, field, conversion, spec) pieces.
+
+    Raises ValueError for malformed templates or fields other than TEMPLATE_FIELDS.
+    """
+    pieces = []
+    for literal, field, spec, conversion in string.Formatter().parse(template):
+        if field is not None and field not in TEMPLATE_FIELDS:
+            raise ValueError(f"Unknown template field {{{field}}} (use {', '.join(TEMPLATE_FIELDS)})")
+        conversion = conversion or None
+        if conversion not in _CONVERSIONS:
+            raise ValueError(f"Unknown conversion !{conversion} in template")
+        pieces.append((literal, field, conversion, spec or ""))
+    return tuple(pieces)
+
+
+def render_template(template: str, values: Dict[str, str]) -> str:
+    """Render a template; equivalent to template.format(**values)."""
+    out = []
+    for literal, field, conversion, spec in compile_template(template):
+        out.append(literal)
+        if field is not None:
+            value = values[field]
+            if conversion:
+                value = _CONVERSIONS[conversion](value)
+            out.append(format(value, spec) if spec else str(value))
+    return "".join(out)
+
+
+# ─────────────────────────────────────────────────────────────
+# Loading
+# ─────────────────────────────────────────────────────────────
+
+_cache: Dict[Path, Tuple[Tuple[int, int], CompiledRules]] = {}
+
+
+def load_rules(rules_file: Path) -> CompiledRules:
+    """Compiled rules for a file, recompiled only when the file changes."""
+    path = Path(rules_file)
+    stat = os.stat(path)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    cached = _cache.get(path)
+    if cached and cached[0] == signature:
+        return cached[1]
+    with open(path) as f:
+        compiled = CompiledRules(json.load(f))
+    _cache[path] = (signature, compiled)
+    return compiled
+
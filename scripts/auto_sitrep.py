@@ -3,44 +3,53 @@
 Auto SITREP Generator — Daily Federation Status Report
 
 Reads federation log, session status, git log, and generates
-a daily SITREP markdown file.
+a daily SITREP markdown file. Agent status comes straight from the
+heartbeat table, which is fresher than the session JSON.
+
+Data is gathered by independent collectors (session, git, queue counts,
+router outcomes) that run concurrently, each bounded by a timeout; a
+collector that fails or times out is reported in the SITREP instead of
+holding it up.
+
+Every run folds what it collected into cached daily aggregates under
+.federation/state/sitrep/ (one YYYY-MM-DD.json per day), so multi-day and
+weekly SITREPs are built from stored summaries. Git history and the routing
+log are read incrementally: only commits after the last recorded HEAD and
+routing outcomes after the last recorded offset are new work on each run.
 """
 
 import json
 import subprocess
-import os
+import sys
+from concurrent.futures import ThreadPoolExecutor, wait
 from pathlib import Path
-from datetime import datetime, timezone
+from datetime import date, datetime, timedelta, timezone
+
+sys.path.insert(0, str(Path(__file__).parent))
+from federation_sync import session_tasks
+from heartbeat_table import overlay
 
 FEDERATION_DIR = Path.home() / ".federation"
 SESSION_PATH = FEDERATION_DIR / "sessions" / "active-session.json"
+HEARTBEAT_PATH = FEDERATION_DIR / "sessions" / "heartbeats.bin"
 REPO_ROOT = Path(__file__).parent.parent
+QUEUE_DIR = REPO_ROOT / ".federation" / "queue"
+ROUTING_HISTORY = REPO_ROOT / ".federation" / "state" / "routing-history.jsonl"
+CACHE_DIR = REPO_ROOT / ".federation" / "state" / "sitrep"
 
+COLLECTOR_TIMEOUT = 10.0
+GIT_FORMAT = "--pretty=format:%H|%s|%cI|%an"
 
-def get_git_log(since: str = "24 hours ago") -> list[dict]:
-    """Get git commits since specified time."""
-    try:
-        result = subprocess.run(
-            ["git", "log", f"--since={since}", "--pretty=format:%H|%s|%ci|%an"],
-            cwd=REPO_ROOT,
-            capture_output=True,
-            text=True
-        )
-        
-        commits = []
-        for line in result.stdout.strip().split("\n"):
-            if "|" in line:
-                hash_, subject, date, author = line.split("|", 3)
-                commits.append({
-                    "hash": hash_[:8],
-                    "subject": subject,
-                    "date": date,
-                    "author": author
-                })
-        return commits
-    except Exception as e:
-        return [{"error": str(e)}]
 
+def _utc_day(timestamp: str) -> str:
+    """UTC calendar day of an ISO timestamp (naive timestamps are taken as UTC)."""
+    moment = datetime.fromisoformat(timestamp)
+    if moment.tzinfo is None:
+        return moment.date().isoformat()
+    return moment.astimezone(timezone.utc).date().isoformat()
+
+
+# --- Collectors ---
 
 def get_session_status() -> dict:
     """Read federation session status."""
@@ -48,16 +57,112 @@ def get_session_status() -> dict:
         return {"status": "no_active_session"}
     
     try:
-        return json.loads(SESSION_PATH.read_text())
+        session = json.loads(SESSION_PATH.read_text())
+        session["agents"] = overlay(session.get("agents", {}), HEARTBEAT_PATH)
+        return session
     except Exception as e:
         return {"status": "error", "error": str(e)}
 
 
+def get_git_log(head: str | None = None, since: str | None = None,
+                timeout: float = COLLECTOR_TIMEOUT) -> dict:
+    """
+    Commits newer than head (or since a date when head is unknown), newest first.
+    Returns {"head": <newest hash>, "commits": [...]}; falls back to since
+    when head is no longer in the history (e.g. after a rebase).
+    """
+    def log(*selection):
+        return subprocess.run(
+            ["git", "log", GIT_FORMAT, *selection],
+            cwd=REPO_ROOT,
+            capture_output=True,
+            text=True,
+            timeout=timeout
+        )
+    
+    result = log(f"{head}..HEAD") if head else None
+    if result is None or result.returncode != 0:
+        result = log(f"--since={since}T00:00:00Z")
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip() or "git log failed")
+    
+    commits = []
+    for line in result.stdout.strip().split("\n"):
+        if "|" in line:
+            hash_, subject, date_, author = line.split("|", 3)
+            commits.append({
+                "hash": hash_,
+                "subject": subject,
+                "date": date_,
+                "author": author
+            })
+    return {"head": commits[0]["hash"] if commits else head, "commits": commits}
+
+
+def get_queue_counts() -> dict:
+    """Queue task counts from the journal counters (no scan of the queue)."""
+    from queue_journal import JOURNAL_DIR, QueueJournal
+    
+    if not (QUEUE_DIR / JOURNAL_DIR).exists():
+        return {}
+    return QueueJournal(QUEUE_DIR).counters()["status"]
+
+
+def get_routing_outcomes(offset: int = 0) -> dict:
+    """
+    Routing outcomes appended to the routing history after byte offset,
+    as {"offset": <new offset>, "days": {day: {"routed": n, "succeeded": n}}}.
+    """
+    days = {}
+    if not ROUTING_HISTORY.exists():
+        return {"offset": 0, "days": days}
+    
+    if offset > ROUTING_HISTORY.stat().st_size:
+        offset = 0  # File was replaced; start over
+    with open(ROUTING_HISTORY, "rb") as f:
+        f.seek(offset)
+        for line in f:
+            if not line.endswith(b"\n"):
+                break  # Partial line still being written
+            offset += len(line)
+            try:
+                outcome = json.loads(line)
+                day = days.setdefault(_utc_day(outcome["timestamp"]), {"routed": 0, "succeeded": 0})
+            except (ValueError, KeyError):
+                continue
+            day["routed"] += 1
+            day["succeeded"] += bool(outcome.get("success"))
+    return {"offset": offset, "days": days}
+
+
+def run_collectors(collectors: dict, timeout: float = COLLECTOR_TIMEOUT) -> dict:
+    """
+    Run collectors {name: callable} concurrently.
+    Returns {name: result}; a collector that raises or is still running after
+    timeout seconds yields {"error": ...} instead.
+    """
+    results = {}
+    pool = ThreadPoolExecutor(max_workers=len(collectors))
+    futures = {pool.submit(collect): name for name, collect in collectors.items()}
+    done, _ = wait(futures, timeout=timeout)
+    for future, name in futures.items():
+        if future not in done:
+            results[name] = {"error": f"timed out after {timeout:g}s"}
+        elif future.exception() is not None:
+            results[name] = {"error": str(future.exception())}
+        else:
+            results[name] = future.result()
+    pool.shutdown(wait=False, cancel_futures=True)
+    return results
+
+
+# --- Session summaries ---
+
 def count_tasks_by_status(session: dict) -> dict:
-    """Count tasks by status."""
-    counts = {"pending": 0, "in_progress": 0, "completed": 0, "blocked": 0}
+    """Count tasks by status, including completed tasks compacted out of the session."""
+    counts = {"pending": 0, "in_progress": 0, "completed": session.get("compacted_tasks", 0), "blocked": 0}
     
-    for task in session.get("tasks", []):
+    for task in session_tasks(session):
         status = task.get("status", "pending")
         if status in counts:
             counts[status] += 1
@@ -86,24 +191,139 @@ def get_router_metrics(session: dict) -> dict:
     }
 
 
-def generate_sitrep() -> str:
-    """Generate SITREP markdown."""
+# --- Daily aggregates ---
+
+def load_cache_state() -> dict:
+    """Where incremental reading left off: git HEAD, earliest day covered, routing offset."""
+    try:
+        return json.loads((CACHE_DIR / "state.json").read_text())
+    except (OSError, json.JSONDecodeError):
+        return {"git_head": None, "git_since": None, "routing_offset": 0}
+
+
+def load_day(day: str) -> dict:
+    """Cached aggregate for one day (empty if nothing was recorded)."""
+    try:
+        return json.loads((CACHE_DIR / f"{day}.json").read_text())
+    except (OSError, json.JSONDecodeError):
+        return {"date": day, "commits": [], "routing": {"routed": 0, "succeeded": 0}, "snapshot": None}
+
+
+def _write_json(path: Path, data: dict):
+    temp_path = path.with_suffix(".tmp")
+    temp_path.write_text(json.dumps(data, separators=(",", ":")))
+    temp_path.replace(path)
+
+
+def update_cache(results: dict, state: dict, today: str, since: str) -> dict:
+    """Fold collector results into the daily aggregates; returns the new cache state."""
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    days = {}
+    
+    def day_of(day):
+        if day not in days:
+            days[day] = load_day(day)
+        return days[day]
+    
+    state = dict(state)
+    git = results.get("git", {})
+    if "error" not in git:
+        new_commits = {}
+        for commit in git["commits"]:
+            new_commits.setdefault(_utc_day(commit["date"]), []).append(commit)
+        for day, commits in new_commits.items():
+            aggregate = day_of(day)
+            known = {c["hash"] for c in aggregate["commits"]}
+            # Newest first, like git log
+            aggregate["commits"][:0] = [c for c in commits if c["hash"] not in known]
+        state["git_head"] = git["head"]
+        state["git_since"] = min(filter(None, (state.get("git_since"), since)))
+    
+    routing = results.get("routing", {})
+    if "error" not in routing:
+        for day, outcome in routing["days"].items():
+            aggregate = day_of(day)
+            aggregate["routing"]["routed"] += outcome["routed"]
+            aggregate["routing"]["succeeded"] += outcome["succeeded"]
+        state["routing_offset"] = routing["offset"]
+    
+    # End-of-day view: the latest snapshot taken on a day replaces earlier ones
+    session = results.get("session", {})
+    if "error" not in session and "session_id" in session:
+        queue = results.get("queue", {})
+        day_of(today)["snapshot"] = {
+            "sprint": session.get("sprint"),
+            "session_id": session.get("session_id"),
+            "tasks": count_tasks_by_status(session),
+            "queue": None if "error" in queue else queue,
+            "router": get_router_metrics(session),
+            "active_agents": get_active_agents(session)
+        }
+    
+    for day, aggregate in days.items():
+        _write_json(CACHE_DIR / f"{day}.json", aggregate)
+    _write_json(CACHE_DIR / "state.json", state)
+    return state
+
+
+def collect(days: int = 1, timeout: float = COLLECTOR_TIMEOUT,
+            today: date | None = None) -> tuple[dict, list[dict]]:
+    """
+    Run every collector and update the cache.
+    Returns (live collector results, daily aggregates for the last `days`
+    days, oldest first).
+    """
+    today = today or datetime.now(timezone.utc).date()
+    start = (today - timedelta(days=days - 1)).isoformat()
+    state = load_cache_state()
+    
+    # Resume from the recorded HEAD only if the cache already reaches back far enough
+    head = state.get("git_head") if (state.get("git_since") or "9999") <= start else None
+    results = run_collectors({
+        "session": get_session_status,
+        "git": lambda: get_git_log(head, start, timeout),
+        "queue": get_queue_counts,
+        "routing": lambda: get_routing_outcomes(state.get("routing_offset", 0)),
+    }, timeout)
+    update_cache(results, state, today.isoformat(), start)
+    
+    aggregates = [load_day((today - timedelta(days=n)).isoformat()) for n in range(days - 1, -1, -1)]
+    return results, aggregates
+
+
+# --- Report ---
+
+def generate_sitrep(days: int = 1, timeout: float = COLLECTOR_TIMEOUT) -> str:
+    """Generate SITREP markdown covering the last `days` days (1 = today)."""
     now = datetime.now(timezone.utc)
     date_str = now.strftime("%Y-%m-%d")
     time_str = now.strftime("%H:%M UTC")
     
     # Gather data
-    session = get_session_status()
-    commits = get_git_log()
+    results, aggregates = collect(days, timeout, now.date())
+    session = results["session"]
+    commits = [commit for aggregate in reversed(aggregates) for commit in aggregate["commits"]]
+    period = "Today" if days == 1 else f"Last {days} Days"
     
     # Format SITREP
     lines = []
-    lines.append(f"# SITREP — {date_str}")
+    if days == 1:
+        lines.append(f"# SITREP — {date_str}")
+    else:
+        lines.append(f"# SITREP — {aggregates[0]['date']} → {date_str} ({days} days)")
     lines.append(f"**Generated:** {time_str}  ")
     lines.append(f"**Sprint:** {session.get('sprint', 'N/A')}  ")
     lines.append(f"**Session:** {session.get('session_id', 'N/A')}")
     lines.append("")
     
+    # Collectors that failed or timed out
+    failed = {name: result["error"] for name, result in results.items()
+              if isinstance(result, dict) and "error" in result}
+    if failed:
+        for name, error in failed.items():
+            lines.append(f"> ⚠️ {name} data unavailable: {error}")
+        lines.append("")
+    
     # Agent Status
     lines.append("## Agent Status")
     lines.append("")
@@ -131,6 +351,7 @@ def generate_sitrep() -> str:
     lines.append("## Task Summary")
     lines.append("")
     
+    pending = [t for t in session_tasks(session) if t.get("status") == "pending"]
     if "tasks" in session:
         task_counts = count_tasks_by_status(session)
         total = sum(task_counts.values())
@@ -142,7 +363,6 @@ def generate_sitrep() -> str:
         lines.append(f"- 🚫 Blocked: {task_counts['blocked']}")
         
         # List pending/high priority tasks
-        pending = [t for t in session.get("tasks", []) if t.get("status") == "pending"]
         if pending:
             lines.append("")
             lines.append("### Pending Tasks")
@@ -153,6 +373,11 @@ def generate_sitrep() -> str:
     else:
         lines.append("_No task data available_")
     
+    queue = results["queue"]
+    if queue and "error" not in queue:
+        lines.append("")
+        lines.append("**Queue:** " + ", ".join(f"{n} {status}" for status, n in queue.items()))
+    
     lines.append("")
     
     # Router Metrics
@@ -166,11 +391,29 @@ def generate_sitrep() -> str:
         lines.append(f"- **Accuracy:** {metrics['accuracy']*100:.1f}%")
     else:
         lines.append("- **Accuracy:** Not evaluated today")
+    routed = sum(a["routing"]["routed"] for a in aggregates)
+    if routed:
+        succeeded = sum(a["routing"]["succeeded"] for a in aggregates)
+        lines.append(f"- **Routed ({period.lower()}):** {routed} tasks, {succeeded / routed * 100:.1f}% successful")
     
     lines.append("")
     
+    # Daily Rollup (multi-day SITREPs, from the cached aggregates)
+    if days > 1:
+        lines.append("## Daily Rollup")
+        lines.append("")
+        lines.append("| Date | Commits | Routed | Tasks Completed | Active Agents |")
+        lines.append("|------|---------|--------|-----------------|---------------|")
+        for aggregate in aggregates:
+            snapshot = aggregate["snapshot"] or {}
+            completed = snapshot["tasks"]["completed"] if snapshot else "—"
+            agents = ", ".join(snapshot.get("active_agents", [])) or "—"
+            lines.append(f"| {aggregate['date']} | {len(aggregate['commits'])} | "
+                         f"{aggregate['routing']['routed']} | {completed} | {agents} |")
+        lines.append("")
+    
     # Git Activity
-    lines.append("## Git Activity (Last 24h)")
+    lines.append(f"## Git Activity ({period})")
     lines.append("")
     
     if commits:
@@ -178,15 +421,12 @@ def generate_sitrep() -> str:
         lines.append("")
         
         for commit in commits[:10]:  # Show last 10
-            if "error" in commit:
-                lines.append(f"_Error reading git log: {commit['error']}_")
-                break
-            lines.append(f"- `{commit['hash']}` {commit['subject'][:50]} — _{commit['author']}_")
+            lines.append(f"- `{commit['hash'][:8]}` {commit['subject'][:50]} — _{commit['author']}_")
         
         if len(commits) > 10:
             lines.append(f"- _... and {len(commits) - 10} more_")
     else:
-        lines.append("_No commits in last 24 hours_")
+        lines.append(f"_No commits ({period.lower()})_")
     
     lines.append("")
     
@@ -194,7 +434,7 @@ def generate_sitrep() -> str:
     lines.append("## Blockers")
     lines.append("")
     
-    blocked = [t for t in session.get("tasks", []) if t.get("status") == "blocked"]
+    blocked = [t for t in session_tasks(session) if t.get("status") == "blocked"]
     if blocked:
         for task in blocked:
             lines.append(f"- 🚫 {task.get('description', 'Unknown')[:60]}")
@@ -220,20 +460,22 @@ def generate_sitrep() -> str:
     
     # Footer
     lines.append("---")
-    lines.append(f"*Auto-generated by federation-sync v1.0*")
+    lines.append("*Auto-generated by federation-sync v1.0*")
     
     return "\n".join(lines)
 
 
-def save_sitrep(content: str, output_dir: Path = None) -> Path:
-    """Save SITREP to file."""
+def save_sitrep(content: str, output_dir: Path = None, days: int = 1) -> Path:
+    """Save SITREP to file (SITREP-<date>.md, or SITREP-<first>--<last>.md for several days)."""
     if output_dir is None:
         output_dir = REPO_ROOT / "docs" / "sitreps"
     
     output_dir.mkdir(parents=True, exist_ok=True)
     
-    date_str = datetime.now(timezone.utc).strftime("%Y-%m-%d")
-    filename = f"SITREP-{date_str}.md"
+    today = datetime.now(timezone.utc).date()
+    filename = f"SITREP-{today.isoformat()}.md"
+    if days > 1:
+        filename = f"SITREP-{(today - timedelta(days=days - 1)).isoformat()}--{today.isoformat()}.md"
     filepath = output_dir / filename
     
     filepath.write_text(content)
@@ -246,15 +488,22 @@ def main():
     parser = argparse.ArgumentParser(description="Auto-generate daily SITREP")
     parser.add_argument("--print", action="store_true", help="Print to stdout only")
     parser.add_argument("--output", type=Path, help="Output directory")
+    parser.add_argument("--days", type=int, default=1, help="Days to cover, ending today (default: 1)")
+    parser.add_argument("--week", action="store_true", help="Weekly rollup (same as --days 7)")
+    parser.add_argument("--timeout", type=float, default=COLLECTOR_TIMEOUT,
+                        help=f"Seconds to wait for the data collectors (default: {COLLECTOR_TIMEOUT:g})")
     
     args = parser.parse_args()
+    days = 7 if args.week else args.days
+    if days < 1:
+        parser.error("--days must be at least 1")
     
-    sitrep = generate_sitrep()
+    sitrep = generate_sitrep(days, args.timeout)
     
     if args.print:
         print(sitrep)
     else:
-        filepath = save_sitrep(sitrep, args.output)
+        filepath = save_sitrep(sitrep, args.output, days)
         print(f"SITREP saved to: {filepath}")
 
 
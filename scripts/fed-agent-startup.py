@@ -4,150 +4,117 @@ Federation Agent Startup Script
 Checks for queued tasks and auto-scheduled work on agent startup.
 
 Usage:
-    fed-agent-startup.py --agent <agent-name> [--auto-start]
+    fed-agent-startup.py --agent <agent-name> [--auto-start] [--json]
+    fed-agent-startup.py --agent all [--auto-start] [--json]
+
+The whole check runs in this process with a single read of the pending tasks;
+--agent all reports every agent that has work queued. --json prints one
+object for agent harnesses:
+
+    {"auto_scheduling": true,
+     "agents": {"kimi": {"queued": [<task>, ...], "next": <task> | null, "started": "<id>" | null}}}
 
 Add to agent startup routine in AGENT.md or SOUL.md
 """
 
 import argparse
-import subprocess
+import json
 import sys
 from pathlib import Path
+from typing import Dict, Optional
+
+sys.path.insert(0, str(Path(__file__).parent))
+from federation_queue import FEDERATION_DIR, AgentOverview, FederationQueue
 
 # Configuration
-QUEUE_SCRIPT = Path(__file__).parent / "fed-queue.py"
-AUTO_SCHEDULE_SCRIPT = Path(__file__).parent / "fed-auto-schedule.py"
+RULES_FILE = FEDERATION_DIR / "state" / "auto-schedule-rules.json"
+ALL_AGENTS = "all"
 
 
-def check_queued_tasks(agent: str) -> list:
-    """Check for pending tasks queued for this agent."""
-    result = subprocess.run(
-        ["python3", str(QUEUE_SCRIPT), "list", "--status", "pending", "--agent", agent],
-        capture_output=True,
-        text=True,
-        cwd=QUEUE_SCRIPT.parent.parent
-    )
-    
-    if result.returncode != 0:
-        print(f"Warning: Could not check queue: {result.stderr}", file=sys.stderr)
-        return []
-    
-    # Parse tasks from output
-    tasks = []
-    lines = result.stdout.strip().split('\n')
-    
-    # Skip header lines (first 2)
-    for line in lines[2:]:
-        if line.startswith('task-'):
-            parts = line.split()
-            if len(parts) >= 6:
-                tasks.append({
-                    "task_id": parts[0],
-                    "status": parts[1],
-                    "priority": parts[2],
-                    "from_agent": parts[3],
-                    "to_agent": parts[4],
-                    "description": ' '.join(parts[5:])
-                })
-    
-    return tasks
-
-
-def get_next_ready_task(agent: str) -> dict:
-    """Get the next task that's ready to start (dependencies met)."""
-    result = subprocess.run(
-        ["python3", str(QUEUE_SCRIPT), "next", "--agent", agent],
-        capture_output=True,
-        text=True,
-        cwd=QUEUE_SCRIPT.parent.parent
-    )
-    
-    if result.returncode != 0 or "No pending tasks" in result.stdout:
-        return None
-    
-    # Parse output - it's a multi-line format
-    lines = result.stdout.strip().split('\n')
-    task = {}
-    for line in lines:
-        if line.startswith('   ID:'):
-            task['task_id'] = line.split(':')[1].strip()
-        elif line.startswith('   From:'):
-            task['from_agent'] = line.split(':')[1].strip()
-        elif line.startswith('   Priority:'):
-            task['priority'] = line.split(':')[1].strip()
-        elif line.startswith('   Description:'):
-            task['description'] = line.split(':')[1].strip()
-    
-    return task if task.get('task_id') else None
-
-
-def startup_sequence(agent: str, auto_start: bool = False):
-    """Run full agent startup sequence."""
-    
-    print(f"🚀 Federation Agent Startup: {agent}")
-    print("-" * 60)
-    
-    # 1. Check auto-scheduling status
-    result = subprocess.run(
-        ["python3", str(AUTO_SCHEDULE_SCRIPT), "status"],
-        capture_output=True,
-        text=True,
-        cwd=QUEUE_SCRIPT.parent.parent
-    )
-    
-    if "Enabled: ✅" in result.stdout:
-        print("📋 Auto-scheduling: Enabled")
-    else:
-        print("📋 Auto-scheduling: Disabled")
-    
-    # 2. Check for queued tasks
-    tasks = check_queued_tasks(agent)
-    
+def auto_scheduling_enabled() -> bool:
+    """Read the auto-scheduler's enabled flag without loading the scheduler."""
+    try:
+        with open(RULES_FILE) as f:
+            return json.load(f).get("enabled", False)
+    except (OSError, json.JSONDecodeError):
+        return False
+
+
+def print_agent_report(agent: str, overview: AgentOverview, auto_start: bool, started: Optional[str]):
+    """Human-readable startup report for one agent."""
+    tasks = overview["queued"]
     if not tasks:
         print(f"\n📭 No pending tasks for {agent}")
         print("   Ready for new assignments from Reuben.")
         return
-    
+
     print(f"\n📥 {len(tasks)} task(s) in queue for {agent}:")
     print()
-    
+
     for i, task in enumerate(tasks, 1):
-        status_icon = "🔄" if task['status'] == 'pending' else "▶️"
+        status_icon = "🔄" if task['unmet_dependencies'] == 0 else "⏳"
         print(f"{i}. {status_icon} {task['task_id']}")
         print(f"   From: {task['from_agent']}")
         print(f"   Priority: {task['priority'].upper()}")
         print(f"   Description: {task['description'][:60]}...")
         print()
-    
-    # 3. Check for next ready task
+
+    # Next ready task
     print("-" * 60)
-    next_task = get_next_ready_task(agent)
-    
+    next_task = overview["next"]
+
     if next_task:
         print(f"⏭️  NEXT TASK (dependencies met):")
         print(f"   ID: {next_task['task_id']}")
         print(f"   From: {next_task['from_agent']}")
         print(f"   Description: {next_task['description'][:60]}...")
-        
+
         if auto_start:
             print(f"\n🚀 Auto-starting task...")
-            result = subprocess.run(
-                ["python3", str(QUEUE_SCRIPT), "start", next_task['task_id']],
-                capture_output=True,
-                text=True,
-                cwd=QUEUE_SCRIPT.parent.parent
-            )
-            if result.returncode == 0:
-                print(f"✅ Task {next_task['task_id']} started!")
+            if started:
+                print(f"✅ Task {started} started!")
             else:
-                print(f"❌ Error starting task: {result.stderr}", file=sys.stderr)
+                print(f"❌ Error starting task {next_task['task_id']}", file=sys.stderr)
         else:
             print(f"\n💡 To start: fed-queue.py start {next_task['task_id']}")
     else:
         print("⏳ Tasks exist but have unmet dependencies.")
         print("   Waiting for prerequisite tasks to complete.")
-    
+
+
+def startup_sequence(agent: str, auto_start: bool = False, as_json: bool = False,
+                     queue: Optional[FederationQueue] = None) -> Dict:
+    """Run full agent startup sequence; returns the report printed by --json."""
+    queue = queue or FederationQueue()
+    overview = queue.agent_overview(None if agent == ALL_AGENTS else agent)
+
+    started: Dict[str, Optional[str]] = {}
+    for name, view in overview.items():
+        started[name] = None
+        # start() reports its own errors on stderr
+        if auto_start and view["next"] and queue.start(view["next"]["task_id"]):
+            started[name] = view["next"]["task_id"]
+    report = {
+        "auto_scheduling": auto_scheduling_enabled(),
+        "agents": {
+            name: {"queued": view["queued"], "next": view["next"], "started": started[name]}
+            for name, view in overview.items()
+        }
+    }
+
+    if as_json:
+        print(json.dumps(report, indent=2))
+        return report
+
+    print(f"🚀 Federation Agent Startup: {agent}")
+    print("-" * 60)
+    print(f"📋 Auto-scheduling: {'Enabled' if report['auto_scheduling'] else 'Disabled'}")
+    if not overview:
+        print("\n📭 No pending tasks for any agent")
+    for name, view in overview.items():
+        print_agent_report(name, view, auto_start, started[name])
     print("-" * 60)
+    return report
 
 
 def main():
@@ -158,15 +125,18 @@ def main():
 Examples:
   fed-agent-startup.py --agent kimi
   fed-agent-startup.py --agent claude --auto-start
+  fed-agent-startup.py --agent all --json
         """
     )
-    
-    parser.add_argument("--agent", "-a", required=True, help="Agent name (kimi, claude, copilot, ollama)")
+
+    parser.add_argument("--agent", "-a", required=True,
+                        help="Agent name (kimi, claude, copilot, ollama), or 'all'")
     parser.add_argument("--auto-start", action="store_true", help="Auto-start next ready task")
-    
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+
     args = parser.parse_args()
-    
-    startup_sequence(args.agent, args.auto_start)
+
+    startup_sequence(args.agent, args.auto_start, args.json)
 
 
 if __name__ == "__main__":
@@ -5,11 +5,20 @@ Phase 4 Sprint 4: Performance Tracking and Routing Optimization
 
 Usage:
     fed-analytics.py dashboard              # Show federation dashboard
-    fed-analytics.py agent <name>           # Show agent metrics
+    fed-analytics.py dashboard --window 24h # Last 1h|24h|7d, with trend lines
+    fed-analytics.py agent <name>           # Show agent metrics (also --window)
     fed-analytics.py task-type <type>       # Show task type performance
     fed-analytics.py optimize               # Apply routing optimizations
     fed-analytics.py record --agent <name> --task <type> --success <bool> --duration <min>
     fed-analytics.py export                 # Export metrics to JSON
+    fed-analytics.py rollup                 # Fold recorded tasks into metrics.json
+
+Recording appends one line to analytics-events.jsonl and never touches
+metrics.json. The dashboard snapshot (metrics.json) is materialized from the
+event log by a rollup, which folds only the events appended since the last
+one; every read command runs it first, and `rollup` can be run from cron.
+The same rollup counts each task into minute/hour/day ring buffers
+(analytics_series.py) that back the --window views.
 
 Examples:
     fed-analytics.py dashboard
@@ -19,12 +28,18 @@ Examples:
 """
 
 import argparse
+import fcntl
 import json
+import os
 import sys
+from contextlib import contextmanager
 from pathlib import Path
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
-from collections import defaultdict
+from collections import defaultdict, deque
+
+sys.path.insert(0, str(Path(__file__).parent))
+from analytics_series import INDICATORS, WINDOWS, TimeSeries, sparkline
 
 # ─────────────────────────────────────────────────────────────
 # Configuration
@@ -33,6 +48,9 @@ from collections import defaultdict
 SCRIPT_DIR = Path(__file__).parent
 FEDERATION_DIR = SCRIPT_DIR.parent / ".federation"
 METRICS_FILE = FEDERATION_DIR / "state" / "metrics.json"
+EVENTS_FILE = FEDERATION_DIR / "state" / "analytics-events.jsonl"
+LOCK_FILE = FEDERATION_DIR / "state" / ".metrics.lock"
+SERIES_FILE = FEDERATION_DIR / "state" / "analytics-series.json"
 ROUTING_CONFIG = SCRIPT_DIR.parent / "configs" / "federation-routing.json"
 
 # Optimization thresholds
@@ -41,6 +59,7 @@ LOW_PERFORMER_THRESHOLD = 0.50
 MIN_SAMPLES = 5
 BOOST_AMOUNT = 0.05
 PENALTY_AMOUNT = -0.05
+RECENT_TASKS = 100
 
 
 # ─────────────────────────────────────────────────────────────
@@ -51,9 +70,35 @@ class AnalyticsSystem:
     """Tracks and optimizes federation performance."""
     
     def __init__(self):
-        self.metrics = self._load_metrics()
+        self._metrics: Optional[Dict] = None
+        self._series: Optional[TimeSeries] = None
         self.routing_config = self._load_routing_config()
     
+    @property
+    def metrics(self) -> Dict:
+        """The dashboard snapshot, loaded on first use (recording never needs it)."""
+        if self._metrics is None:
+            self._metrics = self._load_metrics()
+        return self._metrics
+    
+    @property
+    def series(self) -> TimeSeries:
+        """Minute/hour/day ring buffers behind the windowed views, loaded on first use."""
+        if self._series is None:
+            self._series = TimeSeries.load(SERIES_FILE)
+        return self._series
+    
+    @contextmanager
+    def _metrics_lock(self):
+        """Serialize rollups and other writers of metrics.json across processes."""
+        LOCK_FILE.parent.mkdir(parents=True, exist_ok=True)
+        with open(LOCK_FILE, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+    
     def _load_metrics(self) -> Dict:
         """Load metrics from file or create default."""
         if METRICS_FILE.exists():
@@ -81,18 +126,99 @@ class AnalyticsSystem:
         return {}
     
     def _save_metrics(self):
-        """Save metrics to file."""
+        """Save metrics to file (atomic replace; caller holds the metrics lock)."""
         METRICS_FILE.parent.mkdir(parents=True, exist_ok=True)
         self.metrics["last_updated"] = datetime.now().isoformat()
-        with open(METRICS_FILE, 'w') as f:
+        temp_path = METRICS_FILE.with_name(f".{METRICS_FILE.name}.{os.getpid()}.tmp")
+        with open(temp_path, 'w') as f:
             json.dump(self.metrics, f, indent=2)
+        os.replace(temp_path, METRICS_FILE)
     
     def record_task(self, agent: str, task_type: str, success: bool, 
                     duration_min: Optional[int] = None, 
                     rework_required: bool = False,
                     notes: Optional[str] = None):
-        """Record a task completion for analytics."""
-        timestamp = datetime.now().isoformat()
+        """Record a task completion for analytics (one append to the event log)."""
+        task_record = {
+            "timestamp": datetime.now().isoformat(),
+            "agent": agent,
+            "task_type": task_type,
+            "success": success,
+            "duration_min": duration_min,
+            "rework_required": rework_required,
+            "notes": notes
+        }
+        
+        # A single O_APPEND write: concurrent recorders never interleave or lose lines
+        EVENTS_FILE.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(EVENTS_FILE, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, (json.dumps(task_record) + "\n").encode())
+        finally:
+            os.close(fd)
+        return task_record
+    
+    def rollup(self) -> int:
+        """Fold events recorded since the last rollup into metrics.json; returns how many."""
+        with self._metrics_lock():
+            return self._fold_events()
+    
+    @staticmethod
+    def _folded_offset(log_state: Dict, stat: os.stat_result) -> int:
+        """Where a store left off in the event log; it only applies to the file it was taken from."""
+        offset = log_state.get("offset", 0)
+        if log_state.get("inode") != stat.st_ino or offset > stat.st_size:
+            return 0
+        return offset
+    
+    def _fold_events(self) -> int:
+        """Reload metrics.json and the series and fold in the unread tail of the event log (lock held)."""
+        self._metrics = self._load_metrics()
+        self._series = TimeSeries.load(SERIES_FILE)
+        try:
+            stat = EVENTS_FILE.stat()
+        except FileNotFoundError:
+            return 0
+        
+        # Each store keeps its own offset, so either can be rebuilt by deleting it
+        metrics_offset = self._folded_offset(self.metrics.get("event_log", {}), stat)
+        series_offset = self._folded_offset(self.series.event_log, stat)
+        offset = min(metrics_offset, series_offset)
+        
+        recent = deque(self.metrics.get("recent_tasks", []), maxlen=RECENT_TASKS)
+        folded = 0
+        with open(EVENTS_FILE, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # Partial line still being written
+                position = offset
+                offset += len(line)
+                try:
+                    event = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if position >= metrics_offset:
+                    self._apply_event(event)
+                    recent.appendleft(event)
+                    folded += 1
+                if position >= series_offset:
+                    self.series.add_event(event)
+        
+        log_state = {"inode": stat.st_ino, "offset": offset}
+        if self.metrics.get("event_log") != log_state:
+            self.metrics["recent_tasks"] = list(recent)
+            self.metrics["event_log"] = log_state
+            self._save_metrics()
+        if self.series.event_log != log_state:
+            self.series.event_log = log_state
+            self.series.save(SERIES_FILE)
+        return folded
+    
+    def _apply_event(self, event: Dict):
+        """Fold one recorded task into the per-agent and per-task-type aggregates."""
+        agent, task_type, success = event["agent"], event["task_type"], event["success"]
+        duration_min, rework_required = event.get("duration_min"), event.get("rework_required")
         
         # Initialize agent metrics if not exists
         if agent not in self.metrics["agents"]:
@@ -159,30 +285,12 @@ class AnalyticsSystem:
             }
         
         self.metrics["task_types"][task_type]["total_count"] += 1
-        
-        # Record individual task
-        task_record = {
-            "timestamp": timestamp,
-            "agent": agent,
-            "task_type": task_type,
-            "success": success,
-            "duration_min": duration_min,
-            "rework_required": rework_required,
-            "notes": notes
-        }
-        
-        if "recent_tasks" not in self.metrics:
-            self.metrics["recent_tasks"] = []
-        
-        self.metrics["recent_tasks"].insert(0, task_record)
-        # Keep only last 100 tasks
-        self.metrics["recent_tasks"] = self.metrics["recent_tasks"][:100]
-        
-        self._save_metrics()
-        return task_record
     
-    def get_dashboard(self) -> Dict:
-        """Get federation-wide dashboard metrics."""
+    def get_dashboard(self, window: Optional[str] = None) -> Dict:
+        """Get federation-wide dashboard metrics (lifetime, or over a 1h/24h/7d window)."""
+        if window:
+            return self._windowed_dashboard(window)
+        
         total_tasks = sum(
             a["total_tasks"] for a in self.metrics["agents"].values()
         )
@@ -238,8 +346,62 @@ class AnalyticsSystem:
             "last_updated": self.metrics["last_updated"]
         }
     
-    def get_agent_metrics(self, agent: str) -> Optional[Dict]:
-        """Get detailed metrics for a specific agent."""
+    def _windowed_dashboard(self, window: str) -> Dict:
+        """Dashboard over the last window, read from the ring buffers."""
+        overall = self.series.totals("agents", None, window)
+        if overall["tasks"] == 0:
+            return {
+                "status": "no_data",
+                "message": f"No tasks recorded in the last {window}."
+            }
+        
+        agents = self.series.keys("agents", window)
+        agent_rankings = []
+        for agent in agents:
+            totals = self.series.totals("agents", agent, window)
+            if totals["tasks"] >= MIN_SAMPLES:
+                agent_rankings.append({
+                    "agent": agent,
+                    "success_rate": totals["success_rate"],
+                    "total_tasks": totals["tasks"],
+                    "avg_duration": totals["avg_duration"],
+                    "rework_rate": totals["rework_rate"]
+                })
+        agent_rankings.sort(key=lambda x: x["success_rate"], reverse=True)
+        
+        task_types = self.series.keys("task_types", window)
+        task_breakdown = [
+            {"task_type": task_type,
+             "total_count": self.series.totals("task_types", task_type, window)["tasks"]}
+            for task_type in task_types
+        ]
+        task_breakdown.sort(key=lambda x: x["total_count"], reverse=True)
+        
+        return {
+            "status": "ok",
+            "window": window,
+            "summary": {
+                "total_tasks": overall["tasks"],
+                "total_success": overall["successes"],
+                "overall_success_rate": round(overall["success_rate"], 2),
+                "active_agents": len(agents),
+                "task_types": len(task_types)
+            },
+            "agent_rankings": agent_rankings[:5],
+            "task_breakdown": task_breakdown[:5],
+            "trends": self._trends(None, window),
+            "last_updated": self.metrics["last_updated"]
+        }
+    
+    def _trends(self, agent: Optional[str], window: str) -> Dict[str, List]:
+        """Per-bucket health indicators for agent (or the whole federation) over window."""
+        return {
+            indicator: self.series.trend("agents", agent, window, indicator)
+            for indicator in INDICATORS
+        }
+    
+    def get_agent_metrics(self, agent: str, window: Optional[str] = None) -> Optional[Dict]:
+        """Get detailed metrics for a specific agent (summary over a 1h/24h/7d window if given)."""
         if agent not in self.metrics["agents"]:
             return None
         
@@ -259,6 +421,22 @@ class AnalyticsSystem:
         
         task_performance.sort(key=lambda x: x["success_rate"], reverse=True)
         
+        if window:
+            totals = self.series.totals("agents", agent, window)
+            return {
+                "agent": agent,
+                "window": window,
+                "summary": {
+                    "total_tasks": totals["tasks"],
+                    "success_rate": totals["success_rate"] or 0,
+                    "avg_duration_min": totals["avg_duration"] or 0,
+                    "rework_rate": totals["rework_rate"] or 0,
+                    "optimization_boost": data.get("routing_boost", 0.0)
+                },
+                "task_type_performance": task_performance,
+                "trends": self._trends(agent, window)
+            }
+        
         return {
             "agent": agent,
             "summary": {
@@ -299,6 +477,13 @@ class AnalyticsSystem:
     
     def optimize_routing(self, dry_run: bool = False) -> Dict:
         """Analyze metrics and suggest routing optimizations."""
+        if dry_run:
+            return self._optimize(dry_run)
+        with self._metrics_lock():
+            self._fold_events()
+            return self._optimize(dry_run)
+    
+    def _optimize(self, dry_run: bool) -> Dict:
         optimizations = []
         
         for agent, data in self.metrics["agents"].items():
@@ -395,12 +580,13 @@ def format_dashboard(data: Dict) -> str:
         return f"⚠️  {data['message']}"
     
     summary = data["summary"]
+    window = f" (last {data['window']})" if data.get("window") else ""
     lines = [
         "╔══════════════════════════════════════════════════════════════╗",
         "║           FEDERATION ANALYTICS DASHBOARD                     ║",
         "╚══════════════════════════════════════════════════════════════╝",
         "",
-        f"📊 Summary",
+        f"📊 Summary{window}",
         f"   Total Tasks:      {summary['total_tasks']}",
         f"   Success Rate:     {summary['overall_success_rate']:.0%}",
         f"   Active Agents:    {summary['active_agents']}",
@@ -421,6 +607,9 @@ def format_dashboard(data: Dict) -> str:
     for task in data["task_breakdown"][:3]:
         lines.append(f"   • {task['task_type']:<20} {task['total_count']} tasks")
     
+    if data.get("trends"):
+        lines.extend(["", f"📈 Trends{window}"] + format_trends(data["trends"]))
+    
     lines.extend([
         "",
         f"Last Updated: {data['last_updated'][:19]}"
@@ -429,21 +618,37 @@ def format_dashboard(data: Dict) -> str:
     return "\n".join(lines)
 
 
+def format_trends(trends: Dict[str, List]) -> List[str]:
+    """Sparkline rows for health indicator trends, oldest bucket on the left."""
+    rows = [
+        ("Tasks", sparkline(trends["tasks"])),
+        ("Success Rate", sparkline(trends["success_rate"], high=1.0)),
+        ("Avg Duration", sparkline(trends["avg_duration"])),
+        ("Rework Rate", sparkline(trends["rework_rate"], high=1.0)),
+    ]
+    return [f"   {label:<17} {line}" for label, line in rows]
+
+
 def format_agent_metrics(data: Dict) -> str:
     """Format agent metrics for display."""
+    window = data.get("window")
     lines = [
         f"📊 Agent: {data['agent']}",
         "",
-        f"Summary:",
+        f"Summary (last {window}):" if window else "Summary:",
         f"   Total Tasks:      {data['summary']['total_tasks']}",
         f"   Success Rate:     {data['summary']['success_rate']:.0%}",
         f"   Avg Duration:     {data['summary']['avg_duration_min']:.0f} min",
         f"   Rework Rate:      {data['summary']['rework_rate']:.0%}",
         f"   Routing Boost:    {data['summary']['optimization_boost']:+.2f}",
         "",
-        f"Task Type Performance:",
     ]
     
+    if window:
+        lines.extend([f"Trends (last {window}):"] + format_trends(data["trends"]) + [""])
+    
+    lines.append("Task Type Performance (all time):" if window else "Task Type Performance:")
+    
     for task in data['task_type_performance'][:5]:
         emoji = "✅" if task['success_rate'] >= 0.90 else "⚠️" if task['success_rate'] >= 0.70 else "❌"
         lines.append(f"   {emoji} {task['task_type']:<20} {task['success_rate']:.0%} ({task['count']} tasks)")
@@ -467,11 +672,15 @@ Examples:
     subparsers = parser.add_subparsers(dest='command', help='Command')
     
     # Dashboard
-    subparsers.add_parser('dashboard', help='Show federation dashboard')
+    dashboard_parser = subparsers.add_parser('dashboard', help='Show federation dashboard')
+    dashboard_parser.add_argument('--window', choices=list(WINDOWS),
+                                  help='Only the last hour, day or week, with trend lines')
     
     # Agent metrics
     agent_parser = subparsers.add_parser('agent', help='Show agent metrics')
     agent_parser.add_argument('agent_name', help='Agent name')
+    agent_parser.add_argument('--window', choices=list(WINDOWS),
+                              help='Only the last hour, day or week, with trend lines')
     
     # Task type metrics
     task_parser = subparsers.add_parser('task-type', help='Show task type metrics')
@@ -494,6 +703,9 @@ Examples:
     # Export
     subparsers.add_parser('export', help='Export metrics to JSON')
     
+    # Rollup
+    subparsers.add_parser('rollup', help='Fold recorded tasks into metrics.json')
+    
     args = parser.parse_args()
     
     if not args.command:
@@ -503,12 +715,17 @@ Examples:
     try:
         analytics = AnalyticsSystem()
         
+        # Reads see every recorded task; optimize folds under its own lock
+        if args.command in ('dashboard', 'agent', 'task-type', 'export') or (
+                args.command == 'optimize' and args.dry_run):
+            analytics.rollup()
+        
         if args.command == 'dashboard':
-            data = analytics.get_dashboard()
+            data = analytics.get_dashboard(args.window)
             print(format_dashboard(data))
         
         elif args.command == 'agent':
-            data = analytics.get_agent_metrics(args.agent_name)
+            data = analytics.get_agent_metrics(args.agent_name, args.window)
             if data:
                 print(format_agent_metrics(data))
             else:
@@ -568,6 +785,10 @@ Examples:
         elif args.command == 'export':
             path = analytics.export_metrics()
             print(f"✅ Exported metrics to: {path}")
+        
+        elif args.command == 'rollup':
+            folded = analytics.rollup()
+            print(f"✅ Folded {folded} recorded tasks into {METRICS_FILE.name}")
     
     except Exception as e:
         print(f"❌ Error: {e}", file=sys.stderr)
@@ -10,6 +10,17 @@ Usage:
     fed-auto-schedule.py on-complete     # Triggered on task completion
     fed-auto-schedule.py check-startup   # Check for queued tasks on agent startup
     fed-auto-schedule.py trigger-rules   # List all auto-schedule rules
+    fed-auto-schedule.py watch           # Run on-complete for every completion as it happens
+
+on-complete fires every matching rule and queues all follow-ups (including
+each rule's "then" chain) through the queue library in one batch. It is
+idempotent: the follow-up IDs are recorded on the completed task, and a
+repeated call returns them instead of queueing again.
+
+watch follows the queue event journal from a cursor persisted in
+.federation/state/auto-schedule-cursor.json (first run: from now). Events are
+processed at least once; with on-complete idempotent, a restart after a crash
+neither misses nor duplicates follow-ups.
 
 This is Phase 4 Sprint 2: Autonomous Task Scheduling
 """
@@ -18,11 +29,15 @@ import argparse
 import json
 import sys
 import os
-import subprocess
 from pathlib import Path
 from datetime import datetime
 from typing import Optional, Dict, List, Tuple
 
+sys.path.insert(0, str(Path(__file__).parent))
+from auto_schedule_rules import CompiledRules, load_rules, render_template
+from federation_queue import FederationQueue, Task
+from queue_watch import QueueWatcher
+
 # ─────────────────────────────────────────────────────────────
 # Configuration
 # ─────────────────────────────────────────────────────────────
@@ -30,7 +45,7 @@ from typing import Optional, Dict, List, Tuple
 FEDERATION_DIR = Path(__file__).parent.parent / ".federation"
 STATE_FILE = FEDERATION_DIR / "state" / "federation-state.json"
 RULES_FILE = FEDERATION_DIR / "state" / "auto-schedule-rules.json"
-QUEUE_SCRIPT = Path(__file__).parent / "fed-queue.py"
+CURSOR_FILE = FEDERATION_DIR / "state" / "auto-schedule-cursor.json"
 
 # ─────────────────────────────────────────────────────────────
 # Auto-Schedule Rules
@@ -120,11 +135,21 @@ DEFAULT_RULES = {
 class AutoScheduler:
     """Manages automatic task scheduling between federation agents."""
     
-    def __init__(self):
-        self.rules_file = RULES_FILE
+    def __init__(self, queue: Optional[FederationQueue] = None, rules_file: Path = RULES_FILE,
+                 cursor_file: Path = CURSOR_FILE):
+        self.rules_file = Path(rules_file)
+        self.cursor_file = Path(cursor_file)
         self.state_file = STATE_FILE
+        self._queue = queue
         self._ensure_rules_exist()
     
+    @property
+    def queue(self) -> FederationQueue:
+        """Queue library handle, opened on first use."""
+        if self._queue is None:
+            self._queue = FederationQueue()
+        return self._queue
+    
     def _ensure_rules_exist(self):
         """Initialize rules file if it doesn't exist."""
         if not self.rules_file.exists():
@@ -137,6 +162,10 @@ class AutoScheduler:
         with open(self.rules_file) as f:
             return json.load(f)
     
+    def _compiled_rules(self) -> CompiledRules:
+        """Rules with their trigger index, cached until the rules file changes."""
+        return load_rules(self.rules_file)
+    
     def _save_rules(self, rules: Dict):
         """Save auto-schedule rules."""
         with open(self.rules_file, 'w') as f:
@@ -144,8 +173,7 @@ class AutoScheduler:
     
     def is_enabled(self) -> bool:
         """Check if auto-scheduling is enabled."""
-        rules = self._load_rules()
-        return rules.get("enabled", False)
+        return self._compiled_rules().enabled
     
     def enable(self):
         """Enable auto-scheduling."""
@@ -190,147 +218,154 @@ class AutoScheduler:
             print(f"   Template: {rule['action']['task_template']}")
             print()
     
-    def check_startup(self, agent: str) -> List[Dict]:
+    def check_startup(self, agent: str) -> List[Task]:
         """Check for tasks queued for this agent on startup."""
-        # Query queue for pending tasks for this agent
-        result = subprocess.run(
-            ["python3", str(QUEUE_SCRIPT), "list", "--status", "pending", "--agent", agent],
-            capture_output=True,
-            text=True,
-            cwd=QUEUE_SCRIPT.parent.parent
-        )
-        
-        if result.returncode != 0:
-            print(f"Warning: Could not check queue: {result.stderr}", file=sys.stderr)
-            return []
-        
-        # Parse output (simple text parsing)
-        tasks = []
-        for line in result.stdout.strip().split('\n')[2:]:  # Skip header lines
-            if line.startswith('task-'):
-                parts = line.split()
-                if len(parts) >= 6:
-                    tasks.append({
-                        "task_id": parts[0],
-                        "status": parts[1],
-                        "priority": parts[2],
-                        "from_agent": parts[3],
-                        "to_agent": parts[4],
-                        "description": ' '.join(parts[5:])
-                    })
-        
-        return tasks
+        return self.queue.list_tasks(status="pending", agent=agent)
     
-    def on_complete(self, task_id: str, completed_by: str, artifact_path: Optional[str] = None) -> Optional[str]:
+    def on_complete(self, task_id: str, completed_by: str, artifact_path: Optional[str] = None) -> List[str]:
         """
-        Triggered when a task is completed. Checks if auto-scheduling should queue a follow-up.
+        Triggered when a task is completed. Queues the follow-ups of every matching rule.
+        
+        All follow-ups (including each rule's "then" chain) are enqueued in one
+        batch: either every one is queued or none is.
         
         Returns:
-            New task ID if auto-queued, None otherwise
+            New task IDs in rule order (empty if nothing was queued)
         """
-        rules = self._load_rules()
+        rules = self._compiled_rules()
         
-        if not rules.get("enabled", False):
-            return None
+        if not rules.enabled:
+            return []
         
         # Get completed task details
         task = self._get_task_details(task_id)
         if not task:
             print(f"Warning: Could not find task {task_id}", file=sys.stderr)
-            return None
-        
-        # Check rules for matches
-        for rule in rules["rules"]:
-            if not rule.get("enabled", False):
-                continue
-            
-            if self._rule_matches(rule, task, completed_by):
-                new_task_id = self._execute_rule(rule, task, artifact_path)
-                if new_task_id:
-                    self._log_auto_schedule(task, rule, new_task_id)
-                    return new_task_id
-        
-        return None
-    
-    def _get_task_details(self, task_id: str) -> Optional[Dict]:
-        """Get task details from queue files."""
-        for status in ["completed", "in-progress", "pending"]:
-            task_file = FEDERATION_DIR / "queue" / status / f"{task_id}.json"
-            if task_file.exists():
-                with open(task_file) as f:
-                    return json.load(f)
-        return None
-    
-    def _rule_matches(self, rule: Dict, task: Dict, completed_by: str) -> bool:
-        """Check if a rule matches the completed task."""
-        trigger = rule["trigger"]
-        
-        # Check from_agent matches
-        if trigger.get("from_agent") != completed_by:
-            return False
+            return []
+        if "follow_ups" in task:
+            return task["follow_ups"]  # Already handled
         
-        # Check task pattern matches
-        task_desc = task.get("description", "").lower()
-        patterns = trigger.get("task_patterns", [])
-        if not any(pattern.lower() in task_desc for pattern in patterns):
-            return False
+        # Check rules for matches (trigger index: agent, then patterns)
+        max_depth = rules.settings.get("max_auto_queue_depth", 5)
+        values = {
+            "previous_task": task.get("description", "previous work"),
+            "artifact_path": artifact_path or task.get("result") or ""
+        }
+        rendered: Dict[str, str] = {}
+        planned: List[Tuple[Dict, Dict]] = []
+        for rule in rules.match(task, completed_by):
+            try:
+                planned.extend((rule, entry) for entry in self._plan_rule(rule, task, values, rendered, max_depth))
+            except (KeyError, ValueError) as e:
+                print(f"Error in rule {rule['id']}: {e}", file=sys.stderr)
+        if not planned:
+            return []
         
-        # Check output artifact requirement
-        if trigger.get("output_artifact", False):
-            # Task should have a result or artifact path
-            if not task.get("result") and not task.get("artifact_path"):
-                return False
+        # Queue every follow-up in one transaction, at most once per completed task
+        try:
+            task_ids = self.queue.add_follow_ups(task_id, [entry for _, entry in planned])
+        except ValueError as e:  # DependencyError included
+            print(f"Error auto-scheduling: {e}", file=sys.stderr)
+            return []
         
-        return True
+        refs = {entry["ref"]: new_id for (_, entry), new_id in zip(planned, task_ids)}
+        for (rule, entry), new_id in zip(planned, task_ids):
+            print(f"🔄 Auto-scheduled: {new_id}")
+            print(f"   For: {entry['to_agent']}")
+            print(f"   Task: {entry['task'][:60]}...")
+            self._log_auto_schedule(refs.get(entry["deps"][0], entry["deps"][0]), rule, new_id)
+        return task_ids
     
-    def _execute_rule(self, rule: Dict, completed_task: Dict, artifact_path: Optional[str]) -> Optional[str]:
-        """Execute an auto-schedule rule."""
-        action = rule["action"]
+    def _load_cursor(self) -> Optional[int]:
+        try:
+            with open(self.cursor_file) as f:
+                return json.load(f)["seq"]
+        except (OSError, json.JSONDecodeError, KeyError):
+            return None
+    
+    def _save_cursor(self, seq: int):
+        temp_file = self.cursor_file.with_suffix(".tmp")
+        with open(temp_file, 'w') as f:
+            json.dump({"seq": seq, "updated_at": datetime.now().isoformat()}, f)
+        os.replace(temp_file, self.cursor_file)
+    
+    def process_events(self) -> int:
+        """Run on_complete for each completion journaled since the cursor.
         
-        # Build task description from template
-        template = action["task_template"]
-        previous_task = completed_task.get("description", "previous work")
-        artifact = artifact_path or completed_task.get("result", "")
+        The cursor advances only after a completion has been handled.
+        Returns the number of completions processed.
+        """
+        journal = self.queue.journal
+        cursor = self._load_cursor()
+        if cursor is None:
+            cursor = journal.counters()["seq"]
+            self._save_cursor(cursor)
         
-        task_desc = template.format(
-            previous_task=previous_task,
-            artifact_path=artifact
-        )
+        handled = 0
+        seq = cursor
+        for event in journal.replay(since=cursor):
+            seq = event["seq"]
+            if event["event"] != "complete":
+                continue
+            self.on_complete(event["task_id"], event.get("agent") or "unknown")
+            self._save_cursor(seq)
+            handled += 1
+        if seq != cursor:
+            self._save_cursor(seq)
+        return handled
+    
+    def watch(self, timeout: Optional[float] = None, once: bool = False) -> int:
+        """Process completions as they are journaled.
         
-        # Queue the new task
-        result = subprocess.run(
-            [
-                "python3", str(QUEUE_SCRIPT), "add",
-                "--from", completed_task.get("to_agent", "unknown"),  # The agent that completed
-                "--to", action["queue_for"],
-                "--task", task_desc,
-                "--priority", action.get("priority", "normal"),
-                "--deps", completed_task["task_id"]  # Depend on completed task
-            ],
-            capture_output=True,
-            text=True,
-            cwd=QUEUE_SCRIPT.parent.parent
-        )
+        Blocks until timeout seconds pass without an event (forever if None);
+        with once, processes the backlog and returns. Returns the number of
+        completions processed.
+        """
+        handled = 0
+        with QueueWatcher(self.queue.journal) as watcher:
+            while True:
+                handled += self.process_events()
+                if once or not watcher.wait(timeout):
+                    return handled
+    
+    def _get_task_details(self, task_id: str) -> Optional[Task]:
+        """Get task details from the queue (archived tasks included)."""
+        return self.queue.get(task_id)
+    
+    def _plan_rule(self, rule: Dict, completed_task: Dict, values: Dict[str, str],
+                   rendered: Dict[str, str], max_depth: int) -> List[Dict]:
+        """add_many() entries for a rule: its action, then each step of its "then" chain.
         
-        if result.returncode == 0:
-            # Parse task ID from output
-            output = result.stdout.strip()
-            if "Created task:" in output:
-                task_id = output.split(": ")[-1]
-                print(f"🔄 Auto-scheduled: {task_id}")
-                print(f"   For: {action['queue_for']}")
-                print(f"   Task: {task_desc[:60]}...")
-                return task_id
-        else:
-            print(f"Error auto-scheduling: {result.stderr}", file=sys.stderr)
+        Each step depends on the one before it; the first depends on the
+        completed task. Templates shared between rules are rendered once.
+        """
+        action = rule["action"]
+        steps = ([action] + action.get("then", []))[:max(1, max_depth)]
         
-        return None
+        entries = []
+        from_agent = completed_task.get("to_agent", "unknown")  # The agent that completed
+        dependency = completed_task["task_id"]
+        for n, step in enumerate(steps):
+            template = step["task_template"]
+            if template not in rendered:
+                rendered[template] = render_template(template, values)
+            ref = f"{rule['id']}#{n}"
+            entries.append({
+                "ref": ref,
+                "from_agent": from_agent,
+                "to_agent": step["queue_for"],
+                "task": rendered[template],
+                "priority": step.get("priority", "normal"),
+                "deps": [dependency]
+            })
+            from_agent, dependency = step["queue_for"], ref
+        return entries
     
-    def _log_auto_schedule(self, completed_task: Dict, rule: Dict, new_task_id: str):
+    def _log_auto_schedule(self, dependency_id: str, rule: Dict, new_task_id: str):
         """Log auto-scheduling event to FEDERATION_LOG.md."""
         # This is a simplified version - full implementation would append to log
         print(f"   Rule: {rule['id']}")
-        print(f"   Dependency: {completed_task['task_id']} → {new_task_id}")
+        print(f"   Dependency: {dependency_id} → {new_task_id}")
         
         # TODO: Append to FEDERATION_LOG.md with proper formatting
         # For now, we print to stdout for visibility
@@ -373,6 +408,11 @@ Examples:
     startup_parser = subparsers.add_parser("check-startup", help="Check for queued tasks on startup")
     startup_parser.add_argument("--agent", "-a", required=True, help="Agent to check for")
     
+    # Watch
+    watch_parser = subparsers.add_parser("watch", help="Auto-schedule every completion as it is journaled")
+    watch_parser.add_argument("--once", action="store_true", help="Process the backlog since the cursor, then exit")
+    watch_parser.add_argument("--timeout", type=float, help="Exit after this many idle seconds")
+    
     # On complete
     complete_parser = subparsers.add_parser("on-complete", help="Trigger auto-schedule on task completion")
     complete_parser.add_argument("task_id", help="Completed task ID")
@@ -407,10 +447,17 @@ Examples:
         else:
             print(f"No pending tasks for {args.agent}")
     
+    elif args.command == "watch":
+        try:
+            handled = scheduler.watch(timeout=args.timeout, once=args.once)
+        except KeyboardInterrupt:
+            return
+        print(f"👀 Processed {handled} completion(s)")
+    
     elif args.command == "on-complete":
-        new_task = scheduler.on_complete(args.task_id, args.by, args.artifact)
-        if new_task:
-            print(f"✅ Auto-scheduled follow-up: {new_task}")
+        new_tasks = scheduler.on_complete(args.task_id, args.by, args.artifact)
+        if new_tasks:
+            print(f"✅ Auto-scheduled {len(new_tasks)} follow-up(s): {', '.join(new_tasks)}")
         else:
             print("ℹ️  No auto-schedule rule matched")
 
@@ -4,271 +4,69 @@ Federation Queue Manager
 Manages task queue for autonomous agent coordination.
 
 Usage:
-    fed-queue.py add --from <agent> --to <agent> --task <desc> [--priority <level>] [--deps <ids>]
+    fed-queue.py add --from <agent> --to <agent> --task <desc> [--priority <level>] [--deps <ids>] [--deadline <iso>]
+    fed-queue.py add --from-file <tasks.jsonl>
     fed-queue.py list [--status <status>] [--agent <agent>]
     fed-queue.py status
-    fed-queue.py start <task-id>
-    fed-queue.py complete <task-id> [--result <path>]
+    fed-queue.py waits [--by from_agent|to_agent|priority]
+    fed-queue.py start <task-id> [--worker <id> --ttl <seconds>]
+    fed-queue.py complete <task-id> [--result <path>] [--worker <id>]
     fed-queue.py cancel <task-id>
-    fed-queue.py next [--agent <agent>]
+    fed-queue.py next [--agent <agent>] [--wait [--timeout <seconds>]]
+    fed-queue.py claim [--agent <agent>] [--worker <id>] [--ttl <seconds>] [--wait [--timeout <seconds>]]
+    fed-queue.py heartbeat <task-id> --worker <id> [--ttl <seconds>]
+    fed-queue.py reap
+    fed-queue.py journal [--since <seq>] [--limit <n>] [--rebuild]
+    fed-queue.py compact [--older-than <days>] [--codec gzip|lzma] [--dry-run]
+    fed-queue.py migrate --to <files|sqlite>
+
+Storage backend: FED_QUEUE_STORAGE=files|sqlite, or "storage" in the "queue"
+section of federation-state.json (default: files).
+
+Workers that run in parallel should use claim rather than next + start: the
+claim is atomic and leases the task for --ttl seconds. A worker extends its
+lease with heartbeat; when a lease expires the task returns to pending and is
+handed to the next claimant.
+
+add --from-file reads one JSON object per line with add()'s arguments as keys,
+plus an optional "ref" that other lines may name in "deps" (use - for stdin):
+    {"ref": "design", "from_agent": "claude", "to_agent": "claude", "task": "Design auth"}
+    {"from_agent": "claude", "to_agent": "kimi", "task": "Implement auth", "deps": ["design"]}
+
+Every transition is appended to queue/journal/ (see queue_journal.py); status
+reads its counters instead of scanning the queue.
+
+compact moves completed and cancelled tasks older than --older-than days
+(default 7) into compressed daily segments under queue/archived/; they remain
+loadable by ID. Loose task files already in queue/archived/ are imported into
+the segments on the same run.
+
+Scheduling policy: FED_QUEUE_POLICY=priority|aging|fair, or "scheduler" in the
+"queue" section of federation-state.json (see queue_policy.py). next and claim
+follow it; waits reports queue-wait percentiles so policies can be compared.
+
+With --wait, next and claim block until a ready task exists (woken by inotify
+on Linux, change polling elsewhere) and exit 1 if --timeout passes first.
 
 Examples:
     fed-queue.py add --from claude --to kimi --task "Implement auth design" --priority high
     fed-queue.py list --status pending
     fed-queue.py next --agent kimi
+    fed-queue.py claim --agent kimi --worker kimi-1
 """
 
 import argparse
 import json
 import sys
-import os
+import time
 from pathlib import Path
-from datetime import datetime
-from typing import Optional, List, Dict
-
-# ─────────────────────────────────────────────────────────────
-# Configuration
-# ─────────────────────────────────────────────────────────────
-
-FEDERATION_DIR = Path(__file__).parent.parent / ".federation"
-QUEUE_DIR = FEDERATION_DIR / "queue"
-STATE_FILE = FEDERATION_DIR / "state" / "federation-state.json"
 
-# Ensure directories exist
-for subdir in ["pending", "in-progress", "completed"]:
-    (QUEUE_DIR / subdir).mkdir(parents=True, exist_ok=True)
-
-# ─────────────────────────────────────────────────────────────
-# Core Queue Manager
-# ─────────────────────────────────────────────────────────────
-
-class FederationQueue:
-    """File-based task queue for agent federation."""
-    
-    def __init__(self):
-        self.queue_dir = QUEUE_DIR
-        self.state_file = STATE_FILE
-        
-    def _generate_task_id(self) -> str:
-        """Generate unique task ID with timestamp."""
-        timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
-        # Get count of existing tasks for uniqueness
-        existing = list(self.queue_dir.glob("*/task-*.json"))
-        seq = len(existing) + 1
-        return f"task-{timestamp}-{seq:04d}"
-    
-    def _task_path(self, task_id: str, status: str) -> Path:
-        """Get file path for a task."""
-        return self.queue_dir / status / f"{task_id}.json"
-    
-    def _load_task(self, task_id: str) -> Optional[Dict]:
-        """Load task from any status directory."""
-        for status in ["pending", "in-progress", "completed"]:
-            path = self._task_path(task_id, status)
-            if path.exists():
-                with open(path) as f:
-                    return json.load(f)
-        return None
-    
-    def add(self, from_agent: str, to_agent: str, task: str, 
-            priority: str = "normal", deps: List[str] = None) -> str:
-        """Add a new task to the queue."""
-        
-        task_id = self._generate_task_id()
-        task_data = {
-            "task_id": task_id,
-            "status": "pending",
-            "created_at": datetime.now().isoformat(),
-            "from_agent": from_agent,
-            "to_agent": to_agent,
-            "description": task,
-            "priority": priority,
-            "dependencies": deps or [],
-            "started_at": None,
-            "completed_at": None,
-            "result": None,
-            "context": {}
-        }
-        
-        # Check dependencies exist
-        for dep_id in task_data["dependencies"]:
-            dep = self._load_task(dep_id)
-            if not dep:
-                print(f"Warning: Dependency {dep_id} not found", file=sys.stderr)
-        
-        # Write to pending
-        task_path = self._task_path(task_id, "pending")
-        with open(task_path, 'w') as f:
-            json.dump(task_data, f, indent=2)
-        
-        self._update_state()
-        return task_id
-    
-    def list_tasks(self, status: Optional[str] = None, agent: Optional[str] = None) -> List[Dict]:
-        """List tasks, optionally filtered by status and/or agent."""
-        tasks = []
-        
-        statuses = [status] if status else ["pending", "in-progress", "completed"]
-        
-        for s in statuses:
-            status_dir = self.queue_dir / s
-            if not status_dir.exists():
-                continue
-                
-            for task_file in sorted(status_dir.glob("task-*.json")):
-                with open(task_file) as f:
-                    task = json.load(f)
-                    
-                # Filter by agent if specified
-                if agent:
-                    if task.get("to_agent") != agent and task.get("from_agent") != agent:
-                        continue
-                
-                tasks.append(task)
-        
-        # Sort by priority and creation time
-        priority_order = {"critical": 0, "high": 1, "normal": 2, "low": 3}
-        tasks.sort(key=lambda t: (priority_order.get(t.get("priority", "normal"), 2), t.get("created_at", "")))
-        
-        return tasks
-    
-    def status(self) -> Dict:
-        """Get overall queue status."""
-        counts = {}
-        for status in ["pending", "in-progress", "completed"]:
-            status_dir = self.queue_dir / status
-            if status_dir.exists():
-                counts[status] = len(list(status_dir.glob("task-*.json")))
-            else:
-                counts[status] = 0
-        
-        return {
-            "pending": counts["pending"],
-            "in_progress": counts["in-progress"],
-            "completed": counts["completed"],
-            "total": sum(counts.values())
-        }
-    
-    def start(self, task_id: str) -> bool:
-        """Mark a task as in-progress."""
-        task = self._load_task(task_id)
-        if not task:
-            print(f"Error: Task {task_id} not found", file=sys.stderr)
-            return False
-        
-        if task["status"] != "pending":
-            print(f"Error: Task {task_id} is not pending (status: {task['status']})", file=sys.stderr)
-            return False
-        
-        # Check dependencies are complete
-        for dep_id in task.get("dependencies", []):
-            dep = self._load_task(dep_id)
-            if not dep or dep.get("status") != "completed":
-                print(f"Error: Dependency {dep_id} not completed", file=sys.stderr)
-                return False
-        
-        # Move from pending to in-progress
-        old_path = self._task_path(task_id, "pending")
-        new_path = self._task_path(task_id, "in-progress")
-        
-        task["status"] = "in-progress"
-        task["started_at"] = datetime.now().isoformat()
-        
-        with open(new_path, 'w') as f:
-            json.dump(task, f, indent=2)
-        
-        old_path.unlink()
-        self._update_state()
-        return True
-    
-    def complete(self, task_id: str, result: Optional[str] = None) -> bool:
-        """Mark a task as completed."""
-        task = self._load_task(task_id)
-        if not task:
-            print(f"Error: Task {task_id} not found", file=sys.stderr)
-            return False
-        
-        if task["status"] != "in-progress":
-            print(f"Error: Task {task_id} is not in-progress (status: {task['status']})", file=sys.stderr)
-            return False
-        
-        # Move from in-progress to completed
-        old_path = self._task_path(task_id, "in-progress")
-        new_path = self._task_path(task_id, "completed")
-        
-        task["status"] = "completed"
-        task["completed_at"] = datetime.now().isoformat()
-        if result:
-            task["result"] = result
-        
-        with open(new_path, 'w') as f:
-            json.dump(task, f, indent=2)
-        
-        old_path.unlink()
-        self._update_state()
-        
-        # Log to FEDERATION_LOG.md (optional integration)
-        print(f"✅ Task {task_id} completed. Auto-scheduling check: enabled")
-        
-        return True
-    
-    def cancel(self, task_id: str) -> bool:
-        """Cancel a pending or in-progress task."""
-        task = self._load_task(task_id)
-        if not task:
-            print(f"Error: Task {task_id} not found", file=sys.stderr)
-            return False
-        
-        status = task["status"]
-        if status == "completed":
-            print(f"Error: Cannot cancel completed task {task_id}", file=sys.stderr)
-            return False
-        
-        path = self._task_path(task_id, status)
-        if path.exists():
-            path.unlink()
-        
-        self._update_state()
-        print(f"🚫 Task {task_id} cancelled")
-        return True
-    
-    def next_task(self, agent: Optional[str] = None) -> Optional[Dict]:
-        """Get the next task for an agent (highest priority, oldest first)."""
-        tasks = self.list_tasks(status="pending", agent=agent)
-        
-        # Filter for tasks with all dependencies complete
-        ready_tasks = []
-        for task in tasks:
-            deps_complete = True
-            for dep_id in task.get("dependencies", []):
-                dep = self._load_task(dep_id)
-                if not dep or dep.get("status") != "completed":
-                    deps_complete = False
-                    break
-            if deps_complete:
-                ready_tasks.append(task)
-        
-        return ready_tasks[0] if ready_tasks else None
-    
-    def _update_state(self):
-        """Update federation state file with current counts."""
-        if not self.state_file.exists():
-            return
-        
-        try:
-            with open(self.state_file) as f:
-                state = json.load(f)
-            
-            status = self.status()
-            state["queue"]["pending_count"] = status["pending"]
-            state["queue"]["in_progress_count"] = status["in_progress"]
-            state["queue"]["completed_count"] = status["completed"]
-            state["queue"]["last_updated"] = datetime.now().isoformat()
-            
-            with open(self.state_file, 'w') as f:
-                json.dump(state, f, indent=2)
-        except Exception as e:
-            print(f"Warning: Could not update state: {e}", file=sys.stderr)
+sys.path.insert(0, str(Path(__file__).parent))
+from federation_queue import (
+    ARCHIVE_AFTER_DAYS, DEFAULT_LEASE_TTL, FederationQueue
+)
+from queue_archive import CODECS, DEFAULT_CODEC
+from queue_storage import BACKENDS, STATUSES
 
 
 # ─────────────────────────────────────────────────────────────
@@ -295,31 +93,42 @@ Examples:
     
     # Add command
     add_parser = subparsers.add_parser("add", help="Add a new task")
-    add_parser.add_argument("--from", "-f", required=True, dest="from_agent", help="Source agent")
-    add_parser.add_argument("--to", "-t", required=True, dest="to_agent", help="Target agent")
-    add_parser.add_argument("--task", "-d", required=True, help="Task description")
+    add_parser.add_argument("--from", "-f", dest="from_agent", help="Source agent")
+    add_parser.add_argument("--to", "-t", dest="to_agent", help="Target agent")
+    add_parser.add_argument("--task", "-d", help="Task description")
     add_parser.add_argument("--priority", "-p", default="normal", 
                            choices=["critical", "high", "normal", "low"],
                            help="Task priority")
     add_parser.add_argument("--deps", help="Comma-separated dependency task IDs")
+    add_parser.add_argument("--deadline", help="ISO timestamp; deadline-aware policies serve earlier deadlines first")
+    add_parser.add_argument("--from-file", dest="from_file", metavar="TASKS_JSONL",
+                           help="Add every task in a JSONL file in one batch")
     
     # List command
     list_parser = subparsers.add_parser("list", help="List tasks")
-    list_parser.add_argument("--status", "-s", choices=["pending", "in-progress", "completed"],
+    list_parser.add_argument("--status", "-s", choices=STATUSES,
                             help="Filter by status")
     list_parser.add_argument("--agent", "-a", help="Filter by agent (to or from)")
     
     # Status command
     subparsers.add_parser("status", help="Show queue status")
     
+    # Waits command
+    waits_parser = subparsers.add_parser("waits", help="Show queue-wait percentiles")
+    waits_parser.add_argument("--by", default="from_agent", choices=["from_agent", "to_agent", "priority"],
+                              help="Group waits by this task field")
+    
     # Start command
     start_parser = subparsers.add_parser("start", help="Start a task")
     start_parser.add_argument("task_id", help="Task ID to start")
+    start_parser.add_argument("--worker", "-w", help="Lease holder (with --ttl)")
+    start_parser.add_argument("--ttl", type=float, help="Lease the task for this many seconds")
     
     # Complete command
     complete_parser = subparsers.add_parser("complete", help="Complete a task")
     complete_parser.add_argument("task_id", help="Task ID to complete")
     complete_parser.add_argument("--result", "-r", help="Path to result artifact")
+    complete_parser.add_argument("--worker", "-w", help="Require the task to be leased to this worker")
     
     # Cancel command
     cancel_parser = subparsers.add_parser("cancel", help="Cancel a task")
@@ -327,7 +136,47 @@ Examples:
     
     # Next command
     next_parser = subparsers.add_parser("next", help="Get next task for agent")
-    next_parser.add_argument("--agent", "-a", help="Agent to get next task for")
+    next_parser.add_argument("--agent", "-a", help="Agent the task is assigned to or sent by")
+    next_parser.add_argument("--wait", action="store_true", help="Block until a task is ready")
+    next_parser.add_argument("--timeout", type=float, help="Give up waiting after this many seconds")
+    
+    # Claim command
+    claim_parser = subparsers.add_parser("claim", help="Atomically start and lease the next task")
+    claim_parser.add_argument("--agent", "-a", help="Agent the task is assigned to")
+    claim_parser.add_argument("--worker", "-w", help="Lease holder (default: host:pid)")
+    claim_parser.add_argument("--ttl", type=float, default=DEFAULT_LEASE_TTL,
+                              help=f"Lease duration in seconds (default: {DEFAULT_LEASE_TTL})")
+    claim_parser.add_argument("--wait", action="store_true", help="Block until a task is ready")
+    claim_parser.add_argument("--timeout", type=float, help="Give up waiting after this many seconds")
+    
+    # Heartbeat command
+    heartbeat_parser = subparsers.add_parser("heartbeat", help="Extend a task lease")
+    heartbeat_parser.add_argument("task_id", help="Leased task ID")
+    heartbeat_parser.add_argument("--worker", "-w", required=True, help="Lease holder")
+    heartbeat_parser.add_argument("--ttl", type=float, help="New lease duration in seconds")
+    
+    # Reap command
+    subparsers.add_parser("reap", help="Return tasks with expired leases to pending")
+    
+    # Journal command
+    journal_parser = subparsers.add_parser("journal", help="Print queue events as JSON lines")
+    journal_parser.add_argument("--since", type=int, default=0, help="Only events after this seq")
+    journal_parser.add_argument("--limit", type=int, help="Stop after this many events")
+    journal_parser.add_argument("--rebuild", action="store_true",
+                                help="Recompute the counters by replaying the journal")
+    
+    # Compact command
+    compact_parser = subparsers.add_parser("compact", help="Archive old completed and cancelled tasks")
+    compact_parser.add_argument("--older-than", type=float, default=ARCHIVE_AFTER_DAYS, dest="days",
+                                help=f"Age in days (default: {ARCHIVE_AFTER_DAYS})")
+    compact_parser.add_argument("--codec", choices=sorted(CODECS), default=DEFAULT_CODEC,
+                                help="Compression for new archive segments")
+    compact_parser.add_argument("--dry-run", action="store_true", help="Report without moving anything")
+    
+    # Migrate command
+    migrate_parser = subparsers.add_parser("migrate", help="Move tasks to another storage backend")
+    migrate_parser.add_argument("--to", required=True, dest="backend", choices=sorted(BACKENDS),
+                                help="Destination backend")
     
     args = parser.parse_args()
     
@@ -336,15 +185,37 @@ Examples:
         sys.exit(1)
     
     # Execute command
-    if args.command == "add":
+    if args.command == "add" and args.from_file:
+        try:
+            with (sys.stdin if args.from_file == "-" else open(args.from_file)) as f:
+                entries = [json.loads(line) for line in f if line.strip()]
+            started = time.perf_counter()
+            task_ids = queue.add_many(entries)
+        except (OSError, ValueError) as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        elapsed = time.perf_counter() - started
+        rate = len(task_ids) / elapsed if elapsed > 0 else 0
+        print(f"✅ Created {len(task_ids)} task(s) in {elapsed:.3f}s ({rate:.0f} tasks/s)")
+        if task_ids:
+            print(f"   IDs: {task_ids[0]} … {task_ids[-1]}")
+    
+    elif args.command == "add":
+        if not (args.from_agent and args.to_agent and args.task):
+            parser.error("add requires --from, --to and --task (or --from-file)")
         deps = args.deps.split(",") if args.deps else []
-        task_id = queue.add(
-            from_agent=args.from_agent,
-            to_agent=args.to_agent,
-            task=args.task,
-            priority=args.priority,
-            deps=deps
-        )
+        try:
+            task_id = queue.add(
+                from_agent=args.from_agent,
+                to_agent=args.to_agent,
+                task=args.task,
+                priority=args.priority,
+                deps=deps,
+                deadline=args.deadline
+            )
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
         print(f"✅ Created task: {task_id}")
         print(f"   From: {args.from_agent} → To: {args.to_agent}")
         print(f"   Priority: {args.priority}")
@@ -368,16 +239,32 @@ Examples:
         print(f"   Pending:     {status['pending']}")
         print(f"   In Progress: {status['in_progress']}")
         print(f"   Completed:   {status['completed']}")
+        print(f"   Cancelled:   {status['cancelled']}")
         print(f"   Total:       {status['total']}")
+        print(f"   Scheduler:   {queue.policy.name}")
+        agents = queue.agent_status()
+        if agents:
+            print("   By agent (pending / in progress / completed):")
+            for agent, counts in sorted(agents.items()):
+                print(f"     {agent:<12} {counts['pending']:>4} / {counts['in-progress']:>4} / {counts['completed']:>4}")
+    
+    elif args.command == "waits":
+        report = queue.wait_report(group_by=args.by)
+        print(f"⏱️  Queue wait in seconds (policy: {report['policy']})")
+        print(f"   {args.by:<14} {'count':>6} {'p50':>9} {'p90':>9} {'p99':>9} {'max':>9}")
+        rows = list(report["groups"].items()) + [("overall", report["overall"])]
+        for name, summary in rows:
+            print(f"   {name:<14} {summary['count']:>6} {summary['p50']:>9.1f} {summary['p90']:>9.1f} "
+                  f"{summary['p99']:>9.1f} {summary['max']:>9.1f}")
     
     elif args.command == "start":
-        if queue.start(args.task_id):
+        if queue.start(args.task_id, worker=args.worker, ttl=args.ttl):
             print(f"🚀 Started task: {args.task_id}")
         else:
             sys.exit(1)
     
     elif args.command == "complete":
-        if queue.complete(args.task_id, args.result):
+        if queue.complete(args.task_id, args.result, worker=args.worker):
             print(f"✅ Completed task: {args.task_id}")
         else:
             sys.exit(1)
@@ -389,7 +276,10 @@ Examples:
             sys.exit(1)
     
     elif args.command == "next":
-        task = queue.next_task(args.agent)
+        if args.wait:
+            task = queue.wait_for_task(args.agent, timeout=args.timeout)
+        else:
+            task = queue.next_task(args.agent)
         if task:
             print(f"⏭️  Next task for {args.agent or 'any agent'}:")
             print(f"   ID:          {task['task_id']}")
@@ -400,6 +290,68 @@ Examples:
                 print(f"   Dependencies: {', '.join(task['dependencies'])}")
         else:
             print(f"No pending tasks{' for ' + args.agent if args.agent else ''}")
+            if args.wait:
+                sys.exit(1)
+    
+    elif args.command == "claim":
+        if args.wait:
+            task = queue.wait_for_task(args.agent, timeout=args.timeout, claim=True,
+                                       worker=args.worker, ttl=args.ttl)
+        else:
+            task = queue.claim(args.agent, worker=args.worker, ttl=args.ttl)
+        if task:
+            lease = task["lease"]
+            print(f"🔒 Claimed task for {args.agent or 'any agent'}:")
+            print(f"   ID:          {task['task_id']}")
+            print(f"   From:        {task['from_agent']}")
+            print(f"   Priority:    {task['priority']}")
+            print(f"   Description: {task['description']}")
+            print(f"   Lease:       {lease['worker']} until {lease['expires_at']}")
+        else:
+            print(f"No pending tasks{' for ' + args.agent if args.agent else ''}")
+            if args.wait:
+                sys.exit(1)
+    
+    elif args.command == "heartbeat":
+        if queue.heartbeat(args.task_id, args.worker, args.ttl):
+            print(f"💓 Lease on {args.task_id} extended")
+        else:
+            sys.exit(1)
+    
+    elif args.command == "reap":
+        reaped = queue.reap_expired()
+        print(f"♻️  Returned {len(reaped)} expired task(s) to pending")
+        for task_id in reaped:
+            print(f"   {task_id}")
+    
+    elif args.command == "journal":
+        if args.rebuild:
+            counters = queue.journal.rebuild()
+            print(f"🔁 Rebuilt counters from {counters['seq']} event(s)")
+            return
+        for n, event in enumerate(queue.journal.replay(since=args.since)):
+            if args.limit is not None and n >= args.limit:
+                break
+            print(json.dumps(event))
+    
+    elif args.command == "compact":
+        report = queue.compact(args.days, args.codec, dry_run=args.dry_run)
+        verb = "Would archive" if args.dry_run else "Archived"
+        print(f"🗜️  {verb} {report['archived']} task(s) older than {args.days:g} day(s)")
+        if report["archived"] and not args.dry_run:
+            print(f"   {report['bytes_before']} bytes → {report['bytes_after']} bytes ({args.codec})")
+        if report["imported"]:
+            print(f"   {'Would import' if args.dry_run else 'Imported'} {report['imported']} loose file(s) from queue/archived/")
+    
+    elif args.command == "migrate":
+        source = queue.storage.name
+        try:
+            copied = queue.migrate_storage(args.backend)
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        print(f"📦 Migrated {copied} task(s): {source} → {args.backend}")
+        print(f"   Queue storage is now: {args.backend}")
 
 
 if __name__ == "__main__":
@@ -51,18 +51,33 @@ get_queue_stats() {
     local pending=0
     local in_progress=0
     local completed=0
+    local cancelled=0
+    local counters="${QUEUE_DIR}/journal/counters.json"
+
+    # Journal counters are kept current by fed-queue.py; no directory scan needed
+    if [[ -f "$counters" ]]; then
+        python3 -c "
+import json
+with open('$counters') as f:
+    status = json.load(f)['status']
+print(f\"{status['pending']}|{status['in-progress']}|{status['completed']}|{status['cancelled']}\")
+" 2>/dev/null && return
+    fi
 
     if [[ -d "${QUEUE_DIR}/pending" ]]; then
         pending=$(find "${QUEUE_DIR}/pending" -name "*.json" 2>/dev/null | wc -l | tr -d ' ')
     fi
-    if [[ -d "${QUEUE_DIR}/in_progress" ]]; then
-        in_progress=$(find "${QUEUE_DIR}/in_progress" -name "*.json" 2>/dev/null | wc -l | tr -d ' ')
+    if [[ -d "${QUEUE_DIR}/in-progress" ]]; then
+        in_progress=$(find "${QUEUE_DIR}/in-progress" -name "*.json" 2>/dev/null | wc -l | tr -d ' ')
     fi
     if [[ -d "${QUEUE_DIR}/completed" ]]; then
         completed=$(find "${QUEUE_DIR}/completed" -name "*.json" 2>/dev/null | wc -l | tr -d ' ')
     fi
+    if [[ -d "${QUEUE_DIR}/cancelled" ]]; then
+        cancelled=$(find "${QUEUE_DIR}/cancelled" -name "*.json" 2>/dev/null | wc -l | tr -d ' ')
+    fi
 
-    echo "${pending}|${in_progress}|${completed}"
+    echo "${pending}|${in_progress}|${completed}|${cancelled}"
 }
 
 get_agent_status() {
@@ -147,7 +162,7 @@ quick_status() {
     echo
 
     # Queue stats
-    IFS='|' read -r pending in_progress completed <<< "$(get_queue_stats)"
+    IFS='|' read -r pending in_progress completed cancelled <<< "$(get_queue_stats)"
     echo -e "Queue: ${YELLOW}${pending}${NC} pending | ${BLUE}${in_progress}${NC} active | ${GREEN}${completed}${NC} done"
 
     # Agent status (compact)
@@ -229,12 +244,13 @@ with open('$STATE_FILE') as f:
     print_section "QUEUE SUMMARY"
     echo
 
-    IFS='|' read -r pending in_progress completed <<< "$(get_queue_stats)"
-    local total=$((pending + in_progress + completed))
+    IFS='|' read -r pending in_progress completed cancelled <<< "$(get_queue_stats)"
+    local total=$((pending + in_progress + completed + cancelled))
 
     printf "  %-20s %5s\n" "Pending" "$pending"
     printf "  %-20s %5s\n" "In Progress" "$in_progress"
     printf "  %-20s %5s\n" "Completed (today)" "$completed"
+    printf "  %-20s %5s\n" "Cancelled" "$cancelled"
     printf "  %-20s %5s\n" "──────────────────" "─────"
     printf "  ${BOLD}%-20s %5s${NC}\n" "Total" "$total"
     echo
@@ -297,7 +313,7 @@ with open('$STATE_FILE') as f:
 # ─────────────────────────────────────────────────────────────
 
 json_output() {
-    IFS='|' read -r pending in_progress completed <<< "$(get_queue_stats)"
+    IFS='|' read -r pending in_progress completed cancelled <<< "$(get_queue_stats)"
 
     cat <<EOF
 {
@@ -313,7 +329,8 @@ json_output() {
   "queue": {
     "pending": $pending,
     "in_progress": $in_progress,
-    "completed": $completed
+    "completed": $completed,
+    "cancelled": $cancelled
   },
   "cost": {
     "total": 0.65,
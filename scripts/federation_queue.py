@@ -0,0 +1,706 @@
+#!/usr/bin/env python3
+"""
+Federation Queue Library
+Task queue for autonomous agent coordination, importable by other scripts.
+
+    from federation_queue import FederationQueue
+
+    queue = FederationQueue()
+    task_id = queue.add("claude", "kimi", "Implement auth design", priority="high")
+    task = queue.claim("kimi", worker="kimi-1")
+
+fed-queue.py is the command-line front end. Tasks are returned as Task
+dictionaries (the JSON stored by the backend); see the TypedDicts below.
+"""
+
+import json
+import sys
+import os
+import time
+from pathlib import Path
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, TypedDict
+
+sys.path.insert(0, str(Path(__file__).parent))
+from queue_storage import (
+    PRIORITY_ORDER, QueueStorage, TaskIdAllocator, configured_backend, is_ready, migrate, open_storage
+)
+from queue_archive import DEFAULT_CODEC, TaskArchive, archive_day
+from queue_policy import SchedulingPolicy, configured_scheduler, open_policy, wait_summary
+from queue_journal import QueueJournal, empty_counts, transition
+
+# ─────────────────────────────────────────────────────────────
+# Configuration
+# ─────────────────────────────────────────────────────────────
+
+FEDERATION_DIR = Path(__file__).parent.parent / ".federation"
+QUEUE_DIR = FEDERATION_DIR / "queue"
+STATE_FILE = FEDERATION_DIR / "state" / "federation-state.json"
+
+# Seconds a claimed task stays leased without a heartbeat
+DEFAULT_LEASE_TTL = 300
+
+# Completed/cancelled tasks older than this are moved to the archive by compact
+ARCHIVE_AFTER_DAYS = 7
+
+# Longest a waiter sleeps without rechecking (lease expiry is time-based, not an event)
+WAIT_RECHECK_INTERVAL = 5.0
+
+# Bump when the dependency fields stored on tasks change shape
+GRAPH_VERSION = 1
+
+
+# ─────────────────────────────────────────────────────────────
+# Return Types
+# ─────────────────────────────────────────────────────────────
+
+class Lease(TypedDict):
+    worker: str
+    ttl: float
+    expires_at: str
+
+
+class Task(TypedDict, total=False):
+    """A queue task as stored by the backend."""
+    task_id: str
+    status: str              # pending | in-progress | completed | cancelled
+    created_at: str
+    from_agent: str
+    to_agent: str
+    description: str
+    priority: str            # critical | high | normal | low
+    deadline: Optional[str]
+    dependencies: List[str]
+    dependents: List[str]
+    unmet_dependencies: int
+    started_at: Optional[str]
+    completed_at: Optional[str]
+    cancelled_at: str
+    archived_at: str
+    result: Optional[str]
+    follow_ups: List[str]    # IDs recorded by add_follow_ups()
+    context: Dict
+    deliveries: int
+    lease: Lease
+
+
+class QueueStatus(TypedDict):
+    pending: int
+    in_progress: int
+    completed: int
+    cancelled: int
+    total: int
+
+
+class CompactReport(TypedDict):
+    archived: int
+    imported: int
+    bytes_before: int
+    bytes_after: int
+
+
+class WaitSummary(TypedDict):
+    count: int
+    p50: float
+    p90: float
+    p99: float
+    max: float
+
+
+class WaitReport(TypedDict):
+    policy: str
+    group_by: str
+    overall: WaitSummary
+    groups: Dict[str, WaitSummary]
+
+
+class AgentOverview(TypedDict):
+    queued: List[Task]
+    next: Optional[Task]
+
+
+class DependencyError(ValueError):
+    """A task names a dependency that does not exist or would form a cycle."""
+
+
+def default_worker_id() -> str:
+    """Identify this process as a lease holder."""
+    import socket
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+# ─────────────────────────────────────────────────────────────
+# Core Queue Manager
+# ─────────────────────────────────────────────────────────────
+
+class FederationQueue:
+    """Task queue for agent federation over a pluggable storage backend."""
+    
+    def __init__(self, queue_dir: Path = QUEUE_DIR, state_file: Path = STATE_FILE,
+                 backend: Optional[str] = None, policy: Optional[str] = None):
+        self.queue_dir = Path(queue_dir)
+        self.state_file = Path(state_file)
+        self.storage: QueueStorage = open_storage(
+            backend or configured_backend(self.state_file), self.queue_dir
+        )
+        scheduler = configured_scheduler(self.state_file)
+        if policy:
+            scheduler["policy"] = policy
+        self.policy: SchedulingPolicy = open_policy(scheduler)
+        self.ids = TaskIdAllocator(
+            self.queue_dir, seed=lambda: sum(self.storage.count_by_status().values())
+        )
+        self.journal = QueueJournal(self.queue_dir)
+        self.archive = TaskArchive(self.queue_dir)
+        self._ensure_graph()
+        self._ensure_journal()
+    
+    def _ensure_journal(self):
+        """Start the journal of an existing queue with a snapshot of its current counts."""
+        if self.journal.exists():
+            return
+        
+        with self.storage.transaction():
+            status, agents = empty_counts(), {}
+            for task in self.storage.list_tasks():
+                status[task["status"]] += 1
+                agents.setdefault(task.get("to_agent") or "unknown", empty_counts())[task["status"]] += 1
+            self.journal.snapshot(status, agents)
+    
+    def _ensure_graph(self):
+        """Backfill dependents/unmet_dependencies on queues created before they existed.
+        
+        Missing fields read as no dependents and no unmet dependencies, so
+        only tasks whose graph differs from that are rewritten; opening a
+        queue without dependencies (any read-only command) touches no task.
+        """
+        if self.storage.get_meta("graph_version") == GRAPH_VERSION:
+            return
+        
+        with self.storage.transaction():
+            tasks = {t["task_id"]: t for t in self.storage.list_tasks()}
+            dependents = {task_id: [] for task_id in tasks}
+            unmet = {}
+            for task_id, task in tasks.items():
+                unmet[task_id] = 0
+                for dep_id in dict.fromkeys(task.get("dependencies", [])):
+                    # As in add_many: completed tasks never release again
+                    if tasks.get(dep_id, {}).get("status") != "completed":
+                        unmet[task_id] += 1
+                        if dep_id in tasks:
+                            dependents[dep_id].append(task_id)
+            for task_id, task in tasks.items():
+                if (task.get("dependents", []) != dependents[task_id]
+                        or task.get("unmet_dependencies", 0) != unmet[task_id]):
+                    task["dependents"] = dependents[task_id]
+                    task["unmet_dependencies"] = unmet[task_id]
+                    self.storage.save(task)
+            self.storage.set_meta("graph_version", GRAPH_VERSION)
+        
+    def _generate_task_id(self) -> str:
+        """Generate unique, time-ordered task ID without scanning the queue."""
+        return self.ids.next_id()
+    
+    def get(self, task_id: str) -> Optional[Task]:
+        """Load a task by ID from any status, including archived ones."""
+        return self.storage.load(task_id) or self.archive.load(task_id)
+    
+    def _validate_dependencies(self, new_tasks: Dict[str, List[str]]) -> Dict[str, Dict]:
+        """Check that dependencies of not-yet-saved tasks exist and form no cycle.
+        
+        new_tasks maps each new task ID to its dependency IDs; dependencies may
+        name other new tasks. Returns the existing tasks that were referenced.
+        Raises DependencyError.
+        """
+        existing = {}
+        for task_id, deps in new_tasks.items():
+            for dep_id in deps:
+                if dep_id in new_tasks or dep_id in existing:
+                    continue
+                dep = self.get(dep_id)
+                if not dep:
+                    raise DependencyError(f"Dependency {dep_id} of {task_id} not found")
+                if dep["status"] == "cancelled":
+                    raise DependencyError(f"Dependency {dep_id} of {task_id} was cancelled")
+                existing[dep_id] = dep
+        
+        # Stored tasks cannot depend on new ones, so any cycle lies within new_tasks
+        visiting, done = set(), set()
+        for root in new_tasks:
+            if root in done:
+                continue
+            stack = [(root, iter(new_tasks[root]))]
+            visiting.add(root)
+            while stack:
+                node, children = stack[-1]
+                for child in children:
+                    if child not in new_tasks or child in done:
+                        continue
+                    if child in visiting:
+                        raise DependencyError(f"Dependency cycle through {child}")
+                    visiting.add(child)
+                    stack.append((child, iter(new_tasks[child])))
+                    break
+                else:
+                    stack.pop()
+                    visiting.discard(node)
+                    done.add(node)
+        return existing
+    
+    def add(self, from_agent: str, to_agent: str, task: str, 
+            priority: str = "normal", deps: List[str] = None,
+            deadline: Optional[str] = None) -> str:
+        """Add a new task to the queue.
+        
+        deadline is an optional ISO timestamp; deadline-aware policies use it
+        to break ties. Raises DependencyError if a dependency does not exist.
+        """
+        return self.add_many([{
+            "from_agent": from_agent,
+            "to_agent": to_agent,
+            "task": task,
+            "priority": priority,
+            "deps": deps,
+            "deadline": deadline
+        }])[0]
+    
+    def add_many(self, tasks: List[Dict]) -> List[str]:
+        """Add several tasks in one transaction with a single state update.
+        
+        Each entry holds add()'s arguments as keys (from_agent, to_agent, task,
+        and optionally priority and deps) plus an optional "ref": a name local
+        to the batch that other entries may list in deps, whether they come
+        before or after it. Returns the new task IDs in input order.
+        
+        Raises ValueError for a malformed entry and DependencyError for an
+        unknown dependency or a cycle; nothing is written in either case.
+        """
+        refs = {}
+        for n, entry in enumerate(tasks, 1):
+            if not isinstance(entry, dict):
+                raise ValueError(f"Task {n}: expected a JSON object")
+            missing = [key for key in ("from_agent", "to_agent", "task") if not entry.get(key)]
+            if missing:
+                raise ValueError(f"Task {n}: missing {', '.join(missing)}")
+            if entry.get("priority", "normal") not in PRIORITY_ORDER:
+                raise ValueError(f"Task {n}: unknown priority {entry['priority']}")
+            if entry.get("deadline"):
+                try:
+                    datetime.fromisoformat(entry["deadline"])
+                except (TypeError, ValueError):
+                    raise ValueError(f"Task {n}: deadline is not an ISO timestamp: {entry['deadline']}")
+            if entry.get("ref"):
+                if entry["ref"] in refs:
+                    raise ValueError(f"Task {n}: duplicate ref {entry['ref']}")
+                refs[entry["ref"]] = n - 1
+        if not tasks:
+            return []
+        
+        task_ids = self.ids.next_ids(len(tasks))
+        refs = {ref: task_ids[i] for ref, i in refs.items()}
+        new_tasks = {}
+        for entry, task_id in zip(tasks, task_ids):
+            deps = [refs.get(dep_id, dep_id) for dep_id in entry.get("deps") or []]
+            new_tasks[task_id] = {
+                "task_id": task_id,
+                "status": "pending",
+                "created_at": datetime.now().isoformat(),
+                "from_agent": entry["from_agent"],
+                "to_agent": entry["to_agent"],
+                "description": entry["task"],
+                "priority": entry.get("priority", "normal"),
+                "deadline": entry.get("deadline"),
+                "dependencies": list(dict.fromkeys(deps)),
+                "dependents": [],
+                "unmet_dependencies": 0,
+                "started_at": None,
+                "completed_at": None,
+                "result": None,
+                "context": {}
+            }
+        
+        with self.storage.transaction():
+            existing = self._validate_dependencies(
+                {task_id: task["dependencies"] for task_id, task in new_tasks.items()}
+            )
+            touched = set()
+            for task_id, task in new_tasks.items():
+                for dep_id in task["dependencies"]:
+                    dep = new_tasks.get(dep_id) or existing[dep_id]
+                    # Completed (possibly archived) tasks never release again
+                    if dep["status"] != "completed":
+                        task["unmet_dependencies"] += 1
+                        dep.setdefault("dependents", []).append(task_id)
+                        touched.add(dep_id)
+            
+            for dep_id in touched - set(new_tasks):
+                self.storage.save(existing[dep_id])
+            # Write to pending
+            for task in new_tasks.values():
+                self.storage.save(task)
+            self.journal.append([transition("add", task, None) for task in new_tasks.values()])
+        
+        self._update_state()
+        return task_ids
+    
+    def add_follow_ups(self, task_id: str, tasks: List[Dict]) -> List[str]:
+        """add_many() at most once per parent task.
+        
+        The new IDs are recorded on the parent as "follow_ups" in the same
+        transaction, so a repeated call (e.g. an event consumer replaying
+        after a crash) returns the recorded IDs instead of adding again.
+        """
+        with self.storage.transaction():
+            parent = self.storage.load(task_id)
+            if parent and "follow_ups" in parent:
+                return parent["follow_ups"]
+            task_ids = self.add_many(tasks)
+            if parent:
+                parent = self.storage.load(task_id)  # add_many may have linked dependents
+                parent["follow_ups"] = task_ids
+                self.storage.save(parent, parent["status"])
+        return task_ids
+    
+    def list_tasks(self, status: Optional[str] = None, agent: Optional[str] = None) -> List[Task]:
+        """List tasks, optionally filtered by status and/or agent."""
+        # Sorted by priority and creation time
+        return self.storage.list_tasks(status=status, agent=agent)
+    
+    def status(self) -> QueueStatus:
+        """Get overall queue status (from the journal counters, no scan)."""
+        counts = self.journal.counters()["status"]
+        
+        return {
+            "pending": counts["pending"],
+            "in_progress": counts["in-progress"],
+            "completed": counts["completed"],
+            "cancelled": counts["cancelled"],
+            "total": sum(counts.values())
+        }
+    
+    def agent_status(self) -> Dict[str, Dict[str, int]]:
+        """Task counts per status for each agent tasks are assigned to."""
+        return self.journal.counters()["agents"]
+    
+    def agent_overview(self, agent: Optional[str] = None) -> Dict[str, AgentOverview]:
+        """Pending tasks and the next ready one for an agent, or every agent with work.
+        
+        One read of the pending tasks serves all agents; the next task is
+        picked by the scheduling policy from that same read. A single agent
+        sees the tasks addressed to it and the tasks it sent, as with
+        list_tasks() and next_task(); the all-agents view groups by assignee.
+        """
+        if agent:
+            queued: Dict[str, List[Task]] = {agent: self.storage.list_tasks(status="pending", agent=agent)}
+        else:
+            queued = {}
+            for task in self.storage.list_tasks(status="pending"):
+                queued.setdefault(task["to_agent"], []).append(task)
+        
+        return {
+            name: {
+                "queued": tasks,
+                "next": self.policy.choose(self.storage, name, [t for t in tasks if is_ready(t)])
+            }
+            for name, tasks in sorted(queued.items())
+        }
+    
+    def _begin(self, task: Dict, worker: Optional[str], ttl: Optional[float]):
+        """Move a pending task to in-progress, leased to worker when ttl is given."""
+        task["status"] = "in-progress"
+        task["started_at"] = datetime.now().isoformat()
+        task["deliveries"] = task.get("deliveries", 0) + 1
+        self.policy.on_start(self.storage, task)
+        if ttl is not None:
+            self._set_lease(task, worker or default_worker_id(), ttl)
+        self.storage.save(task, old_status="pending")
+        self.journal.append([transition("start", task, "pending")])
+    
+    def _set_lease(self, task: Dict, worker: str, ttl: float):
+        task["lease"] = {
+            "worker": worker,
+            "ttl": ttl,
+            "expires_at": (datetime.now() + timedelta(seconds=ttl)).isoformat()
+        }
+    
+    def start(self, task_id: str, worker: Optional[str] = None, ttl: Optional[float] = None) -> bool:
+        """Mark a task as in-progress.
+        
+        With a ttl the task is leased to worker (see claim); without one it
+        stays in progress until completed or cancelled.
+        """
+        with self.storage.transaction():
+            task = self.get(task_id)
+            if not task:
+                print(f"Error: Task {task_id} not found", file=sys.stderr)
+                return False
+            
+            if task["status"] != "pending":
+                print(f"Error: Task {task_id} is not pending (status: {task['status']})", file=sys.stderr)
+                return False
+            
+            # Check dependencies are complete
+            unmet = task.get("unmet_dependencies", 0)
+            if unmet:
+                print(f"Error: Task {task_id} has {unmet} dependencies not completed", file=sys.stderr)
+                return False
+            
+            # Move from pending to in-progress
+            self._begin(task, worker, ttl)
+        
+        self._update_state()
+        return True
+    
+    def claim(self, agent: Optional[str] = None, worker: Optional[str] = None,
+              ttl: float = DEFAULT_LEASE_TTL) -> Optional[Task]:
+        """Atomically take the next ready task addressed to an agent and lease it to worker.
+        
+        Unlike next_task, tasks the agent sent are never claimed. Expired leases are returned to pending first, so a task abandoned by a
+        crashed worker is redelivered. Returns the claimed task, or None.
+        """
+        with self.storage.transaction():
+            self.reap_expired()
+            task = self.policy.select(self.storage, agent, senders=False)
+            if not task:
+                return None
+            self._begin(task, worker, ttl)
+        
+        self._update_state()
+        return task
+    
+    def heartbeat(self, task_id: str, worker: str, ttl: Optional[float] = None) -> bool:
+        """Extend a worker's lease on a task by ttl (default: the lease's own ttl)."""
+        with self.storage.transaction():
+            task = self.get(task_id)
+            lease = task.get("lease") if task else None
+            if not task or task["status"] != "in-progress" or not lease or lease["worker"] != worker:
+                print(f"Error: {worker} does not hold a lease on {task_id}", file=sys.stderr)
+                return False
+            
+            self._set_lease(task, worker, lease["ttl"] if ttl is None else ttl)
+            self.storage.save(task)
+        return True
+    
+    def reap_expired(self) -> List[str]:
+        """Return tasks whose lease has expired to pending; returns their IDs."""
+        now = datetime.now().isoformat()
+        reaped = []
+        with self.storage.transaction():
+            for task in self.storage.list_tasks(status="in-progress"):
+                lease = task.get("lease")
+                if not lease or lease["expires_at"] > now:
+                    continue
+                task["status"] = "pending"
+                task["started_at"] = None
+                del task["lease"]
+                self.storage.save(task, old_status="in-progress")
+                reaped.append(transition("requeue", task, "in-progress"))
+            if reaped:
+                self.journal.append(reaped)
+        
+        if reaped:
+            self._update_state()
+        return [event["task_id"] for event in reaped]
+    
+    def complete(self, task_id: str, result: Optional[str] = None,
+                 worker: Optional[str] = None) -> bool:
+        """Mark a task as completed.
+        
+        When worker is given, the task must still be leased to it; a worker
+        whose lease expired and was redelivered cannot complete the task.
+        """
+        with self.storage.transaction():
+            task = self.get(task_id)
+            if not task:
+                print(f"Error: Task {task_id} not found", file=sys.stderr)
+                return False
+            
+            if task["status"] != "in-progress":
+                print(f"Error: Task {task_id} is not in-progress (status: {task['status']})", file=sys.stderr)
+                return False
+            
+            lease = task.get("lease")
+            if worker and (not lease or lease["worker"] != worker):
+                holder = lease["worker"] if lease else "no one"
+                print(f"Error: Task {task_id} is leased to {holder}, not {worker}", file=sys.stderr)
+                return False
+            
+            # Move from in-progress to completed
+            task["status"] = "completed"
+            task["completed_at"] = datetime.now().isoformat()
+            task.pop("lease", None)
+            if result:
+                task["result"] = result
+            
+            self.storage.save(task, old_status="in-progress")
+            self._release_dependents(task)
+            self.journal.append([transition("complete", task, "in-progress")])
+        self._update_state()
+        return True
+    
+    def cancel(self, task_id: str) -> bool:
+        """Cancel a pending or in-progress task; its record moves to cancelled."""
+        with self.storage.transaction():
+            task = self.storage.load(task_id)
+            if not task:
+                print(f"Error: Task {task_id} not found", file=sys.stderr)
+                return False
+            
+            status = task["status"]
+            if status in ("completed", "cancelled"):
+                print(f"Error: Cannot cancel {status} task {task_id}", file=sys.stderr)
+                return False
+            
+            for dep_id in set(task.get("dependencies", [])):
+                dep = self.storage.load(dep_id)
+                if dep and task_id in dep.get("dependents", []):
+                    dep["dependents"].remove(task_id)
+                    self.storage.save(dep)
+            
+            task["status"] = "cancelled"
+            task["cancelled_at"] = datetime.now().isoformat()
+            task.pop("lease", None)
+            self.storage.save(task, old_status=status)
+            self.journal.append([transition("cancel", task, status)])
+        
+        self._update_state()
+        return True
+    
+    def _release_dependents(self, task: Dict):
+        """Count a completed task off each pending dependent (O(out-degree))."""
+        for dependent_id in task.get("dependents", []):
+            dependent = self.get(dependent_id)
+            if not dependent or dependent["status"] != "pending":
+                continue
+            dependent["unmet_dependencies"] = max(0, dependent.get("unmet_dependencies", 0) - 1)
+            self.storage.save(dependent)
+    
+    def next_task(self, agent: Optional[str] = None) -> Optional[Task]:
+        """Get the next ready task addressed to or sent by an agent, as chosen by the scheduling policy."""
+        return self.policy.select(self.storage, agent)
+    
+    def wait_for_task(self, agent: Optional[str] = None, timeout: Optional[float] = None,
+                      claim: bool = False, worker: Optional[str] = None,
+                      ttl: float = DEFAULT_LEASE_TTL) -> Optional[Task]:
+        """Block until a ready task exists for an agent; None after timeout seconds.
+        
+        With claim=True the task is claimed atomically (see claim), so several
+        waiting workers never receive the same task, and only tasks addressed
+        to the agent count.
+        """
+        from queue_watch import QueueWatcher  # ctypes/inotify, only needed by waiters
+        
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with QueueWatcher(self.storage) as watcher:
+            while True:
+                task = self.claim(agent, worker, ttl) if claim else self.next_task(agent)
+                if task:
+                    return task
+                
+                wait = WAIT_RECHECK_INTERVAL
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return None
+                    wait = min(wait, remaining)
+                watcher.wait(wait)
+    
+    def _update_state(self):
+        """Update federation state file with current counts."""
+        if not self.state_file.exists():
+            return
+        
+        try:
+            with open(self.state_file) as f:
+                state = json.load(f)
+            
+            status = self.status()
+            state["queue"]["pending_count"] = status["pending"]
+            state["queue"]["in_progress_count"] = status["in_progress"]
+            state["queue"]["completed_count"] = status["completed"]
+            state["queue"]["last_updated"] = datetime.now().isoformat()
+            
+            # Replace atomically: concurrent workers read this file while others update it
+            import tempfile
+            fd, temp_file = tempfile.mkstemp(dir=self.state_file.parent, suffix=".tmp")
+            with os.fdopen(fd, 'w') as f:
+                json.dump(state, f, indent=2)
+            os.replace(temp_file, self.state_file)
+        except Exception as e:
+            print(f"Warning: Could not update state: {e}", file=sys.stderr)
+    
+    def wait_report(self, group_by: str = "from_agent") -> WaitReport:
+        """Queue-wait percentiles, in seconds from creation to start, for started tasks.
+        
+        Covers in-progress and completed tasks still in storage (not the archive).
+        """
+        overall, groups = [], {}
+        for status in ("in-progress", "completed"):
+            for task in self.storage.list_tasks(status=status):
+                if not task.get("started_at"):
+                    continue
+                wait = (datetime.fromisoformat(task["started_at"]) -
+                        datetime.fromisoformat(task["created_at"])).total_seconds()
+                overall.append(wait)
+                groups.setdefault(str(task.get(group_by) or "unknown"), []).append(wait)
+        
+        return {
+            "policy": self.policy.name,
+            "group_by": group_by,
+            "overall": wait_summary(overall),
+            "groups": {name: wait_summary(waits) for name, waits in sorted(groups.items())}
+        }
+    
+    def compact(self, older_than_days: float = ARCHIVE_AFTER_DAYS, codec: str = DEFAULT_CODEC,
+                dry_run: bool = False) -> CompactReport:
+        """Move completed and cancelled tasks older than the cutoff into the archive.
+        
+        Archived tasks still resolve by ID through get() and count as
+        completed in status(). Loose task files already in queue/archived/ are
+        folded into the compressed segments on the same run. Returns
+        {"archived", "imported", "bytes_before", "bytes_after"}.
+        """
+        cutoff = (datetime.now() - timedelta(days=older_than_days)).isoformat()
+        with self.storage.transaction():
+            finished = [
+                task for status in ("completed", "cancelled")
+                for task in self.storage.list_tasks(status=status)
+                if (task.get("completed_at") or task.get("cancelled_at") or task["created_at"]) < cutoff
+                and archive_day(task["task_id"])
+            ]
+            report = {
+                "archived": len(finished),
+                "imported": self.archive.stats()["loose"] if dry_run else self.archive.import_loose(codec),
+                "bytes_before": sum(len(json.dumps(task)) for task in finished),
+                "bytes_after": 0
+            }
+            if dry_run or not finished:
+                return report
+            
+            archived_at = datetime.now().isoformat()
+            for task in finished:
+                task["archived_at"] = archived_at
+            report["bytes_after"] = self.archive.add(finished, codec)
+            for task in finished:
+                self.storage.delete(task["task_id"], task["status"])
+            self.journal.append([transition("archive", task, task["status"]) for task in finished])
+        return report
+    
+    def migrate_storage(self, backend: str) -> int:
+        """Move all tasks into another backend and make it the configured one."""
+        if backend == self.storage.name:
+            raise ValueError(f"Queue already uses the {backend} backend")
+        
+        dest = open_storage(backend, self.queue_dir)
+        copied = migrate(self.storage, dest)
+        dest.set_meta("graph_version", self.storage.get_meta("graph_version"))
+        self.storage.close()
+        self.storage = dest
+        
+        if self.state_file.exists():
+            with open(self.state_file) as f:
+                state = json.load(f)
+            state.setdefault("queue", {})["storage"] = backend
+            with open(self.state_file, 'w') as f:
+                json.dump(state, f, indent=2)
+        
+        return copied
@@ -3,14 +3,51 @@
 Federation Sync — File-Based Session Persistence
 
 Implements the Day 2 design: ~/.federation/sessions/active-session.json
-with optimistic concurrency and per-agent status tracking.
+with per-agent status tracking.
+
+Updates are field-level patches ({"agents.kimi.status": "active", ...})
+applied under a short exclusive lock on sessions/.session.lock, so agents
+touching different fields never conflict and the last writer wins per field.
+write_session() keeps the original whole-document optimistic check for
+callers that still use it. Contention is counted in session["sync"]:
+
+    patches       patch writes applied
+    lock_waits    patch writes that found the lock held and had to wait
+    lock_wait_ms  total time spent waiting for the lock
+    conflicts     write_session() calls rejected by the optimistic check
+
+A rejected write_session() or a patch that changes nothing (update_task_status
+on a missing task) leaves the session file untouched. Rejections are appended
+to sessions/.conflicts instead and folded into the counter by the next write.
+
+Agent heartbeats (update_agent_status) skip the JSON entirely: they go to the
+memory-mapped slot table in sessions/heartbeats.bin (see heartbeat_table.py).
+Every session write folds the table into session["agents"], and a heartbeat
+triggers that fold itself once HEARTBEAT_REFRESH_SECONDS have passed since the
+last one, so the JSON stays at most that far behind for outside readers.
+get_status() reads the table directly. The table stores only the statuses in
+heartbeat_table.STATUSES; any other status string is patched into the session
+JSON as before, and the agent's slot is cleared so the JSON entry stands until
+its next heartbeat with a known status.
+
+session["tasks"] maps task ID to task. Completed tasks are compacted out of
+the active session into the history store (session_history.py) once they are
+older than COMPACT_AFTER_HOURS, or down to half of COMPACT_KEEP_COMPLETED once
+more than that many have piled up, so the file every write rewrites stays
+small however long the sprint runs. archive_session() moves the whole session
+there as well.
 """
 
+import fcntl
 import json
 import time
 import os
+from contextlib import contextmanager
 from pathlib import Path
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
+
+from heartbeat_table import STATUS_CODES, open_table, overlay
+from session_history import SessionHistory
 
 # Paths
 FEDERATION_DIR = Path.home() / ".federation"
@@ -19,6 +56,15 @@ HISTORY_DIR = FEDERATION_DIR / "history"
 AGENTS_DIR = FEDERATION_DIR / "agents"
 
 ACTIVE_SESSION_PATH = SESSIONS_DIR / "active-session.json"
+LOCK_PATH = SESSIONS_DIR / ".session.lock"
+HEARTBEAT_PATH = SESSIONS_DIR / "heartbeats.bin"
+CONFLICTS_PATH = SESSIONS_DIR / ".conflicts"   # One byte per conflict not yet in session["sync"]
+
+HEARTBEAT_REFRESH_SECONDS = 30
+COMPACT_AFTER_HOURS = 24
+COMPACT_KEEP_COMPLETED = 50
+
+SYNC_COUNTERS = ("patches", "lock_waits", "lock_wait_ms", "conflicts")
 
 
 def ensure_dirs():
@@ -43,33 +89,179 @@ def read_session() -> dict | None:
         return None
 
 
+@contextmanager
+def session_lock():
+    """Hold the exclusive session lock; yields seconds spent waiting for it (0.0 if free)."""
+    ensure_dirs()
+    with open(LOCK_PATH, "a") as lock:
+        waited = 0.0
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            started = time.perf_counter()
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            waited = time.perf_counter() - started
+        try:
+            yield waited
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _write_file(session: dict):
+    """Atomic write (temp file + rename); caller holds the session lock."""
+    temp_path = ACTIVE_SESSION_PATH.with_name(f".{ACTIVE_SESSION_PATH.name}.{os.getpid()}.tmp")
+    temp_path.write_text(json.dumps(session, indent=2))
+    os.replace(temp_path, ACTIVE_SESSION_PATH)
+
+
+def _sync_stats(session: dict) -> dict:
+    stats = session.setdefault("sync", {})
+    for counter in SYNC_COUNTERS:
+        stats.setdefault(counter, 0)
+    return stats
+
+
+def _pending_conflicts() -> int:
+    """Conflicts recorded since the session file was last written."""
+    try:
+        return CONFLICTS_PATH.stat().st_size
+    except OSError:
+        return 0
+
+
+def _write_counted(session: dict):
+    """Fold pending conflicts into session["sync"] and write it; caller holds the session lock."""
+    pending = _pending_conflicts()
+    _sync_stats(session)["conflicts"] += pending
+    _write_file(session)
+    if pending:
+        CONFLICTS_PATH.unlink(missing_ok=True)
+
+
 def write_session(session: dict) -> bool:
     """
     Write session with optimistic concurrency (atomic rename).
     Returns True on success, False if file was modified concurrently.
     """
-    ensure_dirs()
-    
-    # Read current to check for conflicts
-    current = read_session()
-    
-    # Optimistic check: if session exists and has different updated_at, conflict
-    if current and session.get("updated_at") != current.get("updated_at"):
-        return False
-    
-    # Update timestamp
-    session["updated_at"] = utc_now()
-    
-    # Atomic write
-    temp_path = ACTIVE_SESSION_PATH.with_suffix(".tmp")
-    temp_path.write_text(json.dumps(session, indent=2))
-    temp_path.rename(ACTIVE_SESSION_PATH)
+    with session_lock():
+        # Read current to check for conflicts
+        current = read_session()
+        
+        # Optimistic check: if session exists and has different updated_at, conflict
+        if current and session.get("updated_at") != current.get("updated_at"):
+            # Count it without rewriting the session; the next write folds it in
+            with open(CONFLICTS_PATH, "ab") as f:
+                f.write(b"c")
+            return False
+        
+        # Update timestamp
+        session["updated_at"] = utc_now()
+        _write_counted(session)
     
     return True
 
 
-def create_session(sprint: str, owner: str = "kimi") -> dict:
-    """Create a new active session."""
+def set_field(session: dict, path: str, value):
+    """Set a dotted path ("agents.kimi.status"), creating intermediate dicts."""
+    *parents, leaf = path.split(".")
+    node = session
+    for key in parents:
+        node = node.setdefault(key, {})
+    node[leaf] = value
+
+
+def update_session(change, sprint: str = "auto-created") -> dict:
+    """
+    Apply change(session) to the current session under the session lock.
+    A session is created first if none exists. Returns the written session,
+    or change's result if it returned one; a change that returns False has
+    made no changes and nothing is written.
+    """
+    with session_lock() as waited:
+        session = _keyed_tasks(read_session() or new_session(sprint))
+        folded_at = time.time()
+        session["agents"] = overlay(session["agents"], HEARTBEAT_PATH)
+        result = change(session)
+        if result is False:
+            return False
+        _compact(session)
+        stats = _sync_stats(session)
+        stats["patches"] += 1
+        if waited:
+            stats["lock_waits"] += 1
+            stats["lock_wait_ms"] = round(stats["lock_wait_ms"] + waited * 1000, 3)
+        session["updated_at"] = utc_now()
+        _write_counted(session)
+        if HEARTBEAT_PATH.exists():
+            open_table(HEARTBEAT_PATH).mark_folded(folded_at)
+    return session if result is None else result
+
+
+def refresh_session() -> dict:
+    """Fold the heartbeat table into the session JSON now."""
+    return update_session(lambda session: None)
+
+
+def session_tasks(session: dict) -> list:
+    """Tasks of a session in creation order, whether stored keyed by ID or as a list."""
+    tasks = session.get("tasks", {})
+    return list(tasks.values()) if isinstance(tasks, dict) else tasks
+
+
+def _keyed_tasks(session: dict) -> dict:
+    """Convert a session written with a task list to tasks keyed by ID."""
+    if isinstance(session["tasks"], list):
+        tasks = session["tasks"]
+        session["tasks"] = {task["id"]: task for task in tasks}
+        session.setdefault("next_task", len(tasks) + 1)
+        session.setdefault("compacted_tasks", 0)
+    return session
+
+
+def _compact(session: dict):
+    """Move old or surplus completed tasks to the history store; caller holds the session lock."""
+    completed = sorted(
+        (task for task in session["tasks"].values() if task["status"] == "completed"),
+        key=lambda task: task.get("completed_at") or task.get("created_at", "")
+    )
+    if not completed:
+        return
+    cutoff = (datetime.now(timezone.utc) - timedelta(hours=COMPACT_AFTER_HOURS)).isoformat()
+    # Past the count limit, compact down to half of it so the history store is
+    # opened once per batch rather than on every completion
+    surplus = len(completed) - COMPACT_KEEP_COMPLETED // 2 if len(completed) > COMPACT_KEEP_COMPLETED else 0
+    moved = [task for n, task in enumerate(completed)
+             if n < surplus or (task.get("completed_at") or task.get("created_at", "")) < cutoff]
+    if not moved:
+        return
+    history = SessionHistory(HISTORY_DIR)
+    try:
+        history.add_tasks(session, moved)
+    finally:
+        history.close()
+    for task in moved:
+        del session["tasks"][task["id"]]
+    session["compacted_tasks"] = session.get("compacted_tasks", 0) + len(moved)
+
+
+def patch_session(changes: dict, sprint: str = "auto-created") -> dict:
+    """Apply field-level changes {dotted.path: value}; other fields are left as they are."""
+    def apply(session):
+        for path, value in changes.items():
+            set_field(session, path, value)
+    return update_session(apply, sprint)
+
+
+def sync_stats() -> dict:
+    """Contention counters of the active session, including conflicts not yet folded in."""
+    session = read_session()
+    stats = _sync_stats(session) if session else {counter: 0 for counter in SYNC_COUNTERS}
+    stats["conflicts"] += _pending_conflicts()
+    return stats
+
+
+def new_session(sprint: str, owner: str = "kimi") -> dict:
+    """Build (without writing) a new session."""
     session = {
         "session_id": f"sess-{datetime.now(timezone.utc).strftime('%Y%m%d-%H%M%S')}",
         "created_at": utc_now(),
@@ -78,7 +270,9 @@ def create_session(sprint: str, owner: str = "kimi") -> dict:
         "sprint": sprint,
         "status": "active",
         "agents": {},
-        "tasks": [],
+        "tasks": {},
+        "next_task": 1,
+        "compacted_tasks": 0,
         "router": {
             "version": "v3",
             "tier": 2,
@@ -94,117 +288,106 @@ def create_session(sprint: str, owner: str = "kimi") -> dict:
             "last_seen": utc_now()
         }
     
-    write_session(session)
+    return session
+
+
+def create_session(sprint: str, owner: str = "kimi") -> dict:
+    """Create a new active session, replacing any current one."""
+    session = new_session(sprint, owner)
+    with session_lock():
+        _write_file(session)
+        CONFLICTS_PATH.unlink(missing_ok=True)  # They belonged to the replaced session
     return session
 
 
 def update_agent_status(agent: str, status: str, task: str = None, max_retries: int = 3) -> bool:
     """
-    Update an agent's status in the shared session.
-    Retries on conflict with exponential backoff.
+    Record an agent heartbeat in the heartbeat table.
+    The session JSON (auto-created if missing) catches up lazily; max_retries
+    is kept for compatibility, since heartbeats never conflict.
     """
-    for attempt in range(max_retries):
-        session = read_session()
-        
-        if not session:
-            # Auto-create session if none exists
-            session = create_session(sprint="auto-created")
-        
-        # Update this agent's status
-        session["agents"][agent] = {
-            "status": status,
-            "current_task": task,
-            "last_seen": utc_now()
-        }
-        
-        if write_session(session):
-            return True
-        
-        # Conflict - wait and retry
-        time.sleep(0.1 * (2 ** attempt))
-    
-    return False
+    table = open_table(HEARTBEAT_PATH)
+    if status not in STATUS_CODES:
+        # The table has no code for it: keep the status as given in the session JSON
+        table.clear(agent)
+        patch_session({
+            f"agents.{agent}.status": status,
+            f"agents.{agent}.current_task": task,
+            f"agents.{agent}.last_seen": utc_now()
+        })
+        return True
+    table.beat(agent, status, task)
+    if time.time() - table.folded_at >= HEARTBEAT_REFRESH_SECONDS:
+        refresh_session()
+    return True
 
 
 def add_task(description: str, assigned_to: str, priority: str = "medium") -> str:
     """Add a task to the current session."""
-    session = read_session()
-    if not session:
-        session = create_session(sprint="auto-created")
-    
-    task_id = f"task-{len(session['tasks']) + 1:03d}"
-    task = {
-        "id": task_id,
-        "description": description,
-        "assigned_to": assigned_to,
-        "status": "pending",
-        "priority": priority,
-        "created_at": utc_now()
-    }
-    
-    session["tasks"].append(task)
-    
-    for attempt in range(3):
-        if write_session(session):
-            return task_id
-        session = read_session()
-        session["tasks"].append(task)
-        time.sleep(0.1)
+    def append(session):
+        task_id = f"task-{session['next_task']:03d}"
+        session["next_task"] += 1
+        session["tasks"][task_id] = {
+            "id": task_id,
+            "description": description,
+            "assigned_to": assigned_to,
+            "status": "pending",
+            "priority": priority,
+            "created_at": utc_now()
+        }
+        return task_id
     
-    return None
+    return update_session(append)
 
 
 def update_task_status(task_id: str, status: str, completed: bool = False) -> bool:
     """Update task status."""
-    session = read_session()
-    if not session:
+    if not read_session():
         return False
     
-    for task in session["tasks"]:
-        if task["id"] == task_id:
-            task["status"] = status
-            if completed:
-                task["completed_at"] = utc_now()
-            break
-    
-    for attempt in range(3):
-        if write_session(session):
-            return True
-        session = read_session()
-        time.sleep(0.1)
+    def apply(session):
+        task = session["tasks"].get(task_id)
+        if task is None:
+            return False
+        task["status"] = status
+        if completed:
+            task["completed_at"] = utc_now()
+        return True
     
-    return False
+    return update_session(apply)
 
 
 def update_router_stats(version: str, tier: int, accuracy: float = None):
     """Update router statistics in session."""
-    session = read_session()
-    if not session:
+    if not read_session():
         return False
     
-    session["router"] = {
-        "version": version,
-        "tier": tier,
-        "accuracy": accuracy,
-        "last_evaluated": utc_now()
-    }
-    
-    return write_session(session)
+    patch_session({
+        "router": {
+            "version": version,
+            "tier": tier,
+            "accuracy": accuracy,
+            "last_evaluated": utc_now()
+        }
+    })
+    return True
 
 
 def archive_session():
     """Archive current session to history and clear active."""
-    session = read_session()
-    if not session:
+    if not read_session():
         return False
     
+    session = refresh_session()
     session["status"] = "archived"
     session["archived_at"] = utc_now()
     
     # Save to history
-    timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H-%M-%SZ")
-    history_path = HISTORY_DIR / f"{timestamp}.json"
-    history_path.write_text(json.dumps(session, indent=2))
+    history = SessionHistory(HISTORY_DIR)
+    try:
+        history.add_session(session)
+    finally:
+        history.close()
     
     # Clear active
     ACTIVE_SESSION_PATH.unlink(missing_ok=True)
@@ -227,7 +410,7 @@ def get_status():
     print()
     
     print("Agents:")
-    for agent, info in session["agents"].items():
+    for agent, info in overlay(session["agents"], HEARTBEAT_PATH).items():
         status_icon = {
             "active": "🔥",
             "idle": "💤",
@@ -239,7 +422,7 @@ def get_status():
     
     print()
     print("Tasks:")
-    for task in session["tasks"]:
+    for task in session_tasks(session):
         status_icon = {
             "pending": "⏳",
             "in_progress": "🔄",
@@ -247,11 +430,17 @@ def get_status():
             "blocked": "🚫"
         }.get(task["status"], "❓")
         print(f"  {status_icon} [{task['priority']:6}] {task['description'][:50]}")
+    if session.get("compacted_tasks"):
+        print(f"  ({session['compacted_tasks']} completed tasks moved to history)")
     
     print()
     print(f"Router: {session['router']['version']} (Tier {session['router']['tier']})")
     if session['router'].get('accuracy'):
         print(f"Accuracy: {session['router']['accuracy']*100:.1f}%")
+    
+    stats = _sync_stats(session)
+    print(f"Sync: {stats['patches']} patches, {stats['lock_waits']} lock waits "
+          f"({stats['lock_wait_ms']:.1f} ms), {stats['conflicts'] + _pending_conflicts()} conflicts")
 
 
 # --- CLI ---
@@ -270,11 +459,26 @@ def main():
     parser.add_argument("--assign-to", type=str, help="Assign task to agent")
     parser.add_argument("--priority", type=str, default="medium", help="Task priority")
     parser.add_argument("--archive", action="store_true", help="Archive current session")
+    parser.add_argument("--stats", action="store_true", help="Print session contention counters as JSON")
+    parser.add_argument("--history", action="store_true",
+                       help="Print archived sessions and tasks as JSON (filter with --sprint/--since/--until)")
+    parser.add_argument("--sprint", type=str, help="Sprint to query (for --history)")
+    parser.add_argument("--since", type=str, help="Earliest date, YYYY-MM-DD[THH:MM] (for --history)")
+    parser.add_argument("--until", type=str, help="Latest date, inclusive (for --history)")
     
     args = parser.parse_args()
     
     if args.status:
         get_status()
+    elif args.stats:
+        print(json.dumps(sync_stats(), indent=2))
+    elif args.history:
+        history = SessionHistory(HISTORY_DIR)
+        print(json.dumps({
+            "sessions": history.sessions(args.sprint, args.since, args.until),
+            "tasks": history.tasks(args.sprint, args.since, args.until)
+        }, indent=2))
+        history.close()
     elif args.create:
         session = create_session(args.create)
         print(f"Created session: {session['session_id']}")
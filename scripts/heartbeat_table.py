@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Federation Heartbeat Table
+Fixed-slot, memory-mapped record of agent liveness.
+
+Heartbeats are the most frequent session write, so they do not go through
+active-session.json. Each agent owns one 128-byte slot in
+sessions/heartbeats.bin holding its status code, current task and the time
+of its last heartbeat. A heartbeat is a few struct writes into the shared
+mapping: no lock, no JSON.
+
+Layout (little-endian):
+
+    header  64 bytes   magic "FHB1", version, slot count, folded_at
+    slot   128 bytes   seq, status code, agent name (32), task (80), last_seen
+
+Writes are single-writer per slot (an agent heart-beats only its own slot)
+and use a sequence lock: seq is odd while the slot is being written, so a
+reader that sees an odd or changed seq reads again, backing off briefly
+between READ_ATTEMPTS tries. A slot still odd after that was left by a writer
+that died mid-write; it reads as stale (status unknown, never seen) until its
+agent's next heartbeat rewrites it and makes seq even again. Claiming a slot
+for a new agent, the only multi-writer step, takes a flock on the table file.
+
+A slot holds only a status code, so beat() rejects statuses outside STATUSES;
+federation_sync keeps those in the session JSON and clear()s the agent's slot.
+Task text longer than TASK_BYTES is truncated; folded_at records when the
+table was last copied into the session JSON (see federation_sync).
+"""
+
+import fcntl
+import mmap
+import os
+import struct
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Optional
+
+# ─────────────────────────────────────────────────────────────
+# Layout
+# ─────────────────────────────────────────────────────────────
+
+MAGIC = b"FHB1"
+VERSION = 1
+SLOTS = 64
+NAME_BYTES = 32
+TASK_BYTES = 80
+
+READ_ATTEMPTS = 8
+READ_BACKOFF_SECONDS = 0.00005   # Doubled after each torn read
+
+STATUSES = ("unknown", "idle", "active", "standby", "error")
+STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+
+_HEADER = struct.Struct("<4sHHd")
+_HEADER_SIZE = 64
+_FOLDED_AT = struct.Struct("<d")
+_FOLDED_OFFSET = 8
+_SEQ = struct.Struct("<I")
+_BODY = struct.Struct(f"<B3x{NAME_BYTES}s{TASK_BYTES}sd")
+_SLOT_SIZE = 128
+
+assert _HEADER.size <= _HEADER_SIZE and _SEQ.size + _BODY.size <= _SLOT_SIZE
+
+
+def _iso(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat()
+
+
+# ─────────────────────────────────────────────────────────────
+# Table
+# ─────────────────────────────────────────────────────────────
+
+class HeartbeatTable:
+    """Memory-mapped heartbeat slots shared by every process on the host."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        size = _HEADER_SIZE + SLOTS * _SLOT_SIZE
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            with self._locked(fd):
+                if os.fstat(fd).st_size < size:
+                    os.ftruncate(fd, size)
+                    os.pwrite(fd, _HEADER.pack(MAGIC, VERSION, SLOTS, 0.0), 0)
+            self._mm = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+        magic, version, _, _ = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{self.path} is not a version {VERSION} heartbeat table")
+        self._slots: Dict[str, int] = {}
+
+    @staticmethod
+    @contextmanager
+    def _locked(fd: int):
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+
+    def _offset(self, slot: int) -> int:
+        return _HEADER_SIZE + slot * _SLOT_SIZE
+
+    def _read_slot(self, slot: int) -> Optional[tuple]:
+        """Consistent (status code, name, task, last_seen) of a slot, or None if unused.
+
+        A slot that stays mid-write through READ_ATTEMPTS reads comes back
+        stale: its name with status unknown, no task and last_seen 0.
+        """
+        offset = self._offset(slot)
+        for attempt in range(READ_ATTEMPTS):
+            seq = _SEQ.unpack_from(self._mm, offset)[0]
+            if not seq & 1:
+                body = _BODY.unpack_from(self._mm, offset + _SEQ.size)
+                if _SEQ.unpack_from(self._mm, offset)[0] == seq:
+                    return body if body[1][:1] != b"\0" else None
+            time.sleep(READ_BACKOFF_SECONDS * (1 << attempt))
+        name = _BODY.unpack_from(self._mm, offset + _SEQ.size)[1]
+        return (STATUS_CODES["unknown"], name, b"", 0.0) if name[:1] != b"\0" else None
+
+    def slot(self, agent: str) -> int:
+        """Slot owned by agent, claiming a free one on first use."""
+        if agent in self._slots:
+            return self._slots[agent]
+        name = agent.encode()
+        if not name or len(name) > NAME_BYTES:
+            raise ValueError(f"Agent name must be 1-{NAME_BYTES} bytes: {agent!r}")
+
+        fd = os.open(self.path, os.O_RDWR)
+        try:
+            with self._locked(fd):
+                free = None
+                for slot in range(SLOTS):
+                    body = self._read_slot(slot)
+                    if body is None:
+                        free = slot if free is None else free
+                    elif body[1].rstrip(b"\0") == name:
+                        self._slots[agent] = slot
+                        return slot
+                if free is None:
+                    raise RuntimeError(f"Heartbeat table {self.path} is full ({SLOTS} agents)")
+                self._write(free, STATUS_CODES["unknown"], name, b"", 0.0)
+        finally:
+            os.close(fd)
+        self._slots[agent] = free
+        return free
+
+    def _write(self, slot: int, code: int, name: bytes, task: bytes, timestamp: float):
+        offset = self._offset(slot)
+        # An odd seq left by a writer that died mid-write is reused, so this write evens it out
+        seq = _SEQ.unpack_from(self._mm, offset)[0] | 1
+        _SEQ.pack_into(self._mm, offset, seq)
+        _BODY.pack_into(self._mm, offset + _SEQ.size, code, name, task, timestamp)
+        _SEQ.pack_into(self._mm, offset, (seq + 1) & 0xFFFFFFFF)
+
+    def beat(self, agent: str, status: str, task: Optional[str] = None,
+             timestamp: Optional[float] = None):
+        """Record a heartbeat for agent; only agent's own process should call this."""
+        if status not in STATUS_CODES:
+            raise ValueError(f"Unknown agent status: {status} (choose from {', '.join(STATUSES[1:])})")
+        encoded = (task or "").encode()[:TASK_BYTES]
+        self._write(self.slot(agent), STATUS_CODES[status], agent.encode(), encoded,
+                    time.time() if timestamp is None else timestamp)
+
+    def clear(self, agent: str):
+        """Forget agent's last heartbeat; read_all() skips it until the next beat()."""
+        self._write(self.slot(agent), STATUS_CODES["unknown"], agent.encode(), b"", 0.0)
+
+    def read_all(self) -> Dict[str, Dict]:
+        """{agent: {"status", "current_task", "last_seen"}} for every agent that has heart-beaten."""
+        agents = {}
+        for slot in range(SLOTS):
+            body = self._read_slot(slot)
+            if body is None or not body[3]:
+                continue
+            code, name, task, timestamp = body
+            task = task.rstrip(b"\0").decode(errors="ignore")
+            agents[name.rstrip(b"\0").decode()] = {
+                "status": STATUSES[code] if code < len(STATUSES) else "unknown",
+                "current_task": task or None,
+                "last_seen": _iso(timestamp)
+            }
+        return agents
+
+    @property
+    def folded_at(self) -> float:
+        return _FOLDED_AT.unpack_from(self._mm, _FOLDED_OFFSET)[0]
+
+    def mark_folded(self, timestamp: Optional[float] = None):
+        _FOLDED_AT.pack_into(self._mm, _FOLDED_OFFSET, time.time() if timestamp is None else timestamp)
+
+    def close(self):
+        self._mm.close()
+
+
+_tables: Dict[Path, HeartbeatTable] = {}
+
+
+def open_table(path: Path) -> HeartbeatTable:
+    """The process-wide table for path, mapped on first use."""
+    table = _tables.get(path)
+    if table is None:
+        table = _tables[Path(path)] = HeartbeatTable(path)
+    return table
+
+
+def overlay(agents: Dict[str, Dict], path: Path) -> Dict[str, Dict]:
+    """Session agent entries with the table at path applied; the table owns every agent it holds."""
+    merged = dict(agents)
+    if Path(path).exists():
+        merged.update(open_table(path).read_all())
+    return merged
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Federation Queue Archive
+Compressed daily segments for finished tasks, with an ID → offset index.
+
+Layout under queue/archived/:
+    YYYY-MM-DD.jsonl.gz     Compressed members appended by successive compaction
+                            runs; each member holds one JSON task per line
+    YYYY-MM-DD.idx.json     {"codec": ..., "tasks": {task_id: [offset, length, line]}}
+    task-*.json             Loose task files archived by hand or by older queue
+                            versions; still loadable by ID, and folded into the
+                            daily segments by import_loose() on the next compact
+
+Tasks are filed by the creation date encoded in their ID, so a lookup goes
+straight to one index and one member without scanning.
+"""
+
+import importlib
+import json
+import os
+import re
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+# ─────────────────────────────────────────────────────────────
+# Configuration
+# ─────────────────────────────────────────────────────────────
+
+ARCHIVE_DIR = "archived"
+DEFAULT_CODEC = "gzip"
+CODECS = {   # codec -> (file suffix, stdlib module with compress/decompress)
+    "gzip": (".gz", "gzip"),
+    "lzma": (".xz", "lzma"),
+}
+MEMBER_CACHE_SIZE = 8
+
+_TASK_DATE = re.compile(r"^task-(\d{4})(\d{2})(\d{2})-")
+
+
+def _codec(name: str):
+    """Codec module, imported on first use so queue startup does not pay for it."""
+    return importlib.import_module(CODECS[name][1])
+
+
+def archive_day(task_id: str) -> Optional[str]:
+    """YYYY-MM-DD segment a task ID is filed under, or None for non-standard IDs."""
+    match = _TASK_DATE.match(task_id)
+    return "-".join(match.groups()) if match else None
+
+
+# ─────────────────────────────────────────────────────────────
+# Archive
+# ─────────────────────────────────────────────────────────────
+
+class TaskArchive:
+    """Read and append compressed daily archive segments."""
+
+    def __init__(self, queue_dir: Path):
+        self.dir = Path(queue_dir) / ARCHIVE_DIR
+        self._indexes: Dict[str, tuple] = {}   # day -> (mtime_ns, index)
+        self._members: OrderedDict = OrderedDict()  # (day, offset) -> lines
+
+    def _index_path(self, day: str) -> Path:
+        return self.dir / f"{day}.idx.json"
+
+    def _segment_path(self, day: str, codec: str) -> Path:
+        return self.dir / f"{day}.jsonl{CODECS[codec][0]}"
+
+    def _loose_paths(self, day: Optional[str] = None) -> List[Path]:
+        return sorted(
+            path for path in self.dir.glob("task-*.json")
+            if archive_day(path.stem) and (day is None or archive_day(path.stem) == day)
+        )
+
+    def _read_index(self, day: str) -> Optional[Dict]:
+        path = self._index_path(day)
+        try:
+            mtime = path.stat().st_mtime_ns
+        except OSError:
+            return None
+        cached = self._indexes.get(day)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        with open(path) as f:
+            index = json.load(f)
+        self._indexes[day] = (mtime, index)
+        return index
+
+    def _read_member(self, day: str, codec: str, offset: int, length: int) -> List[str]:
+        key = (day, offset)
+        if key in self._members:
+            self._members.move_to_end(key)
+            return self._members[key]
+        with open(self._segment_path(day, codec), "rb") as f:
+            f.seek(offset)
+            lines = _codec(codec).decompress(f.read(length)).decode().splitlines()
+        self._members[key] = lines
+        if len(self._members) > MEMBER_CACHE_SIZE:
+            self._members.popitem(last=False)
+        return lines
+
+    def load(self, task_id: str) -> Optional[Dict]:
+        """Load an archived task by ID."""
+        day = archive_day(task_id)
+        index = self._read_index(day) if day else None
+        if not index or task_id not in index["tasks"]:
+            return self._load_loose(task_id) if day else None
+        offset, length, line = index["tasks"][task_id]
+        return json.loads(self._read_member(day, index["codec"], offset, length)[line])
+
+    def _load_loose(self, task_id: str) -> Optional[Dict]:
+        try:
+            with open(self.dir / f"{task_id}.json") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def add(self, tasks: List[Dict], codec: str = DEFAULT_CODEC) -> int:
+        """Append tasks to their daily segments; returns compressed bytes written.
+
+        A day keeps the codec it was created with. Each segment's member is
+        synced before its index is replaced, so the index never points at
+        missing data; callers delete the hot copies only after this returns.
+        """
+        if codec not in CODECS:
+            raise ValueError(f"Unknown archive codec: {codec} (choose from {', '.join(CODECS)})")
+        self.dir.mkdir(parents=True, exist_ok=True)
+
+        by_day: Dict[str, List[Dict]] = {}
+        for task in tasks:
+            day = archive_day(task["task_id"])
+            if day is None:
+                raise ValueError(f"Cannot archive task with non-standard ID: {task['task_id']}")
+            by_day.setdefault(day, []).append(task)
+
+        written = 0
+        for day, day_tasks in sorted(by_day.items()):
+            index = self._read_index(day) or {"codec": codec, "tasks": {}}
+            blob = _codec(index["codec"]).compress(
+                "".join(json.dumps(task) + "\n" for task in day_tasks).encode()
+            )
+            segment = self._segment_path(day, index["codec"])
+            with open(segment, "ab") as f:
+                offset = f.tell()
+                f.write(blob)
+                f.flush()
+                os.fsync(f.fileno())
+            for line, task in enumerate(day_tasks):
+                index["tasks"][task["task_id"]] = [offset, len(blob), line]
+
+            temp_file = self._index_path(day).with_suffix(".tmp")
+            with open(temp_file, "w") as f:
+                json.dump(index, f)
+            os.replace(temp_file, self._index_path(day))
+            written += len(blob)
+        return written
+
+    def import_loose(self, codec: str = DEFAULT_CODEC) -> int:
+        """Fold loose task files into the daily segments; returns tasks imported.
+
+        Each file is deleted only after its segment and index are written.
+        Unreadable files are left in place.
+        """
+        imported = []
+        for path in self._loose_paths():
+            try:
+                with open(path) as f:
+                    task = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                continue
+            task.setdefault("task_id", path.stem)
+            if task["task_id"] == path.stem:
+                imported.append((path, task))
+        if imported:
+            self.add([task for _, task in imported], codec)
+            for path, _ in imported:
+                path.unlink()
+        return len(imported)
+
+    def days(self) -> List[str]:
+        return sorted(path.name[:10] for path in self.dir.glob("*.idx.json"))
+
+    def task_ids(self, day: Optional[str] = None) -> Iterator[str]:
+        """IDs of every archived task, optionally for one day (reads only the indexes)."""
+        for d in [day] if day else self.days():
+            index = self._read_index(d)
+            if index:
+                yield from index["tasks"]
+        for path in self._loose_paths(day):
+            index = self._read_index(archive_day(path.stem))
+            if not index or path.stem not in index["tasks"]:
+                yield path.stem
+
+    def iter_tasks(self, day: Optional[str] = None) -> Iterator[Dict]:
+        """Every archived task (latest copy of each), optionally for one day."""
+        for task_id in self.task_ids(day):
+            task = self.load(task_id)
+            if task:
+                yield task
+
+    def stats(self) -> Dict:
+        """Archived task count and on-disk size."""
+        days = self.days()
+        tasks = sum(len(self._read_index(day)["tasks"]) for day in days)
+        size = sum(path.stat().st_size for path in self.dir.glob("*.jsonl.*")) if days else 0
+        loose = self._loose_paths()
+        return {"days": len(days), "tasks": tasks + len(loose), "loose": len(loose),
+                "bytes": size + sum(path.stat().st_size for path in loose)}
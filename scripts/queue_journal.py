@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Federation Queue Event Journal
+Append-only record of queue transitions with live counters.
+
+Every add/start/complete/cancel/requeue/archive is appended as one JSON line to
+segment files under queue/journal/. Each event carries a global sequence
+number (its offset), so consumers can replay from any point. Counters per
+status and per agent are kept in counters.json, which also records how far
+into the active segment they reach; reading them is O(1).
+
+Appends must be made while holding the queue storage lock (inside
+QueueStorage.transaction()), which serializes writers across processes.
+
+fsync policy (FED_QUEUE_JOURNAL_FSYNC):
+    always    fsync after every append
+    interval  fsync at most once per second (default)
+    never     leave flushing to the OS
+"""
+
+import json
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from queue_storage import STATUSES
+
+# ─────────────────────────────────────────────────────────────
+# Configuration
+# ─────────────────────────────────────────────────────────────
+
+JOURNAL_DIR = "journal"
+COUNTERS_FILE = "counters.json"
+FSYNC_ENV = "FED_QUEUE_JOURNAL_FSYNC"
+FSYNC_POLICIES = ("always", "interval", "never")
+DEFAULT_FSYNC = "interval"
+FSYNC_INTERVAL = 1.0
+SEGMENT_EVENTS = 10000
+
+_SEQ_PREFIX = '{"seq": '
+
+
+def empty_counts() -> Dict[str, int]:
+    return {status: 0 for status in STATUSES}
+
+
+def transition(event: str, task: Dict, old_status: Optional[str]) -> Dict:
+    """Build a journal event for a task moving from old_status to its current status."""
+    return {
+        "event": event,
+        "task_id": task["task_id"],
+        "agent": task.get("to_agent"),
+        "from_agent": task.get("from_agent"),
+        "old_status": old_status,
+        "new_status": task["status"]
+    }
+
+
+# ─────────────────────────────────────────────────────────────
+# Journal
+# ─────────────────────────────────────────────────────────────
+
+class QueueJournal:
+    """Segmented JSONL journal of queue transitions with O(1) counters."""
+
+    def __init__(self, queue_dir: Path, fsync: Optional[str] = None,
+                 segment_events: int = SEGMENT_EVENTS):
+        self.dir = Path(queue_dir) / JOURNAL_DIR
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.counters_file = self.dir / COUNTERS_FILE
+        self.fsync = fsync or os.environ.get(FSYNC_ENV, DEFAULT_FSYNC)
+        if self.fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown journal fsync policy: {self.fsync} "
+                             f"(choose from {', '.join(FSYNC_POLICIES)})")
+        self.segment_events = segment_events
+        self._last_fsync = 0.0
+
+    def _segment_path(self, first_seq: int) -> Path:
+        return self.dir / f"segment-{first_seq:012d}.jsonl"
+
+    def _segments(self) -> List[Path]:
+        return sorted(self.dir.glob("segment-*.jsonl"))
+
+    @staticmethod
+    def _empty_state() -> Dict:
+        return {
+            "seq": 0,
+            "segment": None,      # First seq of the active segment
+            "segment_events": 0,
+            "offset": 0,          # Bytes of the active segment covered by the counters
+            "status": empty_counts(),
+            "agents": {}
+        }
+
+    # ── Counters ───────────────────────────────────────────────
+
+    @staticmethod
+    def _apply(state: Dict, event: Dict) -> None:
+        """Fold one event into the counters."""
+        state["seq"] = event["seq"]
+        if event["event"] == "snapshot":
+            state["status"] = dict(event["status"])
+            state["agents"] = {agent: dict(counts) for agent, counts in event["agents"].items()}
+            return
+
+        agent = state["agents"].setdefault(event.get("agent") or "unknown", empty_counts())
+        if event.get("old_status"):
+            state["status"][event["old_status"]] -= 1
+            agent[event["old_status"]] -= 1
+        state["status"][event["new_status"]] += 1
+        agent[event["new_status"]] += 1
+
+    def _load_state(self) -> Dict:
+        """Counters snapshot plus any events appended after it was written."""
+        try:
+            with open(self.counters_file) as f:
+                state = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return self._replay_state()
+
+        # A crash between appending and writing counters leaves a tail to apply,
+        # possibly running into a segment that was started after the snapshot
+        segment = self._segment_path(state["segment"]) if state["segment"] else None
+        while segment and segment.exists():
+            if segment.stat().st_size > state["offset"]:
+                with open(segment, "rb") as f:
+                    f.seek(state["offset"])
+                    for line in f:
+                        if not line.endswith(b"\n"):
+                            break  # Torn final line from an interrupted append
+                        self._apply(state, json.loads(line))
+                        state["segment_events"] += 1
+                        state["offset"] += len(line)
+            segment = self._segment_path(state["seq"] + 1)
+            if segment.exists():
+                state.update(segment=state["seq"] + 1, segment_events=0, offset=0)
+        return state
+
+    def _replay_state(self) -> Dict:
+        state = self._empty_state()
+        for event in self.replay():
+            self._apply(state, event)
+        segments = self._segments()
+        if segments:
+            active = segments[-1]
+            state["segment"] = int(active.stem.split("-")[1])
+            state["offset"] = active.stat().st_size
+            state["segment_events"] = state["seq"] - state["segment"] + 1
+        return state
+
+    def _write_state(self, state: Dict) -> None:
+        temp_file = self.counters_file.with_suffix(".tmp")
+        with open(temp_file, "w") as f:
+            json.dump(state, f, indent=2)
+        os.replace(temp_file, self.counters_file)
+
+    def counters(self) -> Dict:
+        """Current counts: {"seq", "status": {status: n}, "agents": {agent: {status: n}}}."""
+        state = self._load_state()
+        return {"seq": state["seq"], "status": state["status"], "agents": state["agents"]}
+
+    def exists(self) -> bool:
+        return self.counters_file.exists() or bool(self._segments())
+    
+    # Change source for QueueWatcher: counters.json is replaced on every append
+    
+    def watch_path(self) -> Path:
+        return self.dir
+    
+    def change_token(self) -> int:
+        try:
+            return self.counters_file.stat().st_mtime_ns
+        except OSError:
+            return 0
+
+    # ── Writing ────────────────────────────────────────────────
+
+    def append(self, events: List[Dict]) -> int:
+        """Append events, assigning sequence numbers; returns the last seq."""
+        if not events:
+            return self._load_state()["seq"]
+
+        state = self._load_state()
+        now = datetime.now().isoformat()
+        lines = []
+        for event in events:
+            if state["segment"] is None or state["segment_events"] >= self.segment_events:
+                if lines:
+                    self._write_lines(state, lines)
+                    lines = []
+                state["segment"] = state["seq"] + 1
+                state["segment_events"] = 0
+                state["offset"] = 0
+            event = {"seq": state["seq"] + 1, "ts": now, **event}
+            line = (json.dumps(event) + "\n").encode()
+            lines.append(line)
+            self._apply(state, event)
+            state["segment_events"] += 1
+            state["offset"] += len(line)
+        self._write_lines(state, lines)
+        self._write_state(state)
+        return state["seq"]
+
+    def _write_lines(self, state: Dict, lines: List[bytes]) -> None:
+        with open(self._segment_path(state["segment"]), "ab") as f:
+            f.write(b"".join(lines))
+            f.flush()
+            if self.fsync == "always" or (
+                self.fsync == "interval" and time.monotonic() - self._last_fsync >= FSYNC_INTERVAL
+            ):
+                os.fsync(f.fileno())
+                self._last_fsync = time.monotonic()
+
+    def snapshot(self, status: Dict[str, int], agents: Dict[str, Dict[str, int]]) -> int:
+        """Record absolute counts, e.g. when starting a journal on an existing queue."""
+        return self.append([{"event": "snapshot", "status": status, "agents": agents}])
+
+    # ── Reading ────────────────────────────────────────────────
+
+    def replay(self, since: int = 0) -> Iterator[Dict]:
+        """Yield events with seq > since, in order."""
+        segments = self._segments()
+        firsts = [int(path.stem.split("-")[1]) for path in segments]
+        for i, path in enumerate(segments):
+            # Skip segments that end before the requested offset
+            if i + 1 < len(firsts) and firsts[i + 1] <= since + 1:
+                continue
+            with open(path) as f:
+                for line in f:
+                    if not line.endswith("\n"):
+                        break
+                    # Events are written seq-first; skip old ones without parsing
+                    if line.startswith(_SEQ_PREFIX):
+                        end = line.find(",", len(_SEQ_PREFIX))
+                        if end > 0 and int(line[len(_SEQ_PREFIX):end]) <= since:
+                            continue
+                    event = json.loads(line)
+                    if event["seq"] > since:
+                        yield event
+
+    def rebuild(self) -> Dict:
+        """Recompute counters from the full journal and persist them."""
+        state = self._replay_state()
+        self._write_state(state)
+        return self.counters()
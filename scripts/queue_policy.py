@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Federation Queue Scheduling Policies
+Decide which ready task an agent receives next.
+
+Policies:
+    priority  Highest priority, then oldest (the original order, default).
+              Served straight from the storage index.
+    aging     Priority aging: a task gains one priority level for every
+              aging_minutes it has waited. Equal levels go to the earliest
+              deadline, then the oldest task.
+    fair      Weighted fair queuing across producers (from_agent): each
+              producer is served in proportion to its weight, so one flooding
+              producer cannot starve the rest. Within a producer, tasks are
+              ordered as in "aging".
+
+Selection: FED_QUEUE_POLICY=<name>, or the "scheduler" entry in the "queue"
+section of federation-state.json:
+
+    "scheduler": {"policy": "fair", "weights": {"claude": 2}, "aging_minutes": 60}
+
+The non-default policies rank every ready task for the agent, O(ready).
+"""
+
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from queue_storage import QueueStorage, priority_rank, task_sort_key
+
+# ─────────────────────────────────────────────────────────────
+# Configuration
+# ─────────────────────────────────────────────────────────────
+
+POLICY_ENV = "FED_QUEUE_POLICY"
+DEFAULT_POLICY = "priority"
+DEFAULT_AGING_MINUTES = 60
+NO_DEADLINE = "9999-12-31T23:59:59"
+
+
+def configured_scheduler(state_file: Path) -> Dict:
+    """Scheduler settings from the state file, with the policy env override applied."""
+    try:
+        with open(state_file) as f:
+            config = dict(json.load(f).get("queue", {}).get("scheduler", {}))
+    except (OSError, json.JSONDecodeError):
+        config = {}
+    if os.environ.get(POLICY_ENV):
+        config["policy"] = os.environ[POLICY_ENV]
+    return config
+
+
+# ─────────────────────────────────────────────────────────────
+# Policies
+# ─────────────────────────────────────────────────────────────
+
+class SchedulingPolicy:
+    """Static priority order; the storage index already provides it."""
+
+    name = "priority"
+
+    def __init__(self, weights: Optional[Dict[str, float]] = None,
+                 aging_minutes: float = DEFAULT_AGING_MINUTES):
+        self.weights = weights or {}
+        self.aging_seconds = aging_minutes * 60
+
+    def select(self, storage: QueueStorage, agent: Optional[str],
+               senders: bool = True) -> Optional[Dict]:
+        """The task agent should receive next, without changing any state.
+
+        With senders, tasks agent sent count as its own (the read-only views);
+        claiming passes senders=False so only work addressed to agent is handed out.
+        """
+        return storage.next_ready(agent, senders)
+
+    def choose(self, storage: QueueStorage, agent: Optional[str], ready: List[Dict]) -> Optional[Dict]:
+        """As select(), but among ready tasks the caller has already read."""
+        return min(ready, key=task_sort_key, default=None)
+
+    def on_start(self, storage: QueueStorage, task: Dict) -> None:
+        """Account for a task being handed out (called inside the transaction)."""
+
+
+class AgingPolicy(SchedulingPolicy):
+    """Priority aging with earliest-deadline-first tie-breaking."""
+
+    name = "aging"
+
+    def sort_key(self, task: Dict, now: datetime):
+        level = priority_rank(task.get("priority"))
+        if self.aging_seconds > 0:
+            try:
+                waited = (now - datetime.fromisoformat(task["created_at"])).total_seconds()
+            except (KeyError, ValueError):
+                waited = 0
+            level = max(0, level - int(waited // self.aging_seconds))
+        return (level, task.get("deadline") or NO_DEADLINE, task.get("created_at", ""), task["task_id"])
+
+    def select(self, storage: QueueStorage, agent: Optional[str],
+               senders: bool = True) -> Optional[Dict]:
+        return self.choose(storage, agent, storage.ready_tasks(agent, senders))
+
+    def choose(self, storage: QueueStorage, agent: Optional[str], ready: List[Dict]) -> Optional[Dict]:
+        now = datetime.now()
+        return min(ready, key=lambda t: self.sort_key(t, now), default=None)
+
+
+class FairPolicy(AgingPolicy):
+    """Weighted fair queuing across producers.
+
+    Each producer carries a virtual finish tag that advances by 1/weight per
+    task served; the backlogged producer with the smallest tag goes next.
+    Tags live in storage metadata per consuming agent, so every process
+    shares them.
+    """
+
+    name = "fair"
+
+    def _meta_key(self, agent: Optional[str]) -> str:
+        return f"fair:{agent or '*'}"
+
+    def weight(self, producer: str) -> float:
+        return float(self.weights.get(producer, 1.0))
+
+    def choose(self, storage: QueueStorage, agent: Optional[str], ready: List[Dict]) -> Optional[Dict]:
+        now = datetime.now()
+        heads: Dict[str, Dict] = {}
+        for task in ready:
+            producer = task.get("from_agent") or "unknown"
+            if producer not in heads or self.sort_key(task, now) < self.sort_key(heads[producer], now):
+                heads[producer] = task
+        if not heads:
+            return None
+
+        state = storage.get_meta(self._meta_key(agent), {"clock": 0.0, "tags": {}})
+        clock = state["clock"]
+        return min(
+            heads.values(),
+            key=lambda t: (max(state["tags"].get(t.get("from_agent") or "unknown", clock), clock),
+                           self.sort_key(t, now))
+        )
+
+    def on_start(self, storage: QueueStorage, task: Dict) -> None:
+        # Charge both the agent's own schedule and the any-agent schedule
+        for agent in {task.get("to_agent"), None}:
+            key = self._meta_key(agent)
+            state = storage.get_meta(key, {"clock": 0.0, "tags": {}})
+            producer = task.get("from_agent") or "unknown"
+            start = max(state["tags"].get(producer, state["clock"]), state["clock"])
+            state["clock"] = start
+            state["tags"][producer] = start + 1.0 / self.weight(producer)
+            storage.set_meta(key, state)
+
+
+POLICIES = {
+    SchedulingPolicy.name: SchedulingPolicy,
+    AgingPolicy.name: AgingPolicy,
+    FairPolicy.name: FairPolicy,
+}
+
+
+def open_policy(config: Optional[Dict] = None) -> SchedulingPolicy:
+    """Build the policy described by a scheduler config dict."""
+    config = config or {}
+    name = config.get("policy", DEFAULT_POLICY)
+    if name not in POLICIES:
+        raise ValueError(f"Unknown scheduling policy: {name} (choose from {', '.join(POLICIES)})")
+    return POLICIES[name](
+        weights=config.get("weights"),
+        aging_minutes=config.get("aging_minutes", DEFAULT_AGING_MINUTES)
+    )
+
+
+# ─────────────────────────────────────────────────────────────
+# Queue-Wait Reporting
+# ─────────────────────────────────────────────────────────────
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def wait_summary(waits: List[float]) -> Dict:
+    waits = sorted(waits)
+    return {
+        "count": len(waits),
+        "p50": percentile(waits, 50),
+        "p90": percentile(waits, 90),
+        "p99": percentile(waits, 99),
+        "max": waits[-1] if waits else 0.0
+    }
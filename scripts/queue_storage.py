@@ -0,0 +1,636 @@
+#!/usr/bin/env python3
+"""
+Federation Queue Storage Backends
+Pluggable persistence for the federation task queue.
+
+Backends:
+    files   One JSON file per task under pending/, in-progress/, completed/
+            and cancelled/ (the original layout, default)
+    sqlite  Single SQLite database (WAL mode) indexed on status, to_agent,
+            priority and created_at
+
+The backend is selected by the FED_QUEUE_STORAGE environment variable, or
+by "storage" in the "queue" section of federation-state.json.
+"""
+
+import fcntl
+import heapq
+import json
+import os
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+# ─────────────────────────────────────────────────────────────
+# Configuration
+# ─────────────────────────────────────────────────────────────
+
+STATUSES = ["pending", "in-progress", "completed", "cancelled"]
+PRIORITY_ORDER = {"critical": 0, "high": 1, "normal": 2, "low": 3}
+DEFAULT_BACKEND = "files"
+STORAGE_ENV = "FED_QUEUE_STORAGE"
+
+
+def priority_rank(priority: Optional[str]) -> int:
+    """Sort rank for a priority name (unknown priorities sort as normal)."""
+    return PRIORITY_ORDER.get(priority or "normal", 2)
+
+
+def task_sort_key(task: Dict):
+    """Queue ordering: highest priority first, then oldest first."""
+    return (priority_rank(task.get("priority")), task.get("created_at", ""))
+
+
+def is_ready(task: Dict) -> bool:
+    """A pending task whose dependencies have all completed."""
+    return task.get("status") == "pending" and not task.get("unmet_dependencies", 0)
+
+
+def involves(task: Dict, agent: Optional[str], senders: bool = True) -> bool:
+    """Whether a task is addressed to agent, or sent by it if senders (None matches every task)."""
+    return (agent is None or task.get("to_agent") == agent
+            or (senders and task.get("from_agent") == agent))
+
+
+def configured_backend(state_file: Path) -> str:
+    """Name of the configured storage backend."""
+    if os.environ.get(STORAGE_ENV):
+        return os.environ[STORAGE_ENV]
+    try:
+        with open(state_file) as f:
+            return json.load(f).get("queue", {}).get("storage", DEFAULT_BACKEND)
+    except (OSError, json.JSONDecodeError):
+        return DEFAULT_BACKEND
+
+
+# ─────────────────────────────────────────────────────────────
+# Storage Interface
+# ─────────────────────────────────────────────────────────────
+
+class QueueStorage:
+    """Interface implemented by queue storage backends."""
+
+    name = "base"
+
+    def load(self, task_id: str) -> Optional[Dict]:
+        """Load a task by ID, whatever its status."""
+        raise NotImplementedError
+
+    def save(self, task: Dict, old_status: Optional[str] = None) -> None:
+        """Store a task under task["status"], removing it from old_status if it moved."""
+        raise NotImplementedError
+
+    def delete(self, task_id: str, status: str) -> None:
+        """Remove a task."""
+        raise NotImplementedError
+
+    def list_tasks(self, status: Optional[str] = None, agent: Optional[str] = None) -> List[Dict]:
+        """Tasks filtered by status and/or agent (to or from), in queue order."""
+        raise NotImplementedError
+
+    def count_by_status(self) -> Dict[str, int]:
+        """Number of tasks in each status."""
+        raise NotImplementedError
+
+    def next_ready(self, agent: Optional[str] = None, senders: bool = True) -> Optional[Dict]:
+        """Highest-priority, oldest ready task addressed to agent (or, with senders,
+        sent by it), or for anyone. Claiming passes senders=False: an agent
+        only ever runs the work addressed to it."""
+        raise NotImplementedError
+
+    def ready_tasks(self, agent: Optional[str] = None, senders: bool = True) -> List[Dict]:
+        """Every ready task next_ready() chooses from, in queue order."""
+        raise NotImplementedError
+
+    def get_meta(self, key: str, default=None):
+        """Read a queue-level metadata value."""
+        raise NotImplementedError
+
+    def set_meta(self, key: str, value) -> None:
+        """Write a queue-level metadata value."""
+        raise NotImplementedError
+
+    @contextmanager
+    def transaction(self):
+        """Group several changes so they are applied together.
+
+        Backends hold an exclusive lock for the duration, so read-check-write
+        sequences (claiming a task) cannot interleave across processes.
+        Nested calls join the outer transaction.
+        """
+        yield
+
+    def watch_path(self) -> Path:
+        """Directory whose change notifications signal new ready work."""
+        raise NotImplementedError
+
+    def change_token(self):
+        """Cheap value that differs after another process changes the queue."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Release any resources held by the backend."""
+
+
+class ReadySet:
+    """Priority-ordered heaps of ready tasks: one overall, and per agent one
+    of the tasks addressed to it and one of the tasks it sent.
+
+    Entries are invalidated lazily: discard() forgets a task and stale heap
+    entries are dropped when they reach the top.
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, Tuple] = {}
+        self._tasks: Dict[str, Dict] = {}
+        self._heaps: Dict[Optional[str], List[Tuple]] = {None: []}
+
+    def push(self, task: Dict) -> None:
+        key = (priority_rank(task.get("priority")), task.get("created_at", ""), task["task_id"])
+        self._tasks[task["task_id"]] = dict(task)
+        if self._entries.get(task["task_id"]) == key:
+            return
+        self._entries[task["task_id"]] = key
+        heapq.heappush(self._heaps[None], key)
+        if task.get("to_agent") is not None:
+            heapq.heappush(self._heaps.setdefault(task["to_agent"], []), key)
+        if task.get("from_agent") is not None:
+            heapq.heappush(self._heaps.setdefault(("from", task["from_agent"]), []), key)
+
+    def discard(self, task_id: str) -> None:
+        self._entries.pop(task_id, None)
+        self._tasks.pop(task_id, None)
+
+    def tasks(self, agent: Optional[str] = None, senders: bool = True) -> List[Dict]:
+        return [task for task in self._tasks.values() if involves(task, agent, senders)]
+
+    def _top(self, heap_key) -> Optional[Tuple]:
+        heap = self._heaps.get(heap_key)
+        while heap:
+            key = heap[0]
+            if self._entries.get(key[2]) == key:
+                return key
+            heapq.heappop(heap)
+        return None
+
+    def peek(self, agent: Optional[str] = None, senders: bool = True) -> Optional[str]:
+        tops = [self._top(agent)]
+        if agent is not None and senders:
+            tops.append(self._top(("from", agent)))
+        tops = [key for key in tops if key]
+        return min(tops)[2] if tops else None
+
+
+class FileStorage(QueueStorage):
+    """One JSON file per task, in a directory per status."""
+
+    name = "files"
+
+    META_FILE = ".meta.json"
+    LOCK_FILE = ".lock"
+
+    def __init__(self, queue_dir: Path):
+        self.queue_dir = Path(queue_dir)
+        for status in STATUSES:
+            (self.queue_dir / status).mkdir(parents=True, exist_ok=True)
+        self.pending_dir = self.queue_dir / "pending"
+        # Built from pending/ on first use; rebuilt when another process changes it
+        self._ready: Optional[ReadySet] = None
+        self._ready_mtime = None
+        self._lock_depth = 0
+        self._lock_fd = None
+
+    def _task_path(self, task_id: str, status: str) -> Path:
+        return self.queue_dir / status / f"{task_id}.json"
+
+    def load(self, task_id: str) -> Optional[Dict]:
+        for status in STATUSES:
+            path = self._task_path(task_id, status)
+            if path.exists():
+                with open(path) as f:
+                    return json.load(f)
+        return None
+
+    def save(self, task: Dict, old_status: Optional[str] = None) -> None:
+        path = self._task_path(task["task_id"], task["status"])
+        # Write-then-rename so readers never see a partially written task
+        temp_path = path.with_name(f".{path.name}.tmp")
+        with open(temp_path, 'w') as f:
+            json.dump(task, f, indent=2)
+        os.replace(temp_path, path)
+
+        if old_status and old_status != task["status"]:
+            self._task_path(task["task_id"], old_status).unlink(missing_ok=True)
+
+        if self._ready is not None:
+            if is_ready(task):
+                self._ready.push(task)
+            else:
+                self._ready.discard(task["task_id"])
+            self._note_own_change()
+
+    def delete(self, task_id: str, status: str) -> None:
+        self._task_path(task_id, status).unlink(missing_ok=True)
+        if self._ready is not None:
+            self._ready.discard(task_id)
+            self._note_own_change()
+
+    def _pending_mtime(self):
+        return os.stat(self.pending_dir).st_mtime_ns
+
+    def watch_path(self) -> Path:
+        # Adds, promotions and redeliveries all land a file in pending/
+        return self.pending_dir
+
+    def change_token(self):
+        return self._pending_mtime()
+
+    def _note_own_change(self) -> None:
+        """Our own writes keep the ready set current; don't treat them as foreign."""
+        self._ready_mtime = self._pending_mtime()
+
+    def _seed_ready(self) -> None:
+        self._ready_mtime = self._pending_mtime()
+        self._ready = ReadySet()
+        for task_file in self.pending_dir.glob("task-*.json"):
+            try:
+                with open(task_file) as f:
+                    task = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                continue
+            if is_ready(task):
+                self._ready.push(task)
+
+    def next_ready(self, agent: Optional[str] = None, senders: bool = True) -> Optional[Dict]:
+        if self._ready is None or self._pending_mtime() != self._ready_mtime:
+            self._seed_ready()
+        while True:
+            task_id = self._ready.peek(agent, senders)
+            if task_id is None:
+                return None
+            task = self.load(task_id)
+            if task and is_ready(task):
+                return task
+            self._ready.discard(task_id)
+
+    def ready_tasks(self, agent: Optional[str] = None, senders: bool = True) -> List[Dict]:
+        if self._ready is None or self._pending_mtime() != self._ready_mtime:
+            self._seed_ready()
+        return sorted(self._ready.tasks(agent, senders), key=lambda t: task_sort_key(t) + (t["task_id"],))
+
+    def get_meta(self, key: str, default=None):
+        try:
+            with open(self.queue_dir / self.META_FILE) as f:
+                return json.load(f).get(key, default)
+        except (OSError, json.JSONDecodeError):
+            return default
+
+    def set_meta(self, key: str, value) -> None:
+        meta_file = self.queue_dir / self.META_FILE
+        try:
+            with open(meta_file) as f:
+                meta = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            meta = {}
+        meta[key] = value
+        temp_file = meta_file.with_suffix(".tmp")
+        with open(temp_file, 'w') as f:
+            json.dump(meta, f, indent=2)
+        os.replace(temp_file, meta_file)
+
+    @contextmanager
+    def transaction(self):
+        if self._lock_depth == 0:
+            self._lock_fd = os.open(self.queue_dir / self.LOCK_FILE, os.O_RDWR | os.O_CREAT, 0o644)
+            fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+        self._lock_depth += 1
+        try:
+            yield
+        finally:
+            self._lock_depth -= 1
+            if self._lock_depth == 0:
+                fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+                os.close(self._lock_fd)
+                self._lock_fd = None
+
+    def list_tasks(self, status: Optional[str] = None, agent: Optional[str] = None) -> List[Dict]:
+        tasks = []
+        for s in [status] if status else STATUSES:
+            status_dir = self.queue_dir / s
+            if not status_dir.exists():
+                continue
+
+            for task_file in sorted(status_dir.glob("task-*.json")):
+                with open(task_file) as f:
+                    task = json.load(f)
+
+                # Filter by agent if specified
+                if not involves(task, agent):
+                    continue
+
+                tasks.append(task)
+
+        tasks.sort(key=task_sort_key)
+        return tasks
+
+    def count_by_status(self) -> Dict[str, int]:
+        counts = {}
+        for status in STATUSES:
+            status_dir = self.queue_dir / status
+            counts[status] = len(list(status_dir.glob("task-*.json"))) if status_dir.exists() else 0
+        return counts
+
+
+class SQLiteStorage(QueueStorage):
+    """All tasks in one SQLite database, indexed for queue access patterns."""
+
+    name = "sqlite"
+    DB_FILE = "queue.db"
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS tasks (
+            task_id    TEXT PRIMARY KEY,
+            status     TEXT NOT NULL,
+            to_agent   TEXT,
+            from_agent TEXT,
+            priority   INTEGER NOT NULL,
+            created_at TEXT NOT NULL,
+            data       TEXT NOT NULL,
+            unmet      INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE TABLE IF NOT EXISTS meta (
+            key   TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+    """
+
+    # Created after _upgrade_schema() so columns added since 1.0 exist
+    INDEXES = """
+        CREATE INDEX IF NOT EXISTS idx_tasks_order
+            ON tasks (status, priority, created_at);
+        CREATE INDEX IF NOT EXISTS idx_tasks_to_agent
+            ON tasks (status, to_agent, priority, created_at);
+        CREATE INDEX IF NOT EXISTS idx_tasks_from_agent
+            ON tasks (status, from_agent, priority, created_at);
+        -- Ready set: pending tasks with no unmet dependencies, in queue order
+        CREATE INDEX IF NOT EXISTS idx_tasks_ready
+            ON tasks (status, unmet, priority, created_at);
+        CREATE INDEX IF NOT EXISTS idx_tasks_ready_agent
+            ON tasks (status, unmet, to_agent, priority, created_at);
+        CREATE INDEX IF NOT EXISTS idx_tasks_ready_sender
+            ON tasks (status, unmet, from_agent, priority, created_at);
+
+        -- Per-status counts kept by triggers so status() never scans
+        CREATE TABLE IF NOT EXISTS status_counts (
+            status TEXT PRIMARY KEY,
+            n      INTEGER NOT NULL
+        );
+        CREATE TRIGGER IF NOT EXISTS tasks_count_insert AFTER INSERT ON tasks BEGIN
+            INSERT INTO status_counts (status, n) VALUES (NEW.status, 1)
+                ON CONFLICT (status) DO UPDATE SET n = n + 1;
+        END;
+        CREATE TRIGGER IF NOT EXISTS tasks_count_delete AFTER DELETE ON tasks BEGIN
+            UPDATE status_counts SET n = n - 1 WHERE status = OLD.status;
+        END;
+        CREATE TRIGGER IF NOT EXISTS tasks_count_update AFTER UPDATE OF status ON tasks
+        WHEN OLD.status != NEW.status BEGIN
+            UPDATE status_counts SET n = n - 1 WHERE status = OLD.status;
+            INSERT INTO status_counts (status, n) VALUES (NEW.status, 1)
+                ON CONFLICT (status) DO UPDATE SET n = n + 1;
+        END;
+    """
+
+    def __init__(self, queue_dir: Path):
+        self.queue_dir = Path(queue_dir)
+        self.queue_dir.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.queue_dir / self.DB_FILE
+        import sqlite3  # Only this backend needs it; keeps file-backend startup lean
+        # Autocommit; multi-statement changes use explicit transactions
+        self.conn = sqlite3.connect(str(self.db_path), isolation_level=None, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(self.SCHEMA)
+        self._upgrade_schema()
+        self.conn.executescript(self.INDEXES)
+
+    def _upgrade_schema(self) -> None:
+        """Add columns introduced after a database was created."""
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(tasks)")}
+        if "unmet" not in columns:
+            self.conn.execute("ALTER TABLE tasks ADD COLUMN unmet INTEGER NOT NULL DEFAULT 0")
+
+    def load(self, task_id: str) -> Optional[Dict]:
+        row = self.conn.execute(
+            "SELECT data FROM tasks WHERE task_id = ?", (task_id,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save(self, task: Dict, old_status: Optional[str] = None) -> None:
+        self.conn.execute(
+            """
+            INSERT INTO tasks (task_id, status, to_agent, from_agent, priority, created_at, data, unmet)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (task_id) DO UPDATE SET
+                status = excluded.status,
+                to_agent = excluded.to_agent,
+                from_agent = excluded.from_agent,
+                priority = excluded.priority,
+                created_at = excluded.created_at,
+                data = excluded.data,
+                unmet = excluded.unmet
+            """,
+            (
+                task["task_id"],
+                task["status"],
+                task.get("to_agent"),
+                task.get("from_agent"),
+                priority_rank(task.get("priority")),
+                task.get("created_at", ""),
+                json.dumps(task),
+                task.get("unmet_dependencies", 0)
+            )
+        )
+
+    def delete(self, task_id: str, status: str) -> None:
+        self.conn.execute("DELETE FROM tasks WHERE task_id = ?", (task_id,))
+
+    def list_tasks(self, status: Optional[str] = None, agent: Optional[str] = None) -> List[Dict]:
+        clauses, params = [], []
+        if status:
+            clauses.append("status = ?")
+            params.append(status)
+        if agent:
+            clauses.append("(to_agent = ? OR from_agent = ?)")
+            params.extend([agent, agent])
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self.conn.execute(
+            f"SELECT data FROM tasks {where} ORDER BY priority, created_at", params
+        )
+        return [json.loads(row[0]) for row in rows]
+
+    def count_by_status(self) -> Dict[str, int]:
+        counts = {status: 0 for status in STATUSES}
+        for status, n in self.conn.execute("SELECT status, n FROM status_counts"):
+            counts[status] = n
+        return counts
+
+    # Ready tasks addressed to or sent by an agent: one index range per column,
+    # each already in queue order
+    READY_FOR_AGENT = """
+        SELECT data FROM (
+            SELECT * FROM (SELECT data, priority, created_at FROM tasks
+                           WHERE status = 'pending' AND unmet = 0 AND to_agent = :agent
+                           ORDER BY priority, created_at{limit})
+            UNION
+            SELECT * FROM (SELECT data, priority, created_at FROM tasks
+                           WHERE status = 'pending' AND unmet = 0 AND from_agent = :agent
+                           ORDER BY priority, created_at{limit})
+        ) ORDER BY priority, created_at{limit}
+    """
+
+    # Ready tasks addressed to an agent (the claim path)
+    READY_TO_AGENT = """
+        SELECT data FROM tasks WHERE status = 'pending' AND unmet = 0 AND to_agent = :agent
+        ORDER BY priority, created_at{limit}
+    """
+
+    def next_ready(self, agent: Optional[str] = None, senders: bool = True) -> Optional[Dict]:
+        if agent is None:
+            row = self.conn.execute(
+                "SELECT data FROM tasks WHERE status = 'pending' AND unmet = 0 "
+                "ORDER BY priority, created_at LIMIT 1"
+            ).fetchone()
+        elif not senders:
+            row = self.conn.execute(self.READY_TO_AGENT.format(limit=" LIMIT 1"), {"agent": agent}).fetchone()
+        else:
+            row = self.conn.execute(self.READY_FOR_AGENT.format(limit=" LIMIT 1"), {"agent": agent}).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def ready_tasks(self, agent: Optional[str] = None, senders: bool = True) -> List[Dict]:
+        if agent is None:
+            rows = self.conn.execute(
+                "SELECT data FROM tasks WHERE status = 'pending' AND unmet = 0 "
+                "ORDER BY priority, created_at"
+            )
+        elif not senders:
+            rows = self.conn.execute(self.READY_TO_AGENT.format(limit=""), {"agent": agent})
+        else:
+            rows = self.conn.execute(self.READY_FOR_AGENT.format(limit=""), {"agent": agent})
+        return [json.loads(row[0]) for row in rows]
+
+    def get_meta(self, key: str, default=None):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set_meta(self, key: str, value) -> None:
+        self.conn.execute(
+            "INSERT INTO meta (key, value) VALUES (?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+            (key, json.dumps(value))
+        )
+
+    @contextmanager
+    def transaction(self):
+        if self.conn.in_transaction:
+            yield
+            return
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+
+    def watch_path(self) -> Path:
+        # Commits from other connections write queue.db-wal here
+        return self.queue_dir
+
+    def change_token(self):
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+# ─────────────────────────────────────────────────────────────
+# Task ID Allocation
+# ─────────────────────────────────────────────────────────────
+
+class TaskIdAllocator:
+    """Monotonic task IDs from a counter file guarded by an exclusive lock.
+
+    IDs look like task-YYYYMMDD-HHMMSS-NNNNNNNN. The timestamp is taken under the
+    lock and never goes backwards, and the sequence number never repeats, so
+    IDs are unique across processes and sort lexically by creation time.
+    """
+
+    COUNTER_FILE = ".task-seq"
+    # The sequence never resets, so it is padded wide enough never to overflow
+    # in practice: a wider number would no longer sort lexically after a narrower one
+    SEQ_DIGITS = 8
+
+    def __init__(self, queue_dir: Path, seed: Callable[[], int] = lambda: 0):
+        self.counter_file = Path(queue_dir) / self.COUNTER_FILE
+        self.lock_file = self.counter_file.with_name(self.COUNTER_FILE + ".lock")
+        # Called once, when no counter exists yet, to continue past existing tasks
+        self.seed = seed
+
+    def _read(self):
+        try:
+            seq, last_stamp = self.counter_file.read_text().split()
+            return int(seq), last_stamp
+        except (OSError, ValueError):
+            return self.seed(), ""
+
+    def next_id(self) -> str:
+        return self.next_ids(1)[0]
+
+    def next_ids(self, count: int) -> List[str]:
+        """Reserve a block of consecutive IDs with one counter update."""
+        self.counter_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.lock_file, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                first, last_stamp = self._read()
+                seq = first + count
+                stamp = max(datetime.now().strftime("%Y%m%d-%H%M%S"), last_stamp)
+
+                temp_file = self.counter_file.with_name(self.COUNTER_FILE + ".tmp")
+                temp_file.write_text(f"{seq} {stamp}\n")
+                os.replace(temp_file, self.counter_file)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+        return [f"task-{stamp}-{n:0{self.SEQ_DIGITS}d}" for n in range(first + 1, seq + 1)]
+
+
+BACKENDS = {
+    FileStorage.name: FileStorage,
+    SQLiteStorage.name: SQLiteStorage,
+}
+
+
+def open_storage(name: str, queue_dir: Path) -> QueueStorage:
+    """Open the named storage backend rooted at queue_dir."""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown queue storage backend: {name} (choose from {', '.join(BACKENDS)})")
+    return BACKENDS[name](queue_dir)
+
+
+def migrate(source: QueueStorage, dest: QueueStorage) -> int:
+    """Move every task from one backend to another. Returns the number moved.
+
+    The copy commits before anything is removed from the source, so an
+    interrupted migration leaves tasks in both places rather than in neither.
+    """
+    tasks = source.list_tasks()
+    with dest.transaction():
+        for task in tasks:
+            dest.save(task)
+    # Readers of the old layout (e.g. a glob over completed/) must not see stale copies
+    with source.transaction():
+        for task in tasks:
+            source.delete(task["task_id"], task["status"])
+    return len(tasks)
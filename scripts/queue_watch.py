@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Federation Queue Change Watcher
+Blocks until the task queue changes, for long-polling consumers.
+
+Uses Linux inotify (via ctypes, no extra packages) on the storage backend's
+watch directory. Where inotify is unavailable it falls back to polling the
+backend's change token with a short exponential backoff.
+
+Set FED_QUEUE_WATCH=poll to force the polling fallback.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import time
+from pathlib import Path
+from typing import Optional
+
+from queue_storage import QueueStorage
+
+# ─────────────────────────────────────────────────────────────
+# Configuration
+# ─────────────────────────────────────────────────────────────
+
+WATCH_ENV = "FED_QUEUE_WATCH"
+
+# inotify event masks (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+# Polling fallback backoff, in seconds
+POLL_MIN_INTERVAL = 0.01
+POLL_MAX_INTERVAL = 0.25
+
+
+# ─────────────────────────────────────────────────────────────
+# inotify
+# ─────────────────────────────────────────────────────────────
+
+_libc = None
+
+
+def _load_libc():
+    global _libc
+    if _libc is None:
+        try:
+            _libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            _libc.inotify_init1  # Raises AttributeError off Linux
+        except (OSError, AttributeError):
+            _libc = False
+    return _libc
+
+
+class Inotify:
+    """Minimal inotify watch on one directory."""
+
+    def __init__(self, path: Path):
+        libc = _load_libc()
+        if not libc:
+            raise OSError("inotify is not available")
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if libc.inotify_add_watch(self.fd, os.fsencode(str(path)), WATCH_MASK) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"inotify_add_watch failed for {path}")
+
+    def wait(self, timeout: Optional[float]) -> bool:
+        """Block until an event arrives (True) or the timeout passes (False)."""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return False
+        # Drain everything queued; one wake-up per burst of writes is enough
+        try:
+            while os.read(self.fd, 65536):
+                pass
+        except BlockingIOError:
+            pass
+        return True
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+# ─────────────────────────────────────────────────────────────
+# Queue Watcher
+# ─────────────────────────────────────────────────────────────
+
+class QueueWatcher:
+    """Wait for changes to a queue storage backend.
+
+    Any object with watch_path() and change_token() can be watched the same
+    way; QueueJournal provides both, for consumers of queue events.
+
+    Create the watcher *before* checking the queue for work, then call wait()
+    only if the check came up empty: changes made in between are not lost.
+    """
+
+    def __init__(self, storage: QueueStorage, use_inotify: Optional[bool] = None):
+        self.storage = storage
+        if use_inotify is None:
+            use_inotify = os.environ.get(WATCH_ENV) != "poll"
+
+        self._inotify = None
+        if use_inotify:
+            try:
+                self._inotify = Inotify(storage.watch_path())
+            except OSError:
+                pass
+        self._token = storage.change_token()
+
+    @property
+    def mode(self) -> str:
+        return "inotify" if self._inotify else "poll"
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the queue changes; False if timeout seconds pass first."""
+        if self._inotify:
+            return self._inotify.wait(timeout)
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        interval = POLL_MIN_INTERVAL
+        while True:
+            token = self.storage.change_token()
+            if token != self._token:
+                self._token = token
+                return True
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                interval = min(interval, remaining)
+            time.sleep(interval)
+            interval = min(interval * 2, POLL_MAX_INTERVAL)
+
+    def close(self) -> None:
+        if self._inotify:
+            self._inotify.close()
+            self._inotify = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -4,26 +4,29 @@ ML-Enhanced Task Router for Federation
 Combines keyword-based routing with ML similarity matching.
 """
 
+import time
+
+_START_TIME = time.perf_counter()
+
 import argparse
+import importlib.util
 import json
 import sys
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import TYPE_CHECKING, Dict, List, Optional
 
-# Add parent directory to path for imports
+# Make the predictor package importable; it is only imported on first ML use
+sys.path.insert(0, str(Path(__file__).parent.parent / '.federation'))
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-try:
-    # Try relative imports first
-    sys.path.insert(0, str(Path(__file__).parent.parent / '.federation'))
-    sys.path.insert(0, str(Path(__file__).parent.parent))
+ML_AVAILABLE = importlib.util.find_spec("predictor") is not None
+
+# Labeled tasks used to check that profile compaction does not hurt routing
+TRAINING_DATA = Path(__file__).parent.parent / '.federation' / 'training_data.json'
+
+if TYPE_CHECKING:
     from predictor.similarity_engine import SimilarityEngine, MatchResult
     from predictor.historical_learner import HistoricalLearner
-    ML_AVAILABLE = True
-except ImportError as e:
-    # Fallback if predictor modules not available
-    print(f"Debug: ML import error: {e}", file=sys.stderr)
-    ML_AVAILABLE = False
 
 
 class MLRouter:
@@ -38,18 +41,36 @@ class MLRouter:
     SIMILARITY_WEIGHT = 0.40
     HISTORICAL_WEIGHT = 0.20
     
-    def __init__(self, use_ml: bool = True):
+    def __init__(self, use_ml: bool = True, vector_budgets: Optional[Dict[str, int]] = None):
         self.use_ml = use_ml and ML_AVAILABLE
-        self.engine = None
-        self.learner = None
-        
-        if self.use_ml:
+        # Per-agent capability term budgets, on top of data/vector_budgets.json
+        self.vector_budgets = vector_budgets
+        # ML components are constructed on first use (see engine/learner)
+        self._engine: Optional["SimilarityEngine"] = None
+        self._learner: Optional["HistoricalLearner"] = None
+    
+    @property
+    def engine(self) -> Optional["SimilarityEngine"]:
+        """Similarity engine, loaded on first access."""
+        if self._engine is None and self.use_ml:
             try:
-                self.engine = SimilarityEngine()
-                self.learner = HistoricalLearner()
+                from predictor.similarity_engine import SimilarityEngine
+                self._engine = SimilarityEngine(vector_budgets=self.vector_budgets)
             except Exception as e:
                 print(f"Warning: ML components failed to load: {e}", file=sys.stderr)
                 self.use_ml = False
+        return self._engine
+    
+    @property
+    def learner(self) -> Optional["HistoricalLearner"]:
+        """Historical learner sharing the router's engine, loaded on first access."""
+        if self._learner is None and self.engine is not None:
+            try:
+                from predictor.historical_learner import HistoricalLearner
+                self._learner = HistoricalLearner(engine=self.engine)
+            except Exception as e:
+                print(f"Warning: Historical learner failed to load: {e}", file=sys.stderr)
+        return self._learner
     
     def route_task(
         self,
@@ -108,7 +129,7 @@ class MLRouter:
     
     def _process_ml_matches(
         self,
-        matches: List[MatchResult],
+        matches: List["MatchResult"],
         description: str,
         explain: bool
     ) -> Dict:
@@ -207,11 +228,11 @@ class MLRouter:
         
         return result
     
-    def _summarize_explanation(self, match: MatchResult) -> str:
+    def _summarize_explanation(self, match: "MatchResult") -> str:
         """Create brief explanation."""
         return f"{match.emoji} {match.agent_id.title()}: {match.confidence:.0%} confidence"
     
-    def _build_detailed_reasoning(self, match: MatchResult) -> str:
+    def _build_detailed_reasoning(self, match: "MatchResult") -> str:
         """Build detailed reasoning string."""
         parts = []
         
@@ -265,6 +286,39 @@ class MLRouter:
             print(f"Warning: Failed to update learning: {e}", file=sys.stderr)
             return False
     
+    def compact_profiles(self, dry_run: bool = False, force: bool = False) -> Dict:
+        """Prune agent capability vectors, keeping the result only if accuracy holds."""
+        if not self.use_ml or not self.engine:
+            return {"error": "ML components unavailable"}
+        
+        samples = json.loads(TRAINING_DATA.read_text()) if TRAINING_DATA.exists() else []
+        original_vectors = {
+            agent_id: dict(p.capability_vector)
+            for agent_id, p in self.engine.get_all_profiles().items()
+        }
+        
+        accuracy_before = self.engine.evaluate_accuracy(samples)
+        report = self.engine.compact_profiles(save=False)
+        accuracy_after = self.engine.evaluate_accuracy(samples)
+        
+        regressed = accuracy_after < accuracy_before
+        applied = not dry_run and (force or not regressed)
+        if applied:
+            self.engine._save_profiles()
+        else:
+            for agent_id, vector in original_vectors.items():
+                self.engine.profiles[agent_id].capability_vector = vector
+                self.engine._profile_norms[agent_id] = self.engine._vector_norm(vector)
+        
+        report.update({
+            "samples": len(samples),
+            "accuracy_before": round(accuracy_before, 4),
+            "accuracy_after": round(accuracy_after, 4),
+            "regressed": regressed,
+            "applied": applied
+        })
+        return report
+    
     def get_stats(self) -> Dict:
         """Get router statistics."""
         stats = {
@@ -286,6 +340,7 @@ class MLRouter:
                 }
                 for agent_id, p in profiles.items()
             }
+            stats["vector_cache"] = self.engine.extractor.get_cache_stats()
         
         return stats
 
@@ -330,10 +385,44 @@ def main():
         action="store_true",
         help="Output as JSON"
     )
+    parser.add_argument(
+        "--compact-profiles",
+        action="store_true",
+        help="Prune capability vectors to their budgets (checks routing accuracy)"
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="With --compact-profiles, report without saving"
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="With --compact-profiles, save even if accuracy drops"
+    )
+    parser.add_argument(
+        "--vector-budget",
+        action="append",
+        default=[],
+        metavar="AGENT=TERMS",
+        help="Capability term budget for an agent (repeatable; overrides data/vector_budgets.json)"
+    )
+    parser.add_argument(
+        "--timing",
+        action="store_true",
+        help="Report startup and routing time"
+    )
     
     args = parser.parse_args()
     
-    router = MLRouter(use_ml=not args.no_ml)
+    vector_budgets = {}
+    for budget in args.vector_budget:
+        agent, _, terms = budget.partition("=")
+        if not agent or not terms.isdigit():
+            parser.error(f"--vector-budget expects AGENT=TERMS, got {budget!r}")
+        vector_budgets[agent] = int(terms)
+    
+    router = MLRouter(use_ml=not args.no_ml, vector_budgets=vector_budgets)
     
     if args.stats:
         stats = router.get_stats()
@@ -352,6 +441,11 @@ def main():
                 if 'total_learning_events' in learning:
                     print(f"Learning Events: {learning['total_learning_events']}")
             
+            if 'vector_cache' in stats:
+                cache = stats['vector_cache']
+                print(f"\nVector Cache: {cache['size']}/{cache['capacity']} entries, "
+                      f"{cache['hit_rate']:.0%} hit rate")
+            
             if 'agents' in stats:
                 print("\nAgent Profiles:")
                 for agent, profile in stats['agents'].items():
@@ -359,17 +453,45 @@ def main():
                           f"{profile['task_count']} tasks")
         return
     
+    if args.compact_profiles:
+        report = router.compact_profiles(dry_run=args.dry_run, force=args.force)
+        if args.json or "error" in report:
+            print(json.dumps(report, indent=2))
+            return
+        print("Profile Compaction" + (" (DRY RUN)" if args.dry_run else ""))
+        print("=" * 50)
+        for agent, sizes in report["agents"].items():
+            print(f"  {agent}: {sizes['terms_before']} → {sizes['terms_after']} terms "
+                  f"(budget {sizes['budget']})")
+        print(f"\nProfile size: {report['bytes_before']:,} → {report['bytes_after']:,} bytes")
+        print(f"Accuracy ({report['samples']} samples): "
+              f"{report['accuracy_before']:.1%} → {report['accuracy_after']:.1%}")
+        if report["applied"]:
+            print("✅ Compacted profiles saved")
+        elif report["regressed"] and not args.dry_run:
+            print("⚠️  Accuracy regressed; profiles left unchanged (use --force to save anyway)")
+        return
+    
     if not args.task:
         parser.print_help()
         sys.exit(1)
     
     # Route the task
+    route_start = time.perf_counter()
     result = router.route_task(
         description=args.task,
         task_type=args.type,
         required_agent=args.agent,
         explain=args.explain
     )
+    route_end = time.perf_counter()
+    
+    if args.timing:
+        result["timing"] = {
+            "startup_ms": round((route_start - _START_TIME) * 1000, 2),
+            "route_ms": round((route_end - route_start) * 1000, 2),
+            "total_ms": round((route_end - _START_TIME) * 1000, 2)
+        }
     
     if args.json:
         print(json.dumps(result, indent=2))
@@ -403,6 +525,11 @@ def main():
             print(f"  Success Probability: {pred['success_probability']:.0%}")
             if pred.get('estimated_duration_minutes'):
                 print(f"  Est. Duration: {pred['estimated_duration_minutes']} min")
+        
+        if 'timing' in result:
+            timing = result['timing']
+            print(f"\nTiming: startup {timing['startup_ms']:.1f} ms, "
+                  f"route {timing['route_ms']:.1f} ms, total {timing['total_ms']:.1f} ms")
 
 
 if __name__ == "__main__":
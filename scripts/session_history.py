@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Federation Session History
+Indexed store for archived sessions and compacted session tasks.
+
+One SQLite database, history/history.db:
+
+    sessions  one row per archived session (sprint, created/archived time,
+              the final document without its tasks)
+    tasks     every task that left an active session, either compacted out
+              while the sprint ran or carried along when it was archived
+
+Both tables are indexed by (sprint, date), so "what happened in sprint X
+last week" is a range scan rather than a walk over JSON files. Session JSON
+files written to history/ by older versions are imported the first time the
+database is created.
+"""
+
+import json
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+# ─────────────────────────────────────────────────────────────
+# Store
+# ─────────────────────────────────────────────────────────────
+
+DB_FILE = "history.db"
+
+
+class SessionHistory:
+    """Archived sessions and tasks, queryable by sprint and date range."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS sessions (
+            session_id  TEXT PRIMARY KEY,
+            sprint      TEXT,
+            created_at  TEXT,
+            archived_at TEXT NOT NULL,
+            data        TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS tasks (
+            session_id   TEXT NOT NULL,
+            task_id      TEXT NOT NULL,
+            sprint       TEXT,
+            status       TEXT,
+            assigned_to  TEXT,
+            created_at   TEXT,
+            completed_at TEXT,
+            data         TEXT NOT NULL,
+            PRIMARY KEY (session_id, task_id)
+        );
+        CREATE INDEX IF NOT EXISTS idx_sessions_sprint ON sessions (sprint, archived_at);
+        CREATE INDEX IF NOT EXISTS idx_sessions_date ON sessions (archived_at);
+        CREATE INDEX IF NOT EXISTS idx_tasks_sprint ON tasks (sprint, completed_at);
+        CREATE INDEX IF NOT EXISTS idx_tasks_date ON tasks (completed_at);
+    """
+
+    def __init__(self, history_dir: Path):
+        self.history_dir = Path(history_dir)
+        self.history_dir.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.history_dir / DB_FILE
+        import sqlite3  # Only archiving and history queries need it
+        is_new = not self.db_path.exists()
+        self.conn = sqlite3.connect(str(self.db_path), isolation_level=None, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(self.SCHEMA)
+        if is_new:
+            self._import_legacy()
+
+    def close(self):
+        self.conn.close()
+
+    def _import_legacy(self):
+        """Load session files archived as history/<timestamp>.json."""
+        for path in sorted(self.history_dir.glob("*.json")):
+            try:
+                session = json.loads(path.read_text())
+            except (OSError, json.JSONDecodeError):
+                continue
+            if "session_id" in session:
+                self.add_session(session)
+
+    @contextmanager
+    def _transaction(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+
+    def _insert_tasks(self, session: Dict, tasks: Iterable[Dict]):
+        self.conn.executemany("INSERT OR REPLACE INTO tasks VALUES (?, ?, ?, ?, ?, ?, ?, ?)", [
+            (session["session_id"], task["id"], session.get("sprint"), task.get("status"),
+             task.get("assigned_to"), task.get("created_at"),
+             task.get("completed_at") or task.get("created_at"), json.dumps(task))
+            for task in tasks
+        ])
+
+    def add_tasks(self, session: Dict, tasks: Iterable[Dict]):
+        """Record tasks that left session (compaction or archive); re-adding a task replaces it."""
+        with self._transaction():
+            self._insert_tasks(session, tasks)
+
+    def add_session(self, session: Dict):
+        """Record an archived session and the tasks it still held."""
+        tasks = session.get("tasks", {})
+        document = {key: value for key, value in session.items() if key != "tasks"}
+        with self._transaction():
+            self._insert_tasks(session, tasks.values() if isinstance(tasks, dict) else tasks)
+            self.conn.execute(
+                "INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?, ?)",
+                (session["session_id"], session.get("sprint"), session.get("created_at"),
+                 session.get("archived_at") or session.get("updated_at") or "", json.dumps(document))
+            )
+
+    @staticmethod
+    def _where(sprint: Optional[str], since: Optional[str], until: Optional[str], column: str):
+        clauses, params = [], []
+        if sprint is not None:
+            clauses.append("sprint = ?")
+            params.append(sprint)
+        if since:
+            clauses.append(f"{column} >= ?")
+            params.append(since)
+        if until:
+            # Dates compare as prefixes: until="2026-02-07" includes that whole day
+            clauses.append(f"{column} < ?")
+            params.append(until + "\uffff")
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def sessions(self, sprint: Optional[str] = None, since: Optional[str] = None,
+                 until: Optional[str] = None) -> List[Dict]:
+        """Archived sessions (without tasks), oldest first, by sprint and archive date."""
+        where, params = self._where(sprint, since, until, "archived_at")
+        rows = self.conn.execute(f"SELECT data FROM sessions{where} ORDER BY archived_at", params)
+        return [json.loads(data) for data, in rows]
+
+    def tasks(self, sprint: Optional[str] = None, since: Optional[str] = None,
+              until: Optional[str] = None, status: Optional[str] = None) -> List[Dict]:
+        """Archived tasks, oldest first, by sprint and completion date."""
+        where, params = self._where(sprint, since, until, "completed_at")
+        if status:
+            where += (" AND" if where else " WHERE") + " status = ?"
+            params.append(status)
+        rows = self.conn.execute(f"SELECT data FROM tasks{where} ORDER BY completed_at", params)
+        return [json.loads(data) for data, in rows]
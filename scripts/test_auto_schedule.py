@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Unit tests for Federation auto-scheduling (auto_schedule_rules.py, fed-auto-schedule.py).
+
+Usage:
+    python3 test_auto_schedule.py
+    python3 test_auto_schedule.py -v  # Verbose
+"""
+
+import importlib.util
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+import federation_queue
+from auto_schedule_rules import PatternMatcher, compile_template, load_rules, render_template
+
+_spec = importlib.util.spec_from_file_location(
+    "fed_auto_schedule", Path(__file__).parent / "fed-auto-schedule.py"
+)
+fed_auto_schedule = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(fed_auto_schedule)
+
+
+def make_rule(rule_id, from_agent, patterns, queue_for="kimi", enabled=True, artifact=False,
+              template="Follow up on {previous_task}"):
+    return {
+        "id": rule_id,
+        "name": rule_id,
+        "trigger": {"from_agent": from_agent, "task_patterns": patterns, "output_artifact": artifact},
+        "action": {"queue_for": queue_for, "task_template": template, "priority": "normal"},
+        "enabled": enabled
+    }
+
+
+class TestPatternMatcher(unittest.TestCase):
+    """Aho-Corasick matching agrees with substring search."""
+
+    def test_overlapping_and_nested_patterns(self):
+        matcher = PatternMatcher([("design", 0), ("sign", 1), ("designer", 2), ("she", 3), ("he", 4)])
+        self.assertEqual(matcher.match("the designer"), {0, 1, 2, 4})
+        self.assertEqual(matcher.match("ushers"), {3, 4})
+        self.assertEqual(matcher.match("nothing here"), {4})
+        self.assertEqual(matcher.match(""), set())
+
+    def test_matches_brute_force(self):
+        rng = random.Random(7)
+        patterns = ["".join(rng.choice("abc") for _ in range(rng.randint(1, 4))) for _ in range(40)]
+        matcher = PatternMatcher((p, i) for i, p in enumerate(patterns))
+        for _ in range(200):
+            text = "".join(rng.choice("abcd") for _ in range(rng.randint(0, 30)))
+            expected = {i for i, p in enumerate(patterns) if p in text}
+            self.assertEqual(matcher.match(text), expected, text)
+
+
+class TestTemplates(unittest.TestCase):
+    """Parsed templates render exactly like str.format."""
+
+    def test_render_matches_format(self):
+        values = {"previous_task": "Research auth", "artifact_path": "docs/auth.md"}
+        for template in ["Implement {previous_task} from {artifact_path}", "{previous_task!r:>20}|",
+                         "No fields {{literal}}", ""]:
+            self.assertEqual(render_template(template, values), template.format(**values))
+        self.assertIs(compile_template("Test {previous_task}"), compile_template("Test {previous_task}"))
+
+    def test_unknown_field_rejected(self):
+        with self.assertRaises(ValueError):
+            compile_template("Deploy {environment}")
+
+
+class TestRuleIndex(unittest.TestCase):
+    """Compiled rules select the same rules as a linear scan, and track file changes."""
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.rules_file = self.test_dir / "auto-schedule-rules.json"
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def _write(self, rules, enabled=True):
+        self.rules_file.write_text(json.dumps({"enabled": enabled, "rules": rules}))
+
+    def test_match_by_agent_pattern_and_artifact(self):
+        self._write([
+            make_rule("research", "claude", ["Research", "design"], artifact=True),
+            make_rule("any-claude", "claude", ["auth"]),
+            make_rule("kimi-only", "kimi", ["auth"]),
+            make_rule("disabled", "claude", ["auth"], enabled=False),
+        ])
+        rules = load_rules(self.rules_file)
+        task = {"description": "Research AUTH design", "result": "docs/auth.md"}
+        self.assertEqual([r["id"] for r in rules.match(task, "claude")], ["research", "any-claude"])
+        self.assertEqual([r["id"] for r in rules.match({"description": "research auth"}, "claude")],
+                         ["any-claude"])
+        self.assertEqual([r["id"] for r in rules.match(task, "kimi")], ["kimi-only"])
+        self.assertEqual(rules.match(task, "copilot"), [])
+
+    def test_recompiles_when_file_changes(self):
+        self._write([make_rule("one", "claude", ["auth"])])
+        first = load_rules(self.rules_file)
+        self.assertIs(load_rules(self.rules_file), first)
+
+        self._write([make_rule("one", "claude", ["auth"]), make_rule("two", "claude", ["auth"])])
+        stat = self.rules_file.stat()
+        os.utime(self.rules_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+        second = load_rules(self.rules_file)
+        self.assertIsNot(second, first)
+        self.assertEqual(len(second.match({"description": "auth"}, "claude")), 2)
+
+
+class TestAutoScheduler(unittest.TestCase):
+    """on_complete queues follow-ups through the queue library."""
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.rules_file = self.test_dir / "auto-schedule-rules.json"
+        self.cursor_file = self.test_dir / "auto-schedule-cursor.json"
+        self.state_file = self.test_dir / "federation-state.json"
+        self.state_file.write_text(json.dumps({"queue": {}}))
+        self.queue = self._open_queue()
+
+    def _open_queue(self):
+        return federation_queue.FederationQueue(queue_dir=self.test_dir / "queue", state_file=self.state_file)
+
+    def tearDown(self):
+        self.queue.storage.close()
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def _scheduler(self, rules, enabled=True):
+        self.rules_file.write_text(json.dumps({"enabled": enabled, "rules": rules}))
+        return fed_auto_schedule.AutoScheduler(queue=self.queue, rules_file=self.rules_file,
+                                               cursor_file=self.cursor_file)
+
+    def _complete(self, agent, description, result="out.md"):
+        task_id = self.queue.add("claude", agent, description)
+        self.queue.start(task_id)
+        self.queue.complete(task_id, result)
+        return task_id
+
+    def test_on_complete_queues_follow_up(self):
+        scheduler = self._scheduler([make_rule("r", "claude", ["research"], artifact=True)])
+        done = self._complete("claude", "Research caching")
+        new_id, = scheduler.on_complete(done, "claude", "docs/cache.md")
+        follow_up = self.queue.get(new_id)
+        self.assertEqual(follow_up["to_agent"], "kimi")
+        self.assertEqual(follow_up["description"], "Follow up on Research caching")
+        self.assertEqual(follow_up["dependencies"], [done])
+
+    def test_disabled_scheduler_does_nothing(self):
+        scheduler = self._scheduler([make_rule("r", "claude", ["research"])], enabled=False)
+        done = self._complete("claude", "Research caching")
+        self.assertEqual(scheduler.on_complete(done, "claude"), [])
+        self.assertEqual(self.queue.status()["pending"], 0)
+
+    def test_every_matching_rule_queued_in_one_batch(self):
+        """Several matching rules produce one add_many call."""
+        scheduler = self._scheduler([
+            make_rule("implement", "claude", ["research"], queue_for="kimi"),
+            make_rule("review", "claude", ["research"], queue_for="copilot"),
+            make_rule("unrelated", "claude", ["deploy"], queue_for="ollama"),
+        ])
+        done = self._complete("claude", "Research caching")
+        batches = []
+        add_many = self.queue.add_many
+        self.queue.add_many = lambda entries: batches.append(entries) or add_many(entries)
+
+        new_ids = scheduler.on_complete(done, "claude")
+        self.assertEqual(len(batches), 1)
+        self.assertEqual([self.queue.get(i)["to_agent"] for i in new_ids], ["kimi", "copilot"])
+
+    def test_chain_steps_depend_on_each_other(self):
+        """A rule's "then" steps are queued as a dependency chain, capped by max depth."""
+        rule = make_rule("chain", "claude", ["research"], queue_for="kimi", template="Build {previous_task}")
+        rule["action"]["then"] = [
+            {"queue_for": "copilot", "task_template": "Review {previous_task}"},
+            {"queue_for": "claude", "task_template": "Document {previous_task}"},
+        ]
+        self.rules_file.write_text(json.dumps({
+            "enabled": True, "rules": [rule], "global_settings": {"max_auto_queue_depth": 2}
+        }))
+        scheduler = fed_auto_schedule.AutoScheduler(queue=self.queue, rules_file=self.rules_file,
+                                                    cursor_file=self.cursor_file)
+        done = self._complete("claude", "Research caching")
+
+        build, review = scheduler.on_complete(done, "claude")
+        self.assertEqual(self.queue.get(build)["dependencies"], [done])
+        self.assertEqual(self.queue.get(review)["dependencies"], [build])
+        self.assertEqual(self.queue.get(review)["from_agent"], "kimi")
+        self.assertEqual(self.queue.get(review)["description"], "Review Research caching")
+        self.assertEqual(self.queue.next_task("copilot"), None)
+
+    def test_bad_template_skips_only_that_rule(self):
+        scheduler = self._scheduler([
+            make_rule("broken", "claude", ["research"], template="Deploy {environment}"),
+            make_rule("good", "claude", ["research"]),
+        ])
+        done = self._complete("claude", "Research caching")
+        self.assertEqual(len(scheduler.on_complete(done, "claude")), 1)
+
+
+    def test_on_complete_is_idempotent(self):
+        """A repeated on_complete returns the recorded follow-ups instead of queueing again."""
+        scheduler = self._scheduler([make_rule("r", "claude", ["research"])])
+        done = self._complete("claude", "Research caching")
+        first = scheduler.on_complete(done, "claude")
+        self.assertEqual(scheduler.on_complete(done, "claude"), first)
+        self.assertEqual(self.queue.add_follow_ups(done, [
+            {"from_agent": "claude", "to_agent": "kimi", "task": "Duplicate"}
+        ]), first)
+        self.assertEqual(self.queue.status()["pending"], 1)
+        self.assertEqual(self.queue.get(done)["follow_ups"], first)
+
+    def test_watcher_cursor_survives_restart(self):
+        """Completions before the first run are skipped; later ones are handled exactly once."""
+        scheduler = self._scheduler([make_rule("r", "claude", ["research"])])
+        self._complete("claude", "Research before the watcher existed")
+        self.assertEqual(scheduler.process_events(), 0)
+
+        done = self._complete("claude", "Research caching")
+        self.assertEqual(scheduler.process_events(), 1)
+        self.assertEqual(scheduler.process_events(), 0)
+
+        # Crash before the cursor was saved: the replay must not duplicate work
+        self.cursor_file.write_text(json.dumps({"seq": 0}))
+        self._scheduler([make_rule("r", "claude", ["research"])]).process_events()
+        pending = [t["task_id"] for t in self.queue.list_tasks(status="pending")]
+        self.assertEqual(len(pending), 2)  # One per completion, none duplicated
+        self.assertEqual(len(self.queue.get(done)["follow_ups"]), 1)
+
+    def test_watch_reacts_to_completions_from_other_processes(self):
+        """A completion made through another queue handle is picked up within a second."""
+        scheduler = self._scheduler([make_rule("r", "claude", ["research"])])
+        scheduler.process_events()  # Initialise the cursor
+        handled = []
+        watcher = threading.Thread(target=lambda: handled.append(scheduler.watch(timeout=1.0)))
+        watcher.start()
+
+        other = self._open_queue()
+        task_id = other.add("claude", "claude", "Research caching")
+        other.start(task_id)
+        started = time.monotonic()
+        other.complete(task_id, "cache.md")
+        while not other.get(task_id).get("follow_ups") and time.monotonic() - started < 2:
+            time.sleep(0.01)
+        self.assertLess(time.monotonic() - started, 1.0)
+        watcher.join()
+        other.storage.close()
+        self.assertEqual(handled, [1])
+
+
+if __name__ == "__main__":
+    unittest.main()
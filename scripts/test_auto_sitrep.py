@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the SITREP generator (auto_sitrep.py).
+
+Usage:
+    python3 test_auto_sitrep.py
+    python3 test_auto_sitrep.py -v  # Verbose
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+import auto_sitrep
+
+PATHS = ("REPO_ROOT", "CACHE_DIR", "QUEUE_DIR", "ROUTING_HISTORY", "SESSION_PATH", "HEARTBEAT_PATH")
+
+
+class SitrepTestCase(unittest.TestCase):
+    """Scratch git repository and federation directories per test."""
+
+    def setUp(self):
+        self._saved = {name: getattr(auto_sitrep, name) for name in PATHS}
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.repo = self.test_dir / "repo"
+        self.repo.mkdir()
+        auto_sitrep.REPO_ROOT = self.repo
+        auto_sitrep.CACHE_DIR = self.test_dir / "sitrep"
+        auto_sitrep.QUEUE_DIR = self.test_dir / "queue"
+        auto_sitrep.ROUTING_HISTORY = self.test_dir / "routing-history.jsonl"
+        auto_sitrep.SESSION_PATH = self.test_dir / "active-session.json"
+        auto_sitrep.HEARTBEAT_PATH = self.test_dir / "heartbeats.bin"
+        self._git("init", "-q")
+        self.today = datetime.now(timezone.utc)
+
+    def tearDown(self):
+        for name, value in self._saved.items():
+            setattr(auto_sitrep, name, value)
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def _git(self, *args, when=None):
+        env = dict(os.environ)
+        if when:
+            env["GIT_AUTHOR_DATE"] = env["GIT_COMMITTER_DATE"] = when.isoformat()
+        subprocess.run(["git", "-c", "user.name=Test", "-c", "user.email=test@example.com", *args],
+                       cwd=self.repo, env=env, check=True, capture_output=True)
+
+    def _commit(self, subject, days_ago=0):
+        self._git("commit", "-q", "--allow-empty", "-m", subject, when=self.today - timedelta(days=days_ago))
+
+
+class TestCollectors(SitrepTestCase):
+    """Collectors run concurrently and read git and routing history incrementally."""
+
+    def test_slow_collector_times_out_without_blocking_others(self):
+        started = time.monotonic()
+        results = auto_sitrep.run_collectors({
+            "slow": lambda: time.sleep(1) or "late",
+            "fast": lambda: "ok",
+            "broken": lambda: 1 / 0
+        }, timeout=0.2)
+        self.assertLess(time.monotonic() - started, 0.9)
+        self.assertEqual(results["fast"], "ok")
+        self.assertIn("timed out", results["slow"]["error"])
+        self.assertIn("division", results["broken"]["error"])
+
+    def test_git_read_from_last_reported_head(self):
+        self._commit("First")
+        results, (today,) = auto_sitrep.collect(days=1)
+        self.assertEqual([c["subject"] for c in today["commits"]], ["First"])
+        head = auto_sitrep.load_cache_state()["git_head"]
+        self.assertEqual(head, results["git"]["head"])
+
+        self._commit("Second")
+        results, (today,) = auto_sitrep.collect(days=1)
+        self.assertEqual([c["subject"] for c in results["git"]["commits"]], ["Second"])
+        self.assertEqual([c["subject"] for c in today["commits"]], ["Second", "First"])
+
+    def test_routing_outcomes_read_from_offset(self):
+        now = self.today.replace(tzinfo=None).isoformat()
+        with open(auto_sitrep.ROUTING_HISTORY, "w") as f:
+            f.write(json.dumps({"timestamp": now, "success": True}) + "\n")
+            f.write(json.dumps({"timestamp": now, "success": False}) + "\n")
+        first = auto_sitrep.get_routing_outcomes(0)
+        self.assertEqual(first["days"], {self.today.date().isoformat(): {"routed": 2, "succeeded": 1}})
+
+        with open(auto_sitrep.ROUTING_HISTORY, "a") as f:
+            f.write(json.dumps({"timestamp": now, "success": True}) + "\n")
+            f.write('{"timestamp": "partial')
+        second = auto_sitrep.get_routing_outcomes(first["offset"])
+        self.assertEqual(second["days"][self.today.date().isoformat()], {"routed": 1, "succeeded": 1})
+        self.assertEqual(auto_sitrep.get_routing_outcomes(second["offset"])["days"], {})
+
+
+class TestRollups(SitrepTestCase):
+    """Multi-day SITREPs come from the cached daily aggregates."""
+
+    def test_weekly_rollup(self):
+        for days_ago in (10, 2, 2, 0):
+            self._commit(f"Work {days_ago} days ago", days_ago)
+        auto_sitrep.SESSION_PATH.write_text(json.dumps({
+            "session_id": "sess-1", "sprint": "sprint-x", "agents": {},
+            "tasks": {"task-001": {"id": "task-001", "status": "completed"}}, "compacted_tasks": 4
+        }))
+
+        sitrep = auto_sitrep.generate_sitrep(days=7)
+        self.assertIn("(7 days)", sitrep)
+        self.assertIn("**3 commits**", sitrep)
+        self.assertIn(f"| {self.today.date().isoformat()} | 1 | 0 | 5 | — |", sitrep)
+        two_days_ago = (self.today - timedelta(days=2)).date().isoformat()
+        self.assertIn(f"| {two_days_ago} | 2 | 0 | — | — |", sitrep)
+        self.assertNotIn("Work 10 days ago", sitrep)
+
+        # The cached days survive without git: a broken repository only loses new commits
+        shutil.rmtree(self.repo / ".git")
+        sitrep = auto_sitrep.generate_sitrep(days=7)
+        self.assertIn("git data unavailable", sitrep)
+        self.assertIn("**3 commits**", sitrep)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Unit tests for Federation analytics (fed-analytics.py, analytics_series.py).
+
+Usage:
+    python3 test_fed_analytics.py
+    python3 test_fed_analytics.py -v  # Verbose
+"""
+
+import importlib.util
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from analytics_series import RESOLUTIONS, TimeSeries, sparkline
+
+_spec = importlib.util.spec_from_file_location(
+    "fed_analytics", Path(__file__).parent / "fed-analytics.py"
+)
+fed_analytics = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(fed_analytics)
+
+PATHS = ("METRICS_FILE", "EVENTS_FILE", "LOCK_FILE", "SERIES_FILE")
+
+
+def record_worker(agent, count):
+    analytics = fed_analytics.AnalyticsSystem()
+    for n in range(count):
+        analytics.record_task(agent, "implementation", success=n % 4 != 0, duration_min=10)
+
+
+class AnalyticsTestCase(unittest.TestCase):
+    """Scratch metrics snapshot and event log per test."""
+
+    def setUp(self):
+        self._saved = {name: getattr(fed_analytics, name) for name in PATHS}
+        self.test_dir = Path(tempfile.mkdtemp())
+        fed_analytics.METRICS_FILE = self.test_dir / "metrics.json"
+        fed_analytics.EVENTS_FILE = self.test_dir / "analytics-events.jsonl"
+        fed_analytics.LOCK_FILE = self.test_dir / ".metrics.lock"
+        fed_analytics.SERIES_FILE = self.test_dir / "analytics-series.json"
+
+    def tearDown(self):
+        for name, value in self._saved.items():
+            setattr(fed_analytics, name, value)
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+
+class TestEventLog(AnalyticsTestCase):
+    """Recording appends to the event log; rollups materialize metrics.json."""
+
+    def test_record_appends_without_touching_snapshot(self):
+        analytics = fed_analytics.AnalyticsSystem()
+        analytics.record_task("kimi", "research", success=True, duration_min=5)
+        self.assertFalse(fed_analytics.METRICS_FILE.exists())
+        self.assertEqual(len(fed_analytics.EVENTS_FILE.read_text().splitlines()), 1)
+
+        self.assertEqual(analytics.rollup(), 1)
+        summary = analytics.get_agent_metrics("kimi")["summary"]
+        self.assertEqual((summary["total_tasks"], summary["success_rate"]), (1, 1.0))
+
+    def test_concurrent_recorders_lose_nothing(self):
+        context = multiprocessing.get_context("fork")
+        workers = [context.Process(target=record_worker, args=(agent, 50))
+                   for agent in ("kimi", "claude", "codex", "copilot")]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        analytics = fed_analytics.AnalyticsSystem()
+        self.assertEqual(analytics.rollup(), 200)
+        for agent in ("kimi", "claude", "codex", "copilot"):
+            data = analytics.metrics["agents"][agent]
+            self.assertEqual((data["total_tasks"], data["failed_tasks"]), (50, 13))
+        self.assertEqual(analytics.metrics["task_types"]["implementation"]["total_count"], 200)
+
+    def test_rollup_is_incremental(self):
+        analytics = fed_analytics.AnalyticsSystem()
+        for n in range(3):
+            analytics.record_task("kimi", "research", success=True)
+        self.assertEqual(analytics.rollup(), 3)
+        self.assertEqual(analytics.rollup(), 0)
+
+        analytics.record_task("kimi", "research", success=False, rework_required=True)
+        with open(fed_analytics.EVENTS_FILE, "a") as f:
+            f.write('{"agent": "partial')
+        self.assertEqual(fed_analytics.AnalyticsSystem().rollup(), 1)
+
+        saved = json.loads(fed_analytics.METRICS_FILE.read_text())
+        data = saved["agents"]["kimi"]
+        self.assertEqual((data["total_tasks"], data["rework_count"]), (4, 1))
+        self.assertFalse(saved["recent_tasks"][0]["success"])
+
+    def test_replaced_log_is_read_from_the_start(self):
+        analytics = fed_analytics.AnalyticsSystem()
+        analytics.record_task("kimi", "research", success=True)
+        analytics.rollup()
+        rotated = self.test_dir / "rotated.jsonl"
+        rotated.write_text("")
+        os.replace(rotated, fed_analytics.EVENTS_FILE)
+
+        analytics.record_task("codex", "research", success=True)
+        self.assertEqual(analytics.rollup(), 1)
+        self.assertEqual(analytics.metrics["agents"]["codex"]["total_tasks"], 1)
+
+    def test_recent_tasks_capped(self):
+        analytics = fed_analytics.AnalyticsSystem()
+        for n in range(fed_analytics.RECENT_TASKS + 20):
+            analytics.record_task("kimi", "research", success=True, notes=str(n))
+        analytics.rollup()
+
+        recent = json.loads(fed_analytics.METRICS_FILE.read_text())["recent_tasks"]
+        self.assertEqual(len(recent), fed_analytics.RECENT_TASKS)
+        self.assertEqual(recent[0]["notes"], str(fed_analytics.RECENT_TASKS + 19))
+
+    def test_optimize_sees_unfolded_tasks(self):
+        analytics = fed_analytics.AnalyticsSystem()
+        for n in range(fed_analytics.MIN_SAMPLES):
+            analytics.record_task("kimi", "research", success=True)
+        result = analytics.optimize_routing()
+        self.assertEqual(result["optimizations"][0]["action"], "boost")
+
+        saved = json.loads(fed_analytics.METRICS_FILE.read_text())
+        self.assertEqual(saved["agents"]["kimi"]["routing_boost"], fed_analytics.BOOST_AMOUNT)
+        self.assertEqual(len(saved["optimization_history"]), 1)
+
+
+class TestTimeSeries(AnalyticsTestCase):
+    """Minute/hour/day ring buffers behind the --window views."""
+
+    NOW = 1_800_000_000.0  # On a minute boundary
+
+    def test_windows_and_trends(self):
+        series = TimeSeries()
+        series.add(self.NOW - 30, "kimi", "research", True, duration_min=10)
+        series.add(self.NOW - 90, "kimi", "research", False, rework_required=True)
+        series.add(self.NOW - 2 * 3600, "codex", "implementation", True, duration_min=30)
+        series.add(self.NOW - 3 * 86400, "kimi", "implementation", True)
+
+        hour = series.totals("agents", "kimi", "1h", now=self.NOW)
+        self.assertEqual((hour["tasks"], hour["success_rate"], hour["rework_rate"]), (2, 0.5, 0.5))
+        self.assertEqual(series.totals("agents", None, "24h", now=self.NOW)["tasks"], 3)
+        self.assertEqual(series.totals("task_types", "implementation", "7d", now=self.NOW)["tasks"], 2)
+        self.assertEqual(series.keys("agents", "1h", now=self.NOW), ["kimi"])
+
+        trend = series.trend("agents", "kimi", "1h", "success_rate", now=self.NOW)
+        self.assertEqual(len(trend), 60)
+        self.assertEqual(trend[-3:], [0.0, 1.0, None])
+        self.assertEqual(trend[:-3], [None] * 57)
+        self.assertEqual(series.trend("agents", None, "7d", now=self.NOW), [0, 0, 0, 1, 0, 0, 3])
+        with self.assertRaises(ValueError):
+            series.trend("agents", "kimi", "1h", "vibes")
+
+    def test_slots_are_reused_in_place(self):
+        series = TimeSeries()
+        width, size = RESOLUTIONS["minute"]
+        series.add(self.NOW, "kimi", "research", True)
+        series.add(self.NOW + width * size, "kimi", "research", False)
+        series.add(self.NOW, "kimi", "research", True)  # Older than the ring reaches back
+
+        ring = series.rings["minute"]["agents"]["kimi"]
+        self.assertEqual(len(ring), 1)
+        later = self.NOW + width * size
+        self.assertEqual(series.totals("agents", "kimi", "1h", now=later)["successes"], 0)
+        self.assertEqual(series.totals("agents", "kimi", "1h", now=later)["tasks"], 1)
+
+    def test_saved_compactly_without_expired_buckets(self):
+        series = TimeSeries()
+        series.add(self.NOW - 2 * 86400, "kimi", "research", True)
+        series.add(self.NOW, "codex", "research", True)
+        path = self.test_dir / "series.json"
+        series.save(path, now=self.NOW)
+
+        saved = json.loads(path.read_text())
+        self.assertEqual(list(saved["rings"]["minute"]["agents"]), ["codex"])
+        self.assertEqual(sorted(saved["rings"]["day"]["agents"]), ["codex", "kimi"])
+        loaded = TimeSeries.load(path)
+        self.assertEqual(loaded.totals("agents", "kimi", "7d", now=self.NOW)["tasks"], 1)
+        self.assertEqual(loaded.totals("agents", "codex", "1h", now=self.NOW)["tasks"], 1)
+
+    def test_sparkline(self):
+        self.assertEqual(sparkline([0, 4, 8, None]), "▁▅█·")
+        self.assertEqual(sparkline([0.5, 1.0], high=1.0), "▅█")
+        self.assertEqual(sparkline([0, 0]), "▁▁")
+
+    def test_rollup_feeds_windowed_views(self):
+        analytics = fed_analytics.AnalyticsSystem()
+        for n in range(fed_analytics.MIN_SAMPLES):
+            analytics.record_task("kimi", "research", success=n > 0, duration_min=20)
+        analytics.rollup()
+
+        dashboard = fed_analytics.AnalyticsSystem().get_dashboard("24h")
+        self.assertEqual(dashboard["summary"]["total_tasks"], fed_analytics.MIN_SAMPLES)
+        self.assertEqual(dashboard["agent_rankings"][0]["agent"], "kimi")
+        self.assertEqual(dashboard["trends"]["tasks"][-1], fed_analytics.MIN_SAMPLES)
+        self.assertIn("📈 Trends (last 24h)", fed_analytics.format_dashboard(dashboard))
+
+        agent = fed_analytics.AnalyticsSystem().get_agent_metrics("kimi", "1h")
+        self.assertEqual(agent["summary"]["avg_duration_min"], 20)
+        self.assertIn("Trends (last 1h)", fed_analytics.format_agent_metrics(agent))
+
+    def test_deleted_series_is_rebuilt_without_refolding_metrics(self):
+        analytics = fed_analytics.AnalyticsSystem()
+        analytics.record_task("kimi", "research", success=True)
+        analytics.rollup()
+        fed_analytics.SERIES_FILE.unlink()
+        analytics.record_task("kimi", "research", success=True)
+
+        self.assertEqual(analytics.rollup(), 1)
+        self.assertEqual(analytics.metrics["agents"]["kimi"]["total_tasks"], 2)
+        self.assertEqual(analytics.series.totals("agents", "kimi", "1h")["tasks"], 2)
+        self.assertEqual(fed_analytics.AnalyticsSystem().get_dashboard("7d")["summary"]["total_tasks"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,748 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the Federation Queue library (federation_queue.py).
+
+Usage:
+    python3 test_fed_queue.py
+    python3 test_fed_queue.py -v  # Verbose
+"""
+
+import json
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+import federation_queue
+from queue_watch import QueueWatcher
+
+
+class QueueTestMixin:
+    """Behaviour shared by every storage backend."""
+
+    backend = None
+    codec = None
+
+    def setUp(self):
+        """Create a queue in a scratch directory."""
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.state_file = self.test_dir / "federation-state.json"
+        self.state_file.write_text(json.dumps({"queue": {}}))
+        self.queue = federation_queue.FederationQueue(
+            queue_dir=self.test_dir / "queue",
+            state_file=self.state_file,
+            backend=self.backend
+        )
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        self.queue.storage.close()
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_lifecycle(self):
+        """A task moves pending → in-progress → completed."""
+        task_id = self.queue.add("claude", "kimi", "Implement auth")
+        self.assertEqual(self.queue.status()["pending"], 1)
+
+        self.assertTrue(self.queue.start(task_id))
+        self.assertEqual(self.queue.get(task_id)["status"], "in-progress")
+
+        self.assertTrue(self.queue.complete(task_id, "auth.md"))
+        task = self.queue.get(task_id)
+        self.assertEqual(task["status"], "completed")
+        self.assertEqual(task["result"], "auth.md")
+        self.assertEqual(self.queue.status(), {
+            "pending": 0, "in_progress": 0, "completed": 1, "cancelled": 0,
+            "total": 1
+        })
+
+    def test_list_orders_by_priority(self):
+        """Listing sorts by priority, then creation time."""
+        low = self.queue.add("claude", "kimi", "Low task", priority="low")
+        high = self.queue.add("claude", "kimi", "High task", priority="high")
+        other = self.queue.add("copilot", "claude", "Other agent")
+        ids = [t["task_id"] for t in self.queue.list_tasks(agent="kimi")]
+        self.assertEqual(ids, [high, low])
+        self.assertIn(other, [t["task_id"] for t in self.queue.list_tasks(status="pending")])
+
+    def test_agent_overview(self):
+        """One read reports each agent's queued tasks and its next ready task."""
+        research = self.queue.add("claude", "claude", "Research", priority="low")
+        blocked = self.queue.add("claude", "kimi", "Implement", priority="critical", deps=[research])
+        ready = self.queue.add("copilot", "kimi", "Fix typo")
+        overview = self.queue.agent_overview()
+        self.assertEqual(sorted(overview), ["claude", "kimi"])
+        self.assertEqual([t["task_id"] for t in overview["kimi"]["queued"]], [blocked, ready])
+        self.assertEqual(overview["kimi"]["next"]["task_id"], ready)
+        self.assertEqual(overview["claude"]["next"]["task_id"], research)
+        self.assertEqual(self.queue.agent_overview("copilot")["copilot"]["next"]["task_id"], ready)
+        self.assertEqual(self.queue.agent_overview("codex"), {"codex": {"queued": [], "next": None}})
+
+    def test_next_waits_for_dependencies(self):
+        """A task is not offered until its dependencies are completed."""
+        first = self.queue.add("claude", "claude", "Research", priority="low")
+        second = self.queue.add("claude", "kimi", "Implement", priority="high", deps=[first])
+        self.assertIsNone(self.queue.next_task("kimi"))
+
+        self.queue.start(first)
+        self.queue.complete(first)
+        self.assertEqual(self.queue.next_task("kimi")["task_id"], second)
+
+    def test_completion_promotes_only_fully_released(self):
+        """A task with two dependencies becomes ready after the second completes."""
+        a = self.queue.add("claude", "claude", "Design")
+        b = self.queue.add("claude", "claude", "Research")
+        c = self.queue.add("claude", "kimi", "Implement", deps=[a, b])
+        for dep in (a, b):
+            self.assertIsNone(self.queue.next_task("kimi"))
+            self.assertFalse(self.queue.start(c))
+            self.queue.start(dep)
+            self.queue.complete(dep)
+        self.assertEqual(self.queue.get(c)["unmet_dependencies"], 0)
+        self.assertEqual(self.queue.next_task("kimi")["task_id"], c)
+
+    def test_next_orders_ready_tasks(self):
+        """next_task follows priority then age, and skips tasks already started."""
+        low = self.queue.add("claude", "kimi", "Low", priority="low")
+        high = self.queue.add("claude", "kimi", "High", priority="high")
+        self.queue.add("claude", "copilot", "Elsewhere", priority="critical")
+        self.assertEqual(self.queue.next_task("kimi")["task_id"], high)
+        self.queue.start(high)
+        self.assertEqual(self.queue.next_task("kimi")["task_id"], low)
+        self.assertEqual(self.queue.next_task()["priority"], "critical")
+
+    def test_next_matches_sender_as_well_as_assignee(self):
+        """next_task(agent) offers tasks agent sent, as the original CLI did."""
+        sent = self.queue.add("kimi", "claude", "Review my change", priority="high")
+        assigned = self.queue.add("claude", "kimi", "Implement")
+        self.queue.add("claude", "copilot", "Elsewhere", priority="critical")
+        self.assertEqual(self.queue.next_task("kimi")["task_id"], sent)
+        self.queue.start(sent)
+        self.assertEqual(self.queue.next_task("kimi")["task_id"], assigned)
+        self.assertEqual([t["task_id"] for t in self.queue.agent_overview("kimi")["kimi"]["queued"]], [assigned])
+
+    def test_claim_ignores_tasks_the_agent_sent(self):
+        """claim(agent) only leases work addressed to agent, never work it sent."""
+        sent = self.queue.add("kimi", "claude", "Review my change", priority="critical")
+        self.assertEqual(self.queue.next_task("kimi")["task_id"], sent)
+        self.assertIsNone(self.queue.claim("kimi", worker="kimi-1"))
+        self.assertEqual(self.queue.get(sent)["status"], "pending")
+
+        assigned = self.queue.add("claude", "kimi", "Implement")
+        self.assertEqual(self.queue.claim("kimi", worker="kimi-1")["task_id"], assigned)
+        self.assertEqual(self.queue.claim("claude", worker="claude-1")["task_id"], sent)
+
+    def test_missing_dependency_rejected(self):
+        """Adding a task that depends on an unknown ID fails without writing it."""
+        with self.assertRaises(federation_queue.DependencyError):
+            self.queue.add("claude", "kimi", "Implement", deps=["task-missing"])
+        self.assertEqual(self.queue.status()["total"], 0)
+
+    def test_cycle_rejected(self):
+        """Dependency cycles among new tasks are detected."""
+        with self.assertRaises(federation_queue.DependencyError):
+            self.queue._validate_dependencies({"t1": ["t2"], "t2": ["t3"], "t3": ["t1"]})
+        self.assertEqual(self.queue._validate_dependencies({"t1": [], "t2": ["t1"]}), {})
+
+    def test_graph_backfill_leaves_implied_tasks_alone(self):
+        """Opening an old queue rewrites only tasks whose graph fields are not the defaults."""
+        done = self.queue.add("claude", "claude", "Research")
+        self.queue.start(done)
+        self.queue.complete(done)
+        loose = self.queue.add("claude", "kimi", "Unrelated")
+        after = self.queue.add("claude", "kimi", "Follow up", deps=[done])
+        for task_id in (done, loose, after):
+            task = self.queue.get(task_id)
+            del task["dependents"], task["unmet_dependencies"]
+            self.queue.storage.save(task)
+        self.queue.storage.set_meta("graph_version", None)
+        self.queue.storage.close()
+
+        self.queue = federation_queue.FederationQueue(
+            queue_dir=self.test_dir / "queue", state_file=self.state_file, backend=self.backend
+        )
+        for task_id in (done, loose, after):
+            self.assertNotIn("dependents", self.queue.get(task_id))
+        self.assertEqual(self.queue.next_task("kimi")["task_id"], loose)
+
+    def test_graph_backfilled_for_old_tasks(self):
+        """Tasks written before the dependency graph existed are indexed on open."""
+        done = self.queue.add("claude", "claude", "Research")
+        waiting = self.queue.add("claude", "kimi", "Implement", deps=[done])
+        for task_id in (done, waiting):
+            task = self.queue.get(task_id)
+            del task["dependents"], task["unmet_dependencies"]
+            self.queue.storage.save(task)
+        self.queue.storage.set_meta("graph_version", None)
+        self.queue.storage.close()
+
+        self.queue = federation_queue.FederationQueue(
+            queue_dir=self.test_dir / "queue", state_file=self.state_file, backend=self.backend
+        )
+        self.assertEqual(self.queue.get(done)["dependents"], [waiting])
+        self.assertIsNone(self.queue.next_task("kimi"))
+        self.queue.start(done)
+        self.queue.complete(done)
+        self.assertEqual(self.queue.next_task("kimi")["task_id"], waiting)
+
+    def test_add_many_resolves_forward_refs(self):
+        """Batch entries may depend on refs defined later in the batch or on existing IDs."""
+        done = self.queue.add("claude", "claude", "Research")
+        self.queue.start(done)
+        self.queue.complete(done)
+        ids = self.queue.add_many([
+            {"from_agent": "claude", "to_agent": "kimi", "task": "Implement", "deps": ["design", done]},
+            {"ref": "design", "from_agent": "claude", "to_agent": "claude", "task": "Design"},
+        ])
+        implement = self.queue.get(ids[0])
+        self.assertEqual(implement["dependencies"], [ids[1], done])
+        self.assertEqual(implement["unmet_dependencies"], 1)
+        self.assertEqual(self.queue.get(ids[1])["dependents"], [ids[0]])
+        self.assertEqual(self.queue.next_task()["task_id"], ids[1])
+
+    def test_add_many_rejects_cycle_atomically(self):
+        """A cyclic batch writes nothing."""
+        with self.assertRaises(federation_queue.DependencyError):
+            self.queue.add_many([
+                {"ref": "a", "from_agent": "claude", "to_agent": "kimi", "task": "A", "deps": ["b"]},
+                {"ref": "b", "from_agent": "claude", "to_agent": "kimi", "task": "B", "deps": ["a"]},
+            ])
+        self.assertEqual(self.queue.status()["total"], 0)
+
+    def test_add_many_rejects_non_object_entry(self):
+        """An entry that is not an object is a ValueError and writes nothing."""
+        with self.assertRaises(ValueError):
+            self.queue.add_many([
+                {"from_agent": "claude", "to_agent": "kimi", "task": "A"},
+                ["kimi", "claude", "x"],
+            ])
+        self.assertEqual(self.queue.status()["total"], 0)
+
+    def test_add_many_updates_state_once(self):
+        """A batch rewrites the state file once, with the final counts."""
+        calls = []
+        update_state = self.queue._update_state
+        self.queue._update_state = lambda: (calls.append(1), update_state())
+        self.queue.add_many([
+            {"from_agent": "claude", "to_agent": "kimi", "task": f"Task {i}"} for i in range(10)
+        ])
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(json.loads(self.state_file.read_text())["queue"]["pending_count"], 10)
+
+    def test_journal_counts_match_replay(self):
+        """Counters follow every transition and agree with a full replay."""
+        a = self.queue.add("claude", "kimi", "A")
+        b = self.queue.add("claude", "kimi", "B")
+        self.queue.add("kimi", "claude", "C")
+        self.queue.start(a)
+        self.queue.complete(a)
+        self.queue.cancel(b)
+        self.assertEqual(self.queue.status(), {
+            "pending": 1, "in_progress": 0, "completed": 1, "cancelled": 1,
+            "total": 3
+        })
+        live = self.queue.journal.counters()
+        self.assertEqual(live["agents"]["kimi"]["cancelled"], 1)
+        self.assertEqual(self.queue.journal.rebuild(), live)
+        events = [e["event"] for e in self.queue.journal.replay(since=live["seq"] - 3)]
+        self.assertEqual(events, ["start", "complete", "cancel"])
+
+    def test_cancel_removes_task(self):
+        """Cancelled tasks leave the queue but keep their record."""
+        task_id = self.queue.add("claude", "kimi", "Implement auth")
+        self.assertTrue(self.queue.cancel(task_id))
+        self.assertEqual(self.queue.get(task_id)["status"], "cancelled")
+        self.assertIsNone(self.queue.next_task("kimi"))
+        status = self.queue.status()
+        self.assertEqual((status["pending"], status["cancelled"], status["total"]), (0, 1, 1))
+        self.assertFalse(self.queue.cancel(task_id))
+
+    def test_compact_archives_old_finished_tasks(self):
+        """Old completed and cancelled tasks move to the archive and still resolve by ID."""
+        done = self.queue.add("claude", "claude", "Research")
+        self.queue.start(done)
+        self.queue.complete(done)
+        dropped = self.queue.add("claude", "kimi", "Obsolete")
+        self.queue.cancel(dropped)
+        recent = self.queue.add("claude", "claude", "Fresh")
+        self.queue.start(recent)
+        self.queue.complete(recent)
+
+        for task_id in (done, dropped):
+            task = self.queue.get(task_id)
+            task["completed_at" if task["status"] == "completed" else "cancelled_at"] = "2026-01-01T00:00:00"
+            self.queue.storage.save(task)
+
+        report = self.queue.compact(older_than_days=7, codec=self.codec)
+        self.assertEqual(report["archived"], 2)
+        self.assertEqual(self.queue.storage.count_by_status()["completed"], 1)
+        self.assertEqual(self.queue.storage.count_by_status()["cancelled"], 0)
+        self.assertEqual(self.queue.get(done)["description"], "Research")
+        self.assertEqual(self.queue.get(dropped)["status"], "cancelled")
+        self.assertEqual(self.queue.status()["completed"], 2)
+
+        # Archived tasks still satisfy dependencies
+        follow_up = self.queue.add("claude", "kimi", "Build on research", deps=[done])
+        self.assertEqual(self.queue.next_task("kimi")["task_id"], follow_up)
+        with self.assertRaises(federation_queue.DependencyError):
+            self.queue.add("claude", "kimi", "Build on obsolete", deps=[dropped])
+
+
+class LeaseTestMixin:
+    """Claim, heartbeat and redelivery, shared by every storage backend."""
+
+    backend = None
+
+    def setUp(self):
+        """Create a queue in a scratch directory."""
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.state_file = self.test_dir / "federation-state.json"
+        self.state_file.write_text(json.dumps({"queue": {}}))
+        self.queue = self._open()
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        self.queue.storage.close()
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def _open(self):
+        return federation_queue.FederationQueue(
+            queue_dir=self.test_dir / "queue", state_file=self.state_file, backend=self.backend
+        )
+
+    def test_concurrent_claims_never_share_a_task(self):
+        """Workers with their own queue handles each get distinct tasks."""
+        for i in range(20):
+            self.queue.add("claude", "kimi", f"Task {i}")
+        claimed, lock = [], threading.Lock()
+
+        def work(n):
+            queue = self._open()
+            while True:
+                task = queue.claim("kimi", worker=f"w{n}")
+                if not task:
+                    break
+                with lock:
+                    claimed.append(task["task_id"])
+            queue.storage.close()
+
+        threads = [threading.Thread(target=work, args=(n,)) for n in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(len(claimed), 20)
+        self.assertEqual(len(set(claimed)), 20)
+        self.assertEqual(self.queue.status()["in_progress"], 20)
+
+    def test_expired_lease_redelivered(self):
+        """A task whose lease lapses goes to the next claimant; the old worker is locked out."""
+        task_id = self.queue.add("claude", "kimi", "Implement auth")
+        first = self.queue.claim("kimi", worker="w1", ttl=0)
+        self.assertEqual(first["task_id"], task_id)
+
+        second = self.queue.claim("kimi", worker="w2")
+        self.assertEqual(second["task_id"], task_id)
+        self.assertEqual(second["deliveries"], 2)
+        self.assertFalse(self.queue.complete(task_id, worker="w1"))
+        self.assertTrue(self.queue.complete(task_id, worker="w2"))
+        self.assertNotIn("lease", self.queue.get(task_id))
+
+    def test_heartbeat_extends_lease(self):
+        """Only the holder can extend a lease, and an extended lease is not reaped."""
+        task_id = self.queue.add("claude", "kimi", "Implement auth")
+        self.queue.claim("kimi", worker="w1", ttl=0)
+        self.assertFalse(self.queue.heartbeat(task_id, "w2"))
+        self.assertTrue(self.queue.heartbeat(task_id, "w1", ttl=60))
+        self.assertEqual(self.queue.reap_expired(), [])
+        self.assertIsNone(self.queue.claim("kimi", worker="w2"))
+
+    def test_unleased_start_never_expires(self):
+        """A plain start keeps the task in progress until it is completed."""
+        task_id = self.queue.add("claude", "kimi", "Implement auth")
+        self.assertTrue(self.queue.start(task_id))
+        self.assertEqual(self.queue.reap_expired(), [])
+        self.assertFalse(self.queue.start(task_id))
+
+
+class TestFileQueue(QueueTestMixin, unittest.TestCase):
+    backend = "files"
+    codec = "gzip"
+
+
+class TestSQLiteQueue(QueueTestMixin, unittest.TestCase):
+    backend = "sqlite"
+    codec = "lzma"
+
+
+class WaitTestMixin:
+    """Long-poll consumption, shared by every storage backend."""
+
+    backend = None
+    use_inotify = True
+
+    def setUp(self):
+        """Create a queue in a scratch directory."""
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.state_file = self.test_dir / "federation-state.json"
+        self.state_file.write_text(json.dumps({"queue": {}}))
+        self.queue = self._open()
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        self.queue.storage.close()
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def _open(self):
+        return federation_queue.FederationQueue(
+            queue_dir=self.test_dir / "queue", state_file=self.state_file, backend=self.backend
+        )
+
+    def _add_later(self, delay=0.1, **kwargs):
+        def add():
+            time.sleep(delay)
+            producer = self._open()
+            producer.add("claude", "kimi", "Implement auth", **kwargs)
+            producer.storage.close()
+        thread = threading.Thread(target=add)
+        thread.start()
+        return thread
+
+    def test_watcher_wakes_on_add(self):
+        """A task added by another process wakes the watcher well before the timeout."""
+        watcher = QueueWatcher(self.queue.storage, use_inotify=self.use_inotify)
+        thread = self._add_later()
+        started = time.monotonic()
+        self.assertTrue(watcher.wait(timeout=5))
+        self.assertLess(time.monotonic() - started, 2)
+        thread.join()
+        watcher.close()
+
+    def test_wait_claims_new_task(self):
+        """wait_for_task returns a task that arrives while waiting, claimed if asked."""
+        thread = self._add_later()
+        task = self.queue.wait_for_task("kimi", timeout=5, claim=True, worker="w1")
+        thread.join()
+        self.assertEqual(task["status"], "in-progress")
+        self.assertEqual(task["lease"]["worker"], "w1")
+
+    def test_wait_times_out(self):
+        """Waiting with nothing ready gives up after the timeout."""
+        self.queue.add("claude", "copilot", "Someone else's task")
+        started = time.monotonic()
+        self.assertIsNone(self.queue.wait_for_task("kimi", timeout=0.2))
+        self.assertLess(time.monotonic() - started, 1)
+
+
+class TestFileWait(WaitTestMixin, unittest.TestCase):
+    backend = "files"
+
+
+class TestFileWaitPolling(WaitTestMixin, unittest.TestCase):
+    backend = "files"
+    use_inotify = False
+
+
+class TestSQLiteWait(WaitTestMixin, unittest.TestCase):
+    backend = "sqlite"
+
+
+class TestSQLiteWaitPolling(WaitTestMixin, unittest.TestCase):
+    backend = "sqlite"
+    use_inotify = False
+
+
+class TestFileLeases(LeaseTestMixin, unittest.TestCase):
+    backend = "files"
+
+
+class TestSQLiteLeases(LeaseTestMixin, unittest.TestCase):
+    backend = "sqlite"
+
+
+class SchedulingTestMixin:
+    """Scheduling policies, shared by every storage backend."""
+
+    backend = None
+
+    def setUp(self):
+        """Create a scratch directory; each test opens the queue with its policy."""
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.state_file = self.test_dir / "federation-state.json"
+        self.state_file.write_text(json.dumps({"queue": {}}))
+        self.queue = None
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        if self.queue:
+            self.queue.storage.close()
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def _open(self, policy, **scheduler):
+        if scheduler:
+            self.state_file.write_text(json.dumps({"queue": {"scheduler": scheduler}}))
+        self.queue = federation_queue.FederationQueue(
+            queue_dir=self.test_dir / "queue", state_file=self.state_file,
+            backend=self.backend, policy=policy
+        )
+        return self.queue
+
+    def _backdate(self, task_id, hours):
+        task = self.queue.get(task_id)
+        task["created_at"] = (datetime.now() - timedelta(hours=hours)).isoformat()
+        self.queue.storage.save(task, "pending")
+
+    def _drain(self, count):
+        return [self.queue.claim("kimi", worker="w")["from_agent"] for _ in range(count)]
+
+    def test_priority_policy_lets_a_flood_starve_others(self):
+        """The default order serves a flooding producer's backlog first."""
+        queue = self._open("priority")
+        queue.add_many([{"from_agent": "flood", "to_agent": "kimi", "task": f"F{i}"} for i in range(6)])
+        queue.add("claude", "kimi", "Late but important to claude")
+        self.assertEqual(self._drain(6), ["flood"] * 6)
+
+    def test_fair_policy_interleaves_producers(self):
+        """Weighted fair queuing alternates producers regardless of backlog size."""
+        queue = self._open("fair")
+        queue.add_many([{"from_agent": "flood", "to_agent": "kimi", "task": f"F{i}"} for i in range(6)])
+        queue.add_many([{"from_agent": "claude", "to_agent": "kimi", "task": f"C{i}"} for i in range(2)])
+        self.assertEqual(self._drain(5), ["flood", "claude", "flood", "claude", "flood"])
+
+    def test_fair_policy_honours_weights(self):
+        """A producer with weight 2 is served twice as often as one with weight 1."""
+        queue = self._open("fair", weights={"claude": 2})
+        queue.add_many([{"from_agent": "flood", "to_agent": "kimi", "task": f"F{i}"} for i in range(6)])
+        queue.add_many([{"from_agent": "claude", "to_agent": "kimi", "task": f"C{i}"} for i in range(6)])
+        self.assertEqual(self._drain(6).count("claude"), 4)
+
+    def test_aging_lifts_old_low_priority_tasks(self):
+        """A low-priority task that has waited long enough outranks fresh high-priority work."""
+        queue = self._open("aging", aging_minutes=60)
+        old = queue.add("claude", "kimi", "Old chore", priority="low")
+        queue.add("claude", "kimi", "Fresh work", priority="high")
+        self.assertNotEqual(queue.next_task("kimi")["task_id"], old)
+        self._backdate(old, hours=3)
+        self.assertEqual(queue.next_task("kimi")["task_id"], old)
+
+    def test_earliest_deadline_breaks_ties(self):
+        """Among equal priorities, the earliest deadline goes first."""
+        queue = self._open("aging")
+        queue.add("claude", "kimi", "No deadline")
+        later = queue.add("claude", "kimi", "Later", deadline="2030-01-02T00:00:00")
+        sooner = queue.add("claude", "kimi", "Sooner", deadline="2030-01-01T00:00:00")
+        self.assertEqual([queue.claim("kimi")["task_id"] for _ in range(2)], [sooner, later])
+        with self.assertRaises(ValueError):
+            queue.add("claude", "kimi", "Bad", deadline="next tuesday")
+
+    def test_wait_report(self):
+        """Wait percentiles cover started tasks, grouped by the requested field."""
+        queue = self._open("priority")
+        ids = [queue.add("claude" if i < 3 else "copilot", "kimi", f"T{i}") for i in range(4)]
+        queue.add("claude", "kimi", "Never started")
+        for task_id in ids:
+            queue.start(task_id)
+        report = queue.wait_report()
+        self.assertEqual(report["policy"], "priority")
+        self.assertEqual(report["overall"]["count"], 4)
+        self.assertEqual({name: g["count"] for name, g in report["groups"].items()},
+                         {"claude": 3, "copilot": 1})
+        self.assertGreaterEqual(report["overall"]["p90"], report["overall"]["p50"])
+
+
+class TestFileScheduling(SchedulingTestMixin, unittest.TestCase):
+    backend = "files"
+
+
+class TestSQLiteScheduling(SchedulingTestMixin, unittest.TestCase):
+    backend = "sqlite"
+
+
+class TestQueueJournal(unittest.TestCase):
+    """Test cases for the queue event journal."""
+
+    def setUp(self):
+        """Set up a scratch queue directory."""
+        self.test_dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def _add(self, n):
+        return {"event": "add", "task_id": f"task-{n}", "agent": "kimi",
+                "old_status": None, "new_status": "pending"}
+
+    def test_segments_roll_and_replay_from_offset(self):
+        """Events spill into new segments; replay can start anywhere."""
+        journal = federation_queue.QueueJournal(self.test_dir, fsync="never", segment_events=3)
+        journal.append([self._add(n) for n in range(5)])
+        journal.append([self._add(n) for n in range(5, 8)])
+        self.assertEqual(len(list((self.test_dir / "journal").glob("segment-*.jsonl"))), 3)
+        self.assertEqual([e["seq"] for e in journal.replay(since=5)], [6, 7, 8])
+        self.assertEqual(journal.counters()["status"]["pending"], 8)
+
+    def test_unrecorded_tail_applied_on_load(self):
+        """Events appended before a crash, but not yet in counters.json, still count."""
+        journal = federation_queue.QueueJournal(self.test_dir, fsync="never", segment_events=2)
+        journal.append([self._add(0)])
+        counters_before = (self.test_dir / "journal" / "counters.json").read_text()
+        journal.append([self._add(n) for n in range(1, 4)])
+        (self.test_dir / "journal" / "counters.json").write_text(counters_before)
+
+        counters = federation_queue.QueueJournal(self.test_dir).counters()
+        self.assertEqual(counters["seq"], 4)
+        self.assertEqual(counters["agents"]["kimi"]["pending"], 4)
+
+    def test_existing_queue_starts_with_snapshot(self):
+        """Opening a queue that predates the journal records its current counts."""
+        state_file = self.test_dir / "federation-state.json"
+        queue = federation_queue.FederationQueue(queue_dir=self.test_dir / "queue",
+                                          state_file=state_file, backend="files")
+        queue.add("claude", "kimi", "Implement auth")
+        queue.storage.close()
+        shutil.rmtree(self.test_dir / "queue" / "journal")
+
+        reopened = federation_queue.FederationQueue(queue_dir=self.test_dir / "queue",
+                                             state_file=state_file, backend="files")
+        self.assertEqual(reopened.status()["pending"], 1)
+        self.assertEqual(next(reopened.journal.replay())["event"], "snapshot")
+        reopened.storage.close()
+
+
+class TestTaskArchive(unittest.TestCase):
+    """Test cases for compressed archive segments."""
+
+    def setUp(self):
+        """Set up a scratch queue directory."""
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.archive = federation_queue.TaskArchive(self.test_dir)
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def _task(self, day, n):
+        return {"task_id": f"task-{day}-120000-{n:04d}", "status": "completed", "description": f"Task {n}"}
+
+    def test_runs_append_members_and_keep_day_codec(self):
+        """Later runs add members to a day's segment using the codec it started with."""
+        self.archive.add([self._task("20260101", 1), self._task("20260102", 2)], codec="lzma")
+        self.archive.add([self._task("20260101", 3)], codec="gzip")
+        self.assertEqual(self.archive.days(), ["2026-01-01", "2026-01-02"])
+        self.assertTrue((self.test_dir / "archived" / "2026-01-01.jsonl.xz").exists())
+        self.assertEqual(self.archive.load("task-20260101-120000-0003")["description"], "Task 3")
+
+        reopened = federation_queue.TaskArchive(self.test_dir)
+        self.assertEqual(reopened.load("task-20260101-120000-0001")["description"], "Task 1")
+        self.assertIsNone(reopened.load("task-20260101-120000-0009"))
+        self.assertEqual(reopened.stats()["tasks"], 3)
+
+    def test_loose_files_load_and_import(self):
+        """Loose task files in archived/ resolve by ID until imported into the segments."""
+        self.archive.add([self._task("20260101", 1)])
+        loose = self._task("20260101", 2)
+        (self.test_dir / "archived" / f"{loose['task_id']}.json").write_text(json.dumps(loose))
+        self.assertEqual(self.archive.load(loose["task_id"])["description"], "Task 2")
+        self.assertEqual(list(self.archive.task_ids()), ["task-20260101-120000-0001", loose["task_id"]])
+
+        self.assertEqual(self.archive.import_loose(), 1)
+        self.assertFalse((self.test_dir / "archived" / f"{loose['task_id']}.json").exists())
+        self.assertEqual(self.archive.load(loose["task_id"])["description"], "Task 2")
+        self.assertEqual(self.archive.stats()["tasks"], 2)
+        self.assertEqual(self.archive.stats()["loose"], 0)
+
+
+class TestStorageMigration(unittest.TestCase):
+    """Test cases for moving tasks between backends."""
+
+    def setUp(self):
+        """Set up a file-backed queue with a few tasks."""
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.state_file = self.test_dir / "federation-state.json"
+        self.state_file.write_text(json.dumps({"queue": {}}))
+        self.queue = federation_queue.FederationQueue(
+            queue_dir=self.test_dir / "queue", state_file=self.state_file, backend="files"
+        )
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        self.queue.storage.close()
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_migrate_files_to_sqlite(self):
+        """Migration preserves tasks and records the new backend in state."""
+        done = self.queue.add("claude", "claude", "Research")
+        self.queue.start(done)
+        self.queue.complete(done)
+        self.queue.add("claude", "kimi", "Implement", deps=[done])
+        before = self.queue.list_tasks()
+
+        self.assertEqual(self.queue.migrate_storage("sqlite"), 2)
+        self.assertEqual(self.queue.storage.name, "sqlite")
+        self.assertEqual(json.loads(self.state_file.read_text())["queue"]["storage"], "sqlite")
+
+        reopened = federation_queue.FederationQueue(queue_dir=self.test_dir / "queue", state_file=self.state_file)
+        self.assertEqual(reopened.storage.name, "sqlite")
+        self.assertEqual(reopened.list_tasks(), before)
+        reopened.storage.close()
+
+        # The source files are removed, so nothing reads stale copies of the tasks
+        for status in ("pending", "completed"):
+            self.assertEqual(list((self.test_dir / "queue" / status).glob("task-*.json")), [])
+
+
+class TestTaskIdAllocator(unittest.TestCase):
+    """Test cases for queue task ID generation."""
+
+    def setUp(self):
+        """Set up a scratch queue directory."""
+        self.test_dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_concurrent_ids_unique_and_ordered(self):
+        """Concurrent allocators never hand out the same ID, and IDs sort by allocation."""
+        ids, lock = [], threading.Lock()
+
+        def allocate():
+            allocator = federation_queue.TaskIdAllocator(self.test_dir)
+            for _ in range(50):
+                task_id = allocator.next_id()
+                with lock:
+                    ids.append(task_id)
+
+        threads = [threading.Thread(target=allocate) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(len(set(ids)), 200)
+        by_seq = sorted(ids, key=lambda i: int(i.rsplit("-", 1)[1]))
+        self.assertEqual(by_seq, sorted(ids))
+
+    def test_seed_continues_existing_sequence(self):
+        """A new counter starts after the tasks already in the queue."""
+        allocator = federation_queue.TaskIdAllocator(self.test_dir, seed=lambda: 41)
+        self.assertTrue(allocator.next_id().endswith("-00000042"))
+        self.assertTrue(allocator.next_id().endswith("-00000043"))
+
+    def test_ids_sort_past_four_digits(self):
+        """IDs allocated across the old 9999 boundary still sort in allocation order."""
+        allocator = federation_queue.TaskIdAllocator(self.test_dir, seed=lambda: 9997)
+        ids = allocator.next_ids(4)
+        self.assertEqual([int(i.rsplit("-", 1)[1]) for i in ids], [9998, 9999, 10000, 10001])
+        self.assertEqual(sorted(ids), ids)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Unit tests for Federation session sync (federation_sync.py, heartbeat_table.py,
+session_history.py).
+
+Usage:
+    python3 test_federation_sync.py
+    python3 test_federation_sync.py -v  # Verbose
+"""
+
+import io
+import json
+import multiprocessing
+import shutil
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).parent))
+import federation_sync
+import heartbeat_table
+from session_history import SessionHistory
+
+
+def use_federation_dir(root: Path):
+    """Point every federation_sync path at a scratch directory."""
+    federation_sync.FEDERATION_DIR = root
+    federation_sync.SESSIONS_DIR = root / "sessions"
+    federation_sync.HISTORY_DIR = root / "history"
+    federation_sync.AGENTS_DIR = root / "agents"
+    federation_sync.ACTIVE_SESSION_PATH = federation_sync.SESSIONS_DIR / "active-session.json"
+    federation_sync.LOCK_PATH = federation_sync.SESSIONS_DIR / ".session.lock"
+    federation_sync.HEARTBEAT_PATH = federation_sync.SESSIONS_DIR / "heartbeats.bin"
+    federation_sync.CONFLICTS_PATH = federation_sync.SESSIONS_DIR / ".conflicts"
+
+
+def heartbeat_worker(agent, count):
+    for n in range(count):
+        federation_sync.update_agent_status(agent, "active", f"{agent}-{n}")
+
+
+class SyncTestCase(unittest.TestCase):
+    """Scratch federation directory per test."""
+
+    def setUp(self):
+        self._saved = {name: getattr(federation_sync, name) for name in (
+            "FEDERATION_DIR", "SESSIONS_DIR", "HISTORY_DIR", "AGENTS_DIR", "ACTIVE_SESSION_PATH", "LOCK_PATH",
+            "HEARTBEAT_PATH", "CONFLICTS_PATH"
+        )}
+        self.test_dir = Path(tempfile.mkdtemp())
+        use_federation_dir(self.test_dir)
+
+    def tearDown(self):
+        table = heartbeat_table._tables.pop(federation_sync.HEARTBEAT_PATH, None)
+        if table:
+            table.close()
+        for name, value in self._saved.items():
+            setattr(federation_sync, name, value)
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+
+class TestFieldPatches(SyncTestCase):
+    """Field-level patches under the session lock."""
+
+    def test_concurrent_agents_never_lose_updates(self):
+        """Five processes heart-beating at once each end with their own last update."""
+        federation_sync.create_session("sprint-x")
+        context = multiprocessing.get_context("fork")
+        workers = [context.Process(target=heartbeat_worker, args=(agent, 40))
+                   for agent in ("kimi", "claude", "copilot", "codex", "ollama")]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        session = federation_sync.refresh_session()
+        for agent in ("kimi", "claude", "copilot", "codex", "ollama"):
+            self.assertEqual(session["agents"][agent]["current_task"], f"{agent}-39")
+        self.assertEqual(federation_sync.sync_stats()["conflicts"], 0)
+
+    def test_patch_leaves_other_fields_alone(self):
+        federation_sync.create_session("sprint-x")
+        task_id = federation_sync.add_task("Build feature", "codex", "high")
+        federation_sync.patch_session({"router.accuracy": 0.9, "agents.kimi.status": "active"})
+
+        session = federation_sync.read_session()
+        self.assertEqual(session["router"]["version"], "v3")
+        self.assertEqual(session["router"]["accuracy"], 0.9)
+        self.assertEqual(session["agents"]["kimi"]["status"], "active")
+        self.assertEqual(session["agents"]["kimi"]["current_task"], None)
+        self.assertEqual(list(session["tasks"]), [task_id])
+
+    def test_stale_whole_document_write_is_counted_as_conflict(self):
+        federation_sync.create_session("sprint-x")
+        stale = federation_sync.read_session()
+        federation_sync.update_agent_status("claude", "active", "Review")
+
+        federation_sync.add_task("Fold the heartbeat in", "claude")
+
+        stale["owner"] = "codex"
+        before = federation_sync.ACTIVE_SESSION_PATH.read_text()
+        self.assertFalse(federation_sync.write_session(stale))
+        self.assertEqual(federation_sync.ACTIVE_SESSION_PATH.read_text(), before)
+        self.assertEqual(federation_sync.sync_stats()["conflicts"], 1)
+
+        fresh = federation_sync.read_session()
+        fresh["owner"] = "codex"
+        self.assertTrue(federation_sync.write_session(fresh))
+        session = federation_sync.read_session()
+        self.assertEqual(session["agents"]["claude"]["status"], "active")
+        self.assertEqual(session["sync"]["conflicts"], 1)
+        self.assertEqual(federation_sync.sync_stats()["conflicts"], 1)
+
+    def test_missing_task_update_writes_nothing(self):
+        federation_sync.create_session("sprint-x")
+        federation_sync.add_task("One", "kimi")
+        before = federation_sync.ACTIVE_SESSION_PATH.read_text()
+        self.assertFalse(federation_sync.update_task_status("task-404", "completed"))
+        self.assertEqual(federation_sync.ACTIVE_SESSION_PATH.read_text(), before)
+        self.assertEqual(federation_sync.sync_stats()["patches"], 1)
+
+    def test_updates_auto_create_session(self):
+        federation_sync.update_agent_status("kimi", "active", "Start")
+        session = federation_sync.read_session()
+        self.assertEqual(session["sprint"], "auto-created")
+        self.assertEqual(session["agents"]["kimi"]["current_task"], "Start")
+
+
+class TestHeartbeatTable(SyncTestCase):
+    """Heartbeats go to the slot table; the session JSON catches up lazily."""
+
+    def test_heartbeat_does_not_rewrite_session_within_refresh_window(self):
+        federation_sync.update_agent_status("kimi", "active", "First")  # Creates the session
+        written = federation_sync.read_session()["updated_at"]
+
+        federation_sync.update_agent_status("kimi", "active", "Second")
+        self.assertEqual(federation_sync.read_session()["updated_at"], written)
+        self.assertEqual(federation_sync.read_session()["agents"]["kimi"]["current_task"], "First")
+
+        out = io.StringIO()
+        with redirect_stdout(out):
+            federation_sync.get_status()
+        self.assertIn("Second", out.getvalue())
+
+        federation_sync.add_task("Any write folds heartbeats in", "codex")
+        self.assertEqual(federation_sync.read_session()["agents"]["kimi"]["current_task"], "Second")
+
+    def test_free_form_status_kept_in_session(self):
+        """Statuses the table has no code for are stored as given, until the next known one."""
+        federation_sync.update_agent_status("kimi", "active", "First")
+        federation_sync.update_agent_status("kimi", "sleeping", "Nap")
+        agent = federation_sync.read_session()["agents"]["kimi"]
+        self.assertEqual((agent["status"], agent["current_task"]), ("sleeping", "Nap"))
+        self.assertEqual(federation_sync.refresh_session()["agents"]["kimi"]["status"], "sleeping")
+
+        federation_sync.update_agent_status("kimi", "idle")
+        self.assertEqual(federation_sync.refresh_session()["agents"]["kimi"]["status"], "idle")
+
+    def test_stale_table_is_folded_by_next_heartbeat(self):
+        federation_sync.update_agent_status("kimi", "active", "First")
+        table = heartbeat_table.open_table(federation_sync.HEARTBEAT_PATH)
+        table.mark_folded(table.folded_at - federation_sync.HEARTBEAT_REFRESH_SECONDS)
+
+        federation_sync.update_agent_status("kimi", "idle")
+        agent = federation_sync.read_session()["agents"]["kimi"]
+        self.assertEqual((agent["status"], agent["current_task"]), ("idle", None))
+
+    def test_slots_are_shared_and_stable(self):
+        path = federation_sync.HEARTBEAT_PATH
+        first = heartbeat_table.HeartbeatTable(path)
+        second = heartbeat_table.HeartbeatTable(path)
+        first.beat("kimi", "active", "x" * 200)
+        second.beat("claude", "standby")
+        self.assertEqual(second.slot("kimi"), first.slot("kimi"))
+        self.assertNotEqual(first.slot("claude"), first.slot("kimi"))
+
+        beats = first.read_all()
+        self.assertEqual(beats["kimi"]["current_task"], "x" * heartbeat_table.TASK_BYTES)
+        self.assertEqual(beats["claude"], second.read_all()["claude"])
+        self.assertEqual(beats["claude"]["status"], "standby")
+        with self.assertRaises(ValueError):
+            first.beat("kimi", "sleeping")
+        first.close()
+        second.close()
+
+    def test_torn_slot_reads_stale_until_rewritten(self):
+        """A slot left mid-write by a dead writer does not hang readers; the next beat repairs it."""
+        table = heartbeat_table.HeartbeatTable(federation_sync.HEARTBEAT_PATH)
+        table.beat("kimi", "active", "Build")
+        table.beat("claude", "idle")
+        slot = table.slot("kimi")
+        offset = table._offset(slot)
+        seq = heartbeat_table._SEQ.unpack_from(table._mm, offset)[0]
+        heartbeat_table._SEQ.pack_into(table._mm, offset, seq + 1)
+
+        self.assertEqual(list(table.read_all()), ["claude"])
+        reopened = heartbeat_table.HeartbeatTable(federation_sync.HEARTBEAT_PATH)
+        self.assertEqual(reopened.slot("kimi"), slot)  # Still owned, not reclaimed as free
+        reopened.close()
+
+        table.beat("kimi", "standby", "Resume")
+        self.assertEqual(heartbeat_table._SEQ.unpack_from(table._mm, offset)[0] % 2, 0)
+        self.assertEqual(table.read_all()["kimi"]["current_task"], "Resume")
+        table.close()
+
+
+class TestTaskIndex(SyncTestCase):
+    """Tasks keyed by ID, compaction of completed tasks, and the history store."""
+
+    def _history(self):
+        history = SessionHistory(federation_sync.HISTORY_DIR)
+        self.addCleanup(history.close)
+        return history
+
+    def test_tasks_keyed_by_id(self):
+        federation_sync.create_session("sprint-x")
+        first = federation_sync.add_task("One", "kimi")
+        second = federation_sync.add_task("Two", "codex")
+        self.assertEqual((first, second), ("task-001", "task-002"))
+
+        self.assertTrue(federation_sync.update_task_status(second, "completed", completed=True))
+        self.assertFalse(federation_sync.update_task_status("task-404", "completed"))
+        tasks = federation_sync.read_session()["tasks"]
+        self.assertEqual(tasks[second]["status"], "completed")
+        self.assertIn("completed_at", tasks[second])
+
+    def test_list_sessions_are_converted_on_write(self):
+        session = federation_sync.new_session("sprint-x")
+        session["tasks"] = [{"id": "task-001", "description": "Old", "assigned_to": "kimi",
+                             "status": "pending", "priority": "medium", "created_at": session["created_at"]}]
+        del session["next_task"]
+        federation_sync.ensure_dirs()
+        federation_sync.ACTIVE_SESSION_PATH.write_text(json.dumps(session))
+
+        self.assertEqual(federation_sync.add_task("New", "kimi"), "task-002")
+        self.assertEqual(list(federation_sync.read_session()["tasks"]), ["task-001", "task-002"])
+
+    def test_completed_tasks_compacted_by_count_and_age(self):
+        federation_sync.create_session("sprint-x")
+        ids = [federation_sync.add_task(f"Task {n}", "kimi") for n in range(6)]
+        with mock.patch.object(federation_sync, "COMPACT_KEEP_COMPLETED", 2):
+            for task_id in ids[:4]:
+                federation_sync.update_task_status(task_id, "completed", completed=True)
+        session = federation_sync.read_session()
+        self.assertEqual(list(session["tasks"]), ids[2:])
+        self.assertEqual(session["compacted_tasks"], 2)
+        self.assertEqual([t["id"] for t in self._history().tasks(sprint="sprint-x")], ids[:2])
+
+        # Age: a completion older than the cutoff goes on the next write
+        federation_sync.patch_session({f"tasks.{ids[2]}.completed_at": "2020-01-01T00:00:00+00:00"})
+        self.assertNotIn(ids[2], federation_sync.read_session()["tasks"])
+        self.assertEqual(federation_sync.add_task("After compaction", "kimi"), "task-007")
+
+    def test_archive_is_queryable_by_sprint_and_date(self):
+        federation_sync.HISTORY_DIR.mkdir(parents=True)
+        (federation_sync.HISTORY_DIR / "2026-01-05T10-00-00Z.json").write_text(json.dumps({
+            "session_id": "sess-legacy", "sprint": "sprint-old", "archived_at": "2026-01-05T10:00:00+00:00",
+            "tasks": [{"id": "task-001", "status": "completed", "completed_at": "2026-01-05T09:00:00+00:00"}]
+        }))
+        federation_sync.create_session("sprint-x")
+        federation_sync.add_task("Ship it", "codex")
+        self.assertTrue(federation_sync.archive_session())
+        self.assertIsNone(federation_sync.read_session())
+
+        history = self._history()
+        self.assertEqual([s["session_id"] for s in history.sessions()][0], "sess-legacy")
+        current, = history.sessions(sprint="sprint-x")
+        self.assertEqual(current["status"], "archived")
+        self.assertEqual(history.sessions(since="2026-01-01", until="2026-01-05")[0]["sprint"], "sprint-old")
+        self.assertEqual(history.sessions(until="2026-01-04"), [])
+        self.assertEqual([t["description"] for t in history.tasks(sprint="sprint-x")], ["Ship it"])
+        self.assertEqual(len(history.tasks(status="completed")), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the predictive routing package (.federation/predictor).
+
+Usage:
+    python3 test_predictor.py
+    python3 test_predictor.py -v  # Verbose
+"""
+
+import json
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Make the predictor package importable
+sys.path.insert(0, str(Path(__file__).parent.parent / ".federation"))
+from predictor import FeatureExtractor, HistoricalLearner, LearningLog, SimilarityEngine
+
+
+class TestFeatureExtractorCache(unittest.TestCase):
+    """Test cases for memoized vectorization."""
+
+    def setUp(self):
+        """Create an extractor backed by a scratch data directory."""
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.extractor = FeatureExtractor(str(self.test_dir), cache_size=2)
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_normalized_text_hits_cache(self):
+        """Case and whitespace variants share one cache entry."""
+        first = self.extractor.vectorize_task("Implement  the AUTH api")
+        second = self.extractor.vectorize_task("implement the auth API ")
+        self.assertIs(first, second)
+        self.assertEqual(self.extractor.get_cache_stats()["hits"], 1)
+
+    def test_idf_update_invalidates_cache(self):
+        """Vectors computed before an IDF update are not reused."""
+        before = self.extractor.vectorize("deploy the service")
+        self.extractor.update_idf([["deploy"], ["service"], ["deploy", "cluster"]])
+        after = self.extractor.vectorize("deploy the service")
+        self.assertIsNot(before, after)
+        self.assertNotEqual(before["deploy"], after["deploy"])
+
+    def test_cache_is_bounded(self):
+        """Least recently used entries are evicted beyond capacity."""
+        for text in ["alpha task", "beta task", "gamma task"]:
+            self.extractor.vectorize(text)
+        self.assertEqual(self.extractor.get_cache_stats()["size"], 2)
+
+
+class TestStartupSnapshot(unittest.TestCase):
+    """Test cases for the SimilarityEngine startup snapshot."""
+
+    def setUp(self):
+        """Set up a scratch data directory."""
+        self.test_dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_snapshot_matches_full_load(self):
+        """An engine loaded from the snapshot routes exactly like a cold one."""
+        cold = SimilarityEngine(str(self.test_dir))
+        self.assertTrue((self.test_dir / SimilarityEngine.SNAPSHOT_FILE).exists())
+
+        warm = SimilarityEngine(str(self.test_dir))
+        self.assertTrue(warm._load_snapshot())
+        task = "Implement a REST API with authentication"
+        self.assertEqual(cold.find_best_matches(task), warm.find_best_matches(task))
+
+    def test_snapshot_invalidated_by_profile_change(self):
+        """Saving profiles makes the snapshot stale so the next start rebuilds it."""
+        engine = SimilarityEngine(str(self.test_dir))
+        engine.update_profile_from_completion("kimi", "Configure kubernetes ingress", True, 20.0)
+
+        reloaded = SimilarityEngine(str(self.test_dir))
+        self.assertEqual(reloaded.get_profile("kimi").task_count, 1)
+        self.assertIn("kubernetes", reloaded.get_profile("kimi").capability_vector)
+
+
+class TestCapabilityVectorBounds(unittest.TestCase):
+    """Test cases for bounded, decaying capability vectors."""
+
+    def setUp(self):
+        """Create an engine with a small budget for kimi."""
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.engine = SimilarityEngine(str(self.test_dir), vector_budgets={"kimi": 30})
+        self.base_terms = set(self.engine.get_profile("kimi").capability_vector)
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_budget_enforced_on_update(self):
+        """Learned terms never push a profile past its budget."""
+        for i in range(40):
+            self.engine.update_profile_from_completion(
+                "kimi", f"Configure service{chr(97 + i % 26)}alpha cluster{i}node", True, 10.0
+            )
+        vector = self.engine.get_profile("kimi").capability_vector
+        self.assertLessEqual(len(vector), 30)
+        self.assertTrue(self.base_terms <= set(vector))
+
+    def test_unused_terms_decay(self):
+        """A learned term loses weight when later tasks do not use it."""
+        self.engine.update_profile_from_completion("kimi", "Configure kubernetes ingress", True, 10.0)
+        initial = self.engine.get_profile("kimi").capability_vector["kubernetes"]
+        self.engine.update_profile_from_completion("kimi", "Migrate postgres schema", True, 10.0)
+        self.assertLess(self.engine.get_profile("kimi").capability_vector["kubernetes"], initial)
+
+    def test_budgets_loaded_from_data_dir(self):
+        """Budgets in vector_budgets.json apply unless the caller overrides them."""
+        (self.test_dir / SimilarityEngine.VECTOR_BUDGETS_FILE).write_text(json.dumps({"claude": 40, "kimi": 60}))
+        engine = SimilarityEngine(str(self.test_dir), vector_budgets={"kimi": 30})
+        self.assertEqual(engine.get_vector_budget("claude"), 40)
+        self.assertEqual(engine.get_vector_budget("kimi"), 30)
+        self.assertEqual(engine.get_vector_budget("codex"), SimilarityEngine.DEFAULT_VECTOR_BUDGET)
+
+    def test_compaction_report(self):
+        """Compaction prunes oversized profiles and reports sizes."""
+        profile = self.engine.get_profile("claude")
+        profile.capability_vector.update({f"term{i}": 0.001 for i in range(100)})
+        report = self.engine.compact_profiles(save=False)
+        self.assertEqual(report["agents"]["claude"]["terms_after"], len(self.engine._base_terms(profile)))
+        self.assertLess(report["bytes_after"], report["bytes_before"])
+
+
+class TestHistoricalLearner(unittest.TestCase):
+    """Test cases for similarity-based success prediction."""
+
+    def setUp(self):
+        """Create a learner backed by a scratch data directory."""
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.learner = HistoricalLearner(
+            queue_dir=str(self.test_dir / "queue"),
+            predictor_data_dir=str(self.test_dir / "data")
+        )
+        history = [
+            ("kimi", "Implement JWT authentication middleware", True),
+            ("kimi", "Write deployment script for staging", False),
+            ("claude", "Research caching strategies", True),
+        ]
+        for i, (agent, description, success) in enumerate(history):
+            self.learner.learn_from_task({
+                "task_id": f"task-{i}",
+                "description": description,
+                "completed_by": agent,
+                "success": success,
+                "duration_minutes": 10.0
+            })
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_similar_tasks_ranked_by_description(self):
+        """Most similar past task comes first, unrelated tasks are excluded."""
+        similar = self.learner._find_similar_past_tasks("kimi", "JWT authentication for the API")
+        self.assertEqual(len(similar), 1)
+        self.assertEqual(similar[0]["task_id"], "task-0")
+        self.assertGreater(similar[0]["similarity"], 0)
+
+    def test_similar_tasks_scoped_to_agent(self):
+        """Another agent's history is never returned."""
+        similar = self.learner._find_similar_past_tasks("claude", "JWT authentication")
+        self.assertEqual(similar, [])
+
+    def test_faint_matches_do_not_divide_by_zero(self):
+        """Similarities too small to show at 4 decimals still weight the prediction."""
+        index = self.learner._get_task_index()
+        index["kimi"] = [({"rare": 1.0}, 1.0, {"task_id": "task-faint", "success": False})]
+        prob = self.learner._predict_from_vector("kimi", {"rare": 1e-6, "other": 1.0})
+        base_rate = self.learner.engine.get_profile("kimi").success_rate
+        self.assertAlmostEqual(prob, 0.6 * base_rate)
+
+    def test_similar_failure_lowers_prediction(self):
+        """A failed similar task pulls the prediction below the base rate."""
+        base_rate = self.learner.engine.get_profile("kimi").success_rate
+        prob = self.learner.predict_success_probability("kimi", "deployment script for production")
+        self.assertLess(prob, base_rate)
+
+    def test_batch_prediction_matches_single(self):
+        """Batch scoring agrees with per-agent scoring."""
+        task = "Implement JWT authentication"
+        batch = self.learner.predict_success_probabilities(task)
+        self.assertEqual(set(batch), set(self.learner.engine.get_all_profiles()))
+        for agent_id, prob in batch.items():
+            self.assertAlmostEqual(prob, self.learner.predict_success_probability(agent_id, task))
+
+    def test_index_rebuilt_from_log(self):
+        """A fresh learner indexes the persisted learning log."""
+        reloaded = HistoricalLearner(
+            queue_dir=str(self.test_dir / "queue"),
+            predictor_data_dir=str(self.test_dir / "data")
+        )
+        similar = reloaded._find_similar_past_tasks("kimi", "JWT authentication middleware")
+        self.assertEqual(similar[0]["task_id"], "task-0")
+
+    def test_legacy_events_backfilled_from_queue(self):
+        """Events logged without descriptions are indexed from their queue task or title."""
+        data_dir = self.test_dir / "legacy"
+        data_dir.mkdir()
+        (data_dir / "learning_log.jsonl").write_text("".join(json.dumps(event) + "\n" for event in [
+            {"task_id": "task-old-1", "agent_id": "codex", "success": True, "duration": 5.0},
+            {"task_id": "task-old-2", "agent_id": "codex", "success": False, "duration": 5.0,
+             "title": "Migrate the billing database"},
+            {"task_id": "task-gone", "agent_id": "codex", "success": True, "duration": 5.0},
+        ]))
+        completed_dir = self.test_dir / "queue" / "completed"
+        completed_dir.mkdir(parents=True)
+        (completed_dir / "task-old-1.json").write_text(json.dumps({
+            "task_id": "task-old-1", "status": "completed", "description": "Refactor utils folder structure"
+        }))
+
+        learner = HistoricalLearner(queue_dir=str(self.test_dir / "queue"), predictor_data_dir=str(data_dir))
+        self.assertEqual(learner._find_similar_past_tasks("codex", "utils folder refactor")[0]["task_id"],
+                         "task-old-1")
+        self.assertEqual(learner._find_similar_past_tasks("codex", "billing database")[0]["task_id"],
+                         "task-old-2")
+        self.assertEqual(sum(len(entries) for entries in learner._get_task_index().values()), 2)
+
+
+class TestLearningFromQueue(unittest.TestCase):
+    """Completions are read through the queue's storage backend and archive."""
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        (self.test_dir / "state").mkdir()
+        (self.test_dir / "state" / "federation-state.json").write_text(
+            json.dumps({"queue": {"storage": "sqlite"}})
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_learns_from_sqlite_queue_and_archive(self):
+        """Completions in SQLite and in the compressed archive are learned once each."""
+        sys.path.insert(0, str(Path(__file__).parent))
+        from federation_queue import FederationQueue
+
+        queue = FederationQueue(queue_dir=self.test_dir / "queue",
+                                state_file=self.test_dir / "state" / "federation-state.json")
+        old, new, open_task = (queue.add("claude", "kimi", description)
+                               for description in ("Write API docs", "Implement JWT auth", "Still open"))
+        for task_id in (old, new):
+            queue.start(task_id)
+            queue.complete(task_id)
+        queue.compact(older_than_days=-1)  # Archives both completions
+        newest = queue.add("claude", "codex", "Deploy to staging")
+        queue.start(newest)
+        queue.complete(newest)
+        queue.storage.close()
+
+        learner = HistoricalLearner(queue_dir=str(self.test_dir / "queue"),
+                                    predictor_data_dir=str(self.test_dir / "data"))
+        result = learner.learn_from_all_completed()
+        self.assertEqual((result["total_tasks"], result["learned"]), (3, 3))
+        self.assertEqual(set(learner.get_learning_stats()["learning_by_agent"]), {"kimi", "codex"})
+        self.assertFalse(learner.log.has_task(open_task))
+
+        again = learner.learn_from_all_completed()
+        self.assertEqual((again["total_tasks"], again["learned"]), (1, 0))
+
+
+class TestLearningLog(unittest.TestCase):
+    """Test cases for the append-only learning log."""
+
+    def setUp(self):
+        """Set up a scratch data directory."""
+        self.test_dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def _event(self, i, agent="kimi", success=True):
+        return {"task_id": f"task-{i}", "agent_id": agent, "success": success,
+                "duration": 10.0, "timestamp": f"2026-02-06T10:{i:02d}:00"}
+
+    def test_stats_survive_compaction_and_reload(self):
+        """Aggregates match across segment rolls and a reopen."""
+        log = LearningLog(str(self.test_dir), compact_threshold=3)
+        for i in range(7):
+            log.append(self._event(i, success=i % 2 == 0))
+
+        self.assertEqual(len(list((self.test_dir / "learning_segments").iterdir())), 2)
+
+        reopened = LearningLog(str(self.test_dir), compact_threshold=3)
+        stats = reopened.stats()
+        self.assertEqual(stats["total_events"], 7)
+        self.assertEqual(stats["agents"]["kimi"]["successes"], 4)
+        self.assertEqual(stats["agents"]["kimi"]["duration_sum"], 70.0)
+        self.assertEqual([e["task_id"] for e in reopened.events()],
+                         [f"task-{i}" for i in range(7)])
+
+    def test_interrupted_compaction_not_double_counted(self):
+        """A snapshot written before the segment rename is completed on reopen."""
+        log = LearningLog(str(self.test_dir), compact_threshold=100)
+        for i in range(3):
+            log.append(self._event(i))
+        log._stats["segments"] += 1
+        log._write_stats()  # Crash before the active log is renamed
+
+        reopened = LearningLog(str(self.test_dir))
+        self.assertEqual(reopened.stats()["total_events"], 3)
+        self.assertEqual(len(reopened.events()), 3)
+
+    def test_learned_ids_persisted_with_stats(self):
+        """Already-learned checks come from the snapshot, not from reading segments."""
+        log = LearningLog(str(self.test_dir), compact_threshold=3)
+        for i in range(4):
+            log.append(self._event(i))
+
+        reopened = LearningLog(str(self.test_dir), compact_threshold=3)
+        self.assertTrue(reopened.has_task("task-0"))
+        self.assertTrue(reopened.has_task("task-3"))
+        self.assertFalse(reopened.has_task("task-4"))
+        self.assertIsNone(reopened._events)
+
+        # A snapshot written before IDs were persisted is backfilled once
+        stats = json.loads((self.test_dir / "learning_stats.json").read_text())
+        del stats["task_ids"]
+        (self.test_dir / "learning_stats.json").write_text(json.dumps(stats))
+        self.assertTrue(LearningLog(str(self.test_dir)).has_task("task-1"))
+        self.assertIn("task_ids", json.loads((self.test_dir / "learning_stats.json").read_text()))
+        self.assertEqual(len(LearningLog(str(self.test_dir))), 4)
+
+    def test_legacy_json_array_migrated(self):
+        """An old single-array learning_log.json is converted on open."""
+        (self.test_dir / "learning_log.json").write_text(
+            json.dumps([self._event(0), self._event(1, agent="claude")])
+        )
+        log = LearningLog(str(self.test_dir))
+        self.assertEqual(len(log), 2)
+        self.assertFalse((self.test_dir / "learning_log.json").exists())
+        self.assertIn("claude", log.stats()["agents"])
+
+
+if __name__ == "__main__":
+    unittest.main()